@@ -0,0 +1,280 @@
+"""
+Combat hot-path benchmark
+
+Builds a throwaway world on a local SQLite test database, drives scripted
+kill loops through CombatHandler.process_attack and reports per-phase
+latency, database queries and allocations per attack.
+
+Run from the game directory (the one holding server/conf/settings.py):
+
+    python -m benchmarks.combat --rooms 10 --characters 3 --hostiles 5 --attacks 2000
+    python -m benchmarks.combat --save-baseline benchmarks/combat_baseline.json
+    python -m benchmarks.combat --baseline benchmarks/combat_baseline.json
+
+The game database is never touched; Django's test database setup creates
+and destroys a separate one for the run.
+"""
+import argparse
+import json
+import math
+import os
+import random
+import sys
+import time
+import tracemalloc
+from collections import defaultdict
+
+# Phases timed inside each attack: name -> (module path, class name, method name)
+PHASES = {
+    "roundtime": ("scripts.combat_handler", "CombatHandler", "set_roundtime"),
+    "vulnerability": ("scripts.combat_handler", "CombatHandler", "set_vulnerability"),
+    "hit_check": ("scripts.combat_handler", "CombatHandler", "calculate_hit"),
+    "damage": ("typeclasses.hostiles", "Hostile", "take_damage"),
+    "messaging": ("scripts.message_batcher", "MessageBatcher", "msg_room"),
+    "message_flush": ("scripts.message_batcher", "MessageBatcher", "flush"),
+    "death": ("scripts.combat_handler", "CombatHandler", "handle_death"),
+}
+
+def setup_django():
+    """Configure Django and Evennia against a fresh test database."""
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "server.conf.settings")
+    import django
+    django.setup()
+
+    from django.test.utils import setup_databases, setup_test_environment
+    setup_test_environment()
+    db_config = setup_databases(verbosity=0, interactive=False)
+
+    import evennia
+    evennia._init()
+    return db_config
+
+def teardown_django(db_config):
+    """Destroy the test database."""
+    from django.test.utils import teardown_databases, teardown_test_environment
+    teardown_databases(db_config, verbosity=0)
+    teardown_test_environment()
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of a list of numbers."""
+    if not values:
+        return 0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, math.ceil(fraction * len(ordered)) - 1))
+    return ordered[index]
+
+class PhaseTimer:
+    """
+    Wraps the methods listed in PHASES so each call is timed.
+    Timings are collected per attack and the originals are restored on exit.
+    """
+    def __init__(self, phases):
+        self.phases = phases
+        self.originals = []
+        self.current = defaultdict(float)
+
+    def __enter__(self):
+        import importlib
+        for phase, (module_path, class_name, method_name) in self.phases.items():
+            cls = getattr(importlib.import_module(module_path), class_name)
+            original = getattr(cls, method_name)
+            self.originals.append((cls, method_name, cls.__dict__.get(method_name)))
+            setattr(cls, method_name, self._wrap(phase, original))
+        return self
+
+    def __exit__(self, *exc):
+        for cls, method_name, original in reversed(self.originals):
+            if original is None:
+                # Method was inherited, drop the wrapper to expose it again
+                delattr(cls, method_name)
+            else:
+                setattr(cls, method_name, original)
+        self.originals = []
+
+    def _wrap(self, phase, original):
+        timer = self
+
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return original(*args, **kwargs)
+            finally:
+                timer.current[phase] += time.perf_counter() - start
+        return timed
+
+    def take(self):
+        """Return and reset the phase timings of the current attack."""
+        timings, self.current = dict(self.current), defaultdict(float)
+        return timings
+
+def build_world(rooms, characters, hostiles):
+    """
+    Create the benchmark rooms, attackers and hostiles.
+
+    Returns:
+        list: [(room, [characters], [hostiles]), ...]
+    """
+    from evennia import create_object, settings
+
+    world = []
+    for room_num in range(rooms):
+        room = create_object(settings.BASE_ROOM_TYPECLASS, key=f"Bench Room {room_num}")
+        chars = [create_object("typeclasses.characters.Character", key=f"Bench Char {room_num}-{num}",
+                               location=room, home=room)
+                 for num in range(characters)]
+        foes = [create_object("typeclasses.hostiles.Hostile", key=f"Bench Hostile {room_num}-{num}",
+                              location=room, home=room)
+                for num in range(hostiles)]
+        world.append((room, chars, foes))
+    return world
+
+def ensure_global_scripts():
+    """Create global scripts that are normally made at server start."""
+    from evennia import create_script, GLOBAL_SCRIPTS
+    if not GLOBAL_SCRIPTS.stat_effect_handler:
+        create_script("scripts.stat_handler.StatEffectHandler",
+                      key="stat_effect_handler", persistent=True, autostart=True)
+    return GLOBAL_SCRIPTS.combat_handler
+
+def run(rooms=10, characters=3, hostiles=5, attacks=2000, seed=1, allocations=True):
+    """
+    Drive kill loops and measure every attack.
+
+    Args:
+        rooms (int): Rooms to build
+        characters (int): Attacking characters per room
+        hostiles (int): Hostiles per room
+        attacks (int): Total attacks to perform
+        seed (int): Seed for target selection and combat rolls
+        allocations (bool): Track allocations with tracemalloc (slower)
+
+    Returns:
+        dict: Flat {metric: value} results
+    """
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+    from scripts import rng
+    from scripts.message_batcher import BATCHER
+
+    # Combat rolls come from the game's named streams; targets are
+    # picked from a separate generator so they don't shift the rolls
+    rng.seed_all(seed)
+    picker = random.Random(seed)
+    combat = ensure_global_scripts()
+    world = build_world(rooms, characters, hostiles)
+
+    totals, queries, allocated, kills = [], [], [], 0
+    phase_samples = defaultdict(list)
+
+    if allocations:
+        tracemalloc.start()
+    with PhaseTimer(PHASES) as phase_timer:
+        for attack_num in range(attacks):
+            room, chars, foes = world[attack_num % len(world)]
+            living = [foe for foe in foes if foe.pk and foe.is_alive()]
+            if not living:
+                # Room cleared, repopulate it outside the measurement
+                from evennia import create_object
+                living = [create_object("typeclasses.hostiles.Hostile", key=f"Bench Hostile {room.id}-{num}",
+                                        location=room, home=room)
+                          for num in range(hostiles)]
+                foes[:] = living
+            attacker = picker.choice(chars)
+            target = picker.choice(living)
+            combat.clear_timer(attacker, "roundtime")
+
+            if allocations:
+                tracemalloc.reset_peak()
+                alloc_start = tracemalloc.get_traced_memory()[0]
+            with CaptureQueriesContext(connection) as captured:
+                start = time.perf_counter()
+                combat.process_attack(attacker, target)
+                # No reactor runs here, so send the batched output by hand
+                BATCHER.flush()
+                totals.append(time.perf_counter() - start)
+            queries.append(len(captured.captured_queries))
+            if allocations:
+                allocated.append(tracemalloc.get_traced_memory()[1] - alloc_start)
+
+            for phase, seconds in phase_timer.take().items():
+                phase_samples[phase].append(seconds)
+            if target.pk is None or not target.is_alive():
+                kills += 1
+    if allocations:
+        tracemalloc.stop()
+
+    results = {
+        "attacks": attacks,
+        "kills": kills,
+        "attack_p50_ms": percentile(totals, 0.5) * 1000,
+        "attack_p99_ms": percentile(totals, 0.99) * 1000,
+        "queries_per_attack_mean": sum(queries) / len(queries) if queries else 0,
+        "queries_per_attack_p99": percentile(queries, 0.99),
+    }
+    for phase in PHASES:
+        samples = phase_samples.get(phase, [])
+        results[f"{phase}_calls"] = len(samples)
+        results[f"{phase}_p50_ms"] = percentile(samples, 0.5) * 1000
+        results[f"{phase}_p99_ms"] = percentile(samples, 0.99) * 1000
+    if allocations:
+        results["alloc_peak_kib_mean"] = sum(allocated) / len(allocated) / 1024 if allocated else 0
+        results["alloc_peak_kib_p99"] = percentile(allocated, 0.99) / 1024
+    return results
+
+def format_report(results, baseline=None):
+    """
+    Format results as a table, with deltas if a baseline is given.
+
+    Args:
+        results (dict): Results from run()
+        baseline (dict, optional): Earlier results to compare against
+
+    Returns:
+        str: The report
+    """
+    lines = []
+    for metric, value in results.items():
+        line = f"{metric:32} {value:12.3f}"
+        if baseline and metric in baseline:
+            old = baseline[metric]
+            if old:
+                line += f"   baseline {old:12.3f}   {(value - old) / old:+8.1%}"
+            else:
+                line += f"   baseline {old:12.3f}"
+        lines.append(line)
+    return "\n".join(lines)
+
+def main(argv=None):
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(description="Benchmark CombatHandler.process_attack.")
+    parser.add_argument("--rooms", type=int, default=10)
+    parser.add_argument("--characters", type=int, default=3, help="attacking characters per room")
+    parser.add_argument("--hostiles", type=int, default=5, help="hostiles per room")
+    parser.add_argument("--attacks", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--no-allocations", action="store_true", help="skip tracemalloc (faster, less accurate timings otherwise)")
+    parser.add_argument("--baseline", help="JSON results file to compare against")
+    parser.add_argument("--save-baseline", help="write results to this JSON file")
+    args = parser.parse_args(argv)
+
+    db_config = setup_django()
+    try:
+        results = run(rooms=args.rooms, characters=args.characters, hostiles=args.hostiles,
+                      attacks=args.attacks, seed=args.seed, allocations=not args.no_allocations)
+    finally:
+        teardown_django(db_config)
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    print(format_report(results, baseline))
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+        print(f"Saved baseline to {args.save_baseline}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
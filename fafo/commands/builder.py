@@ -1,13 +1,14 @@
 """
 Room building commands for creating rooms and room layouts.
 """
-from django.core.exceptions import ObjectDoesNotExist
 from evennia import create_object, DefaultExit, search_tag
 from evennia.commands.default.building import ObjManipCommand
 from evennia import settings, GLOBAL_SCRIPTS
 from evennia.utils import evtable
-import random
 from typeclasses.exits import DegradingExit, StaticExit
+from world.bulk_build import BuildError, BulkBuilder, BulkDeleter, plan_grid, plan_maze
+from scripts.build_jobs import start_build_job
+from scripts import rng
 
 def get_next_block_number():
     """Get and increment the next available block number"""
@@ -457,187 +458,36 @@ class CmdBuildGrid(ObjManipCommand):
             "s": "south", 
             "w": "west"
         }
-        alias_map = {v: k for k, v in dir_map.items()}  # reverse mapping
         dir1_full = dir_map.get(dir1, dir1)
         dir2_full = dir_map.get(dir2, dir2)
 
-        if dir1 == dir2:
+        if dir1_full == dir2_full:
             caller.msg("The two directions must be different.")
             return
 
-        # Get opposite directions and their aliases
-        opposites = {
-            "north": "south",
-            "east": "west",
-            "south": "north",
-            "west": "east"
-        }
-        
         # Get block number for this grid
         block_num = get_next_block_number()
         
-        # Calculate base coordinates for grid
-        base_coords = coord_map.get_room_coords(caller.location) or (0, 0, 0)
-        
-        # Create first row
-        start_room = caller.location
-        prev_room = start_room
-        first_row = [start_room]
-        current_coords = list(base_coords)  # Convert to list for easy modification
-        
         # Set coordinates for starting room if not already set
+        start_room = caller.location
         if not coord_map.get_room_coords(start_room):
-            coord_map.set_room_coords(start_room, *current_coords)
-
-        def connect_to_adjacent(room, new_coords):
-            """Helper to connect room to any adjacent existing rooms"""
-            # Get all rooms from coord_map
-            for room_id, coords in coord_map.db.rooms.items():
-                if coords == new_coords or room_id == room.id:
-                    continue
-                    
-                # Check if this room is adjacent
-                if are_coords_adjacent(new_coords, coords):
-                    existing_room = coord_map.get_room_at_coords(*coords)
-                    if not existing_room or existing_room.id == room.id:
-                        continue
-                        
-                    # Find the direction that connects these rooms
-                    for direction, opposite in opposites.items():
-                        test_coords = coord_map.calculate_next_coords(existing_room, direction)
-                        if test_coords == new_coords:
-                            # Found the correct direction
-                            dir_aliases = []
-                            dir_short = alias_map.get(direction)
-                            if dir_short:
-                                dir_aliases.append(dir_short)
-                                
-                            if create_exit_if_none(direction, dir_aliases, existing_room, room, exit_typeclass=exit_typeclass):
-                                # Create return exit
-                                back_aliases = []
-                                back_short = alias_map.get(opposite)
-                                if back_short:
-                                    back_aliases.append(back_short)
-                                    
-                                create_exit_if_none(opposite, back_aliases, room, existing_room, exit_typeclass=exit_typeclass)
-
-        for i in range(num1):
-            # Calculate next coordinates in first direction
-            next_coords = list(coord_map.calculate_next_coords(prev_room, dir1))
-            
-            # Check if room exists at these coordinates
-            existing_room = coord_map.get_room_at_coords(*next_coords)
-            if existing_room:
-                caller.msg(f"Cannot build grid - room {existing_room.key} already exists at coordinates ({next_coords[0]}, {next_coords[1]}, {next_coords[2]})")
-                return
-
-            new_room = create_object(settings.BASE_ROOM_TYPECLASS, 
-                                   key="placeholder")
-            new_room.key = f"Block {block_num} Room{new_room.id}"
-            set_room_block(new_room, block_num)  # Use tag instead of attribute
-            
-            # Set coordinates
-            coord_map.set_room_coords(new_room, *next_coords)
-            
-            if force_connections:
-                connect_to_adjacent(new_room, next_coords)
-            
-            # Create exits with appropriate aliases
-            dir1_aliases = []
-            if dir1 != dir1_full:  # if we used short form, add long form
-                dir1_aliases.append(dir1_full)
-            elif dir1 in alias_map:  # if we used long form, add short form
-                dir1_aliases.append(alias_map[dir1])
-                
-            if create_exit_if_none(dir1, dir1_aliases, prev_room, new_room, exit_typeclass=exit_typeclass):
-                # Only create return exit if forward exit was created
-                back_dir = opposites[dir1_full]
-                back_aliases = []
-                back_short = alias_map.get(back_dir)
-                if back_short:
-                    back_aliases.append(back_short)
-                    
-                create_exit_if_none(back_dir, back_aliases, new_room, prev_room, exit_typeclass=exit_typeclass)
-
-            first_row.append(new_room)
-            prev_room = new_room
-            current_coords = next_coords
-
-        # Create additional rows
-        for j in range(num2):
-            prev_row = first_row
-            new_row = []
-            
-            for i, base_room in enumerate(prev_row):
-                # Calculate next coordinates in second direction
-                next_coords = list(coord_map.calculate_next_coords(base_room, dir2))
-                
-                # Check if room exists at these coordinates
-                existing_room = coord_map.get_room_at_coords(*next_coords)
-                if existing_room:
-                    caller.msg(f"Cannot complete grid - room {existing_room.key} already exists at coordinates ({next_coords[0]}, {next_coords[1]}, {next_coords[2]})")
-                    return
-
-                new_room = create_object(settings.BASE_ROOM_TYPECLASS,
-                                       key="placeholder")
-                new_room.key = f"Block {block_num} Room{new_room.id}"
-                set_room_block(new_room, block_num)  # Use tag instead of attribute
-                
-                # Set coordinates
-                coord_map.set_room_coords(new_room, *next_coords)
-                
-                if force_connections:
-                    connect_to_adjacent(new_room, next_coords)
-                
-                # Link to room above/below with both forms as aliases
-                dir2_aliases = []
-                if dir2 != dir2_full:  # if we used short form, add long form
-                    dir2_aliases.append(dir2_full)
-                elif dir2 in alias_map:  # if we used long form, add short form
-                    dir2_aliases.append(alias_map[dir2])
-                    
-                if create_exit_if_none(dir2, dir2_aliases, base_room, new_room, exit_typeclass=exit_typeclass):
-                    # Only create return exit if forward exit was created
-                    back_dir = opposites[dir2_full]
-                    back_aliases = []
-                    back_short = alias_map.get(back_dir)
-                    if back_short:
-                        back_aliases.append(back_short)
-                        
-                    create_exit_if_none(back_dir, back_aliases, new_room, base_room, exit_typeclass=exit_typeclass)
-                
-                # Link to previous room in row if it exists
-                if new_row:
-                    # Create forward exit with aliases
-                    dir1_aliases = []
-                    if dir1 != dir1_full:  # if we used short form, add long form
-                        dir1_aliases.append(dir1_full)
-                    elif dir1 in alias_map:  # if we used long form, add short form
-                        dir1_aliases.append(alias_map[dir1])
-                    
-                    if create_exit_if_none(dir1, dir1_aliases, new_row[-1], new_room, exit_typeclass=exit_typeclass):
-                        # Only create return exit if forward exit was created
-                        back_dir = opposites[dir1_full]
-                        back_aliases = []
-                        back_short = alias_map.get(back_dir)
-                        if back_short:
-                            back_aliases.append(back_short)
-                        
-                        create_exit_if_none(back_dir, back_aliases, new_room, new_row[-1], exit_typeclass=exit_typeclass)
-                
-                new_row.append(new_room)
-            
-            first_row = new_row
-
-        caller.msg(f"Created a grid {num1}x{num2} rooms extending {dir1} and {dir2} (block #{block_num}).")
-
-        # Set region on all created rooms
-        for room in first_row:
-            room.db.regions = {
-                'descriptive': region_id,
-                'spawning': None,
-                'resource': None
-            }
+            coord_map.set_room_coords(start_room, 0, 0, 0)
+        
+        # Plan the whole grid in memory before creating anything
+        try:
+            plan = plan_grid(coord_map, start_room, dir1, num1, dir2, num2, block_num,
+                             region_id=region_id, exit_typeclass=exit_typeclass,
+                             connect=force_connections)
+        except BuildError as err:
+            caller.msg(f"Cannot build grid - {err}")
+            return
+        
+        def on_done(job):
+            caller.msg(f"Created a grid {num1}x{num2} rooms extending {dir1} and {dir2} (block #{block_num}).")
+        
+        # Large grids are built in the background a batch at a time
+        start_build_job(caller, f"buildgrid block {block_num}",
+                        BulkBuilder(plan, coord_map).steps(), on_done=on_done)
 
 class CmdBuildMaze(ObjManipCommand):
     """
@@ -666,90 +516,8 @@ class CmdBuildMaze(ObjManipCommand):
         "west": "east", "northwest": "southeast"
     }
 
-    def get_valid_direction(self, source_room, existing_rooms):
-        """
-        Find a valid direction that doesn't collide with existing rooms.
-        
-        Args:
-            source_room (Object): Room to branch from
-            existing_rooms (list): List of already created rooms
-            
-        Returns:
-            tuple: (direction, coordinates) or (None, None) if no valid direction found
-        """
-        coord_map = get_coord_map()
-        source_coords = coord_map.get_room_coords(source_room)
-        if not source_coords:
-            return None, None
-            
-        directions = list(self.opposites.keys())
-        random.shuffle(directions)
-        
-        for direction in directions:
-            new_coords = coord_map.calculate_next_coords(source_room, direction)
-            # Check if space is free and coords are adjacent
-            if not coord_map.get_room_at_coords(*new_coords) and \
-               are_coords_adjacent(source_coords, new_coords):
-                return direction, new_coords
-        return None, None
-
-    def connect_to_adjacent_rooms(self, room, exclude_rooms=None):
-        """
-        Connect a room to all adjacent existing rooms.
-        
-        Args:
-            room (Object): Room to connect from
-            exclude_rooms (list): Rooms to exclude from connections
-        """
-        coord_map = get_coord_map()
-        room_coords = coord_map.get_room_coords(room)
-        if not room_coords:
-            return
-            
-        exclude_rooms = exclude_rooms or []
-        dir_map = {v: k for k, v in self.dir_map.items()}  # Reverse mapping for getting short forms
-        
-        # Get all rooms from coord_map
-        for room_id, coords in coord_map.db.rooms.items():
-            if room_id == room.id or room_id in [r.id for r in exclude_rooms]:
-                continue
-                
-            # Check if this room is adjacent
-            if are_coords_adjacent(room_coords, coords):
-                existing_room = coord_map.get_room_at_coords(*coords)
-                if not existing_room or existing_room.id == room.id:
-                    continue
-                    
-                # Find the direction that connects these rooms
-                for direction, opposite in self.opposites.items():
-                    test_coords = coord_map.calculate_next_coords(existing_room, direction)
-                    if test_coords == room_coords:
-                        # Found the correct direction - create aliases for both directions
-                        dir_aliases = []
-                        back_aliases = []
-                        
-                        # Add appropriate aliases for each direction
-                        # Forward exit aliases
-                        if direction in dir_map:  # If this is a long form
-                            dir_aliases.append(dir_map[direction])  # Add short form
-                        elif direction in self.dir_map:  # If this is a short form
-                            dir_aliases.append(self.dir_map[direction])  # Add long form
-                            
-                        # Return exit aliases
-                        if opposite in dir_map:  # If this is a long form
-                            back_aliases.append(dir_map[opposite])  # Add short form
-                        elif opposite in self.dir_map:  # If this is a short form 
-                            back_aliases.append(self.dir_map[opposite])  # Add long form
-                        
-                        # Create the exits with proper aliases
-                        if create_exit_if_none(direction, dir_aliases, existing_room, room):
-                            create_exit_if_none(opposite, back_aliases, room, existing_room)
-                        break
-
     def func(self):
         """Create the maze of rooms."""
-        import random
-        
         caller = self.caller
         
         # Validate initial arguments before region selection
@@ -810,144 +578,37 @@ class CmdBuildMaze(ObjManipCommand):
 
         # Get full direction name for messages
         full_direction = self.dir_map.get(direction, direction)
-        
-        # Calculate coordinates for first room
-        first_coords = coord_map.calculate_next_coords(caller.location, direction)
-        
-        # Check if room already exists at first position
-        if coord_map.get_room_at_coords(*first_coords):
-            caller.msg(f"Cannot start maze - a room already exists in that direction!")
-            return
-
-        # Direction mappings setup
-        alias_map = {v: k for k, v in self.dir_map.items()}  # reverse mapping
 
         # Get block number for this maze
         block_num = get_next_block_number()
-
-        # Create rooms
-        rooms = [caller.location]
-        created_rooms = []  # Track rooms we create (not including start room)
-
-        # Create and place first room
-        new_room = create_object(settings.BASE_ROOM_TYPECLASS,
-                               key="placeholder")
-        new_room.key = f"Block {block_num} Room{new_room.id}"
-        set_room_block(new_room, block_num)  # Tag handles block number
         
-        # Set coordinates for first room
-        coord_map.set_room_coords(new_room, *first_coords)
-        
-        # Create initial connection with specified direction
-        aliases = []
-        if direction != full_direction:  # if we used short form, add long form
-            aliases.append(full_direction)
-        elif direction in alias_map:  # if we used long form, add short form
-            aliases.append(alias_map[direction])
+        # Lay out the whole maze in memory before creating anything
+        try:
+            plan = plan_maze(coord_map, caller.location, direction, number, block_num,
+                             region_id=region_id, exit_typeclass=exit_typeclass,
+                             connect=force_connections)
+        except BuildError:
+            caller.msg(f"Cannot start maze - a room already exists in that direction!")
+            return
+        if plan.stopped_early:
+            caller.msg("Could not find a valid position for more rooms. Maze generation stopped.")
             
-        if create_exit_if_none(direction, aliases, caller.location, new_room, exit_typeclass=exit_typeclass):
-            # Only create return exit if forward exit was created
-            back_dir = self.opposites[full_direction]
-            back_aliases = []
-            back_short = alias_map.get(back_dir)
-            if back_short:
-                back_aliases.append(back_short)
-                
-            create_exit_if_none(back_dir, back_aliases, new_room, caller.location, exit_typeclass=exit_typeclass)
-        
-        if force_connections:
-            self.connect_to_adjacent_rooms(new_room, exclude_rooms=[caller.location])
+        start_room = caller.location
+        builder = BulkBuilder(plan, coord_map)
         
-        rooms.append(new_room)
-        created_rooms.append(new_room)
-
-        # Create remaining rooms
-        for i in range(number - 1):
-            # Create the room first
-            new_room = create_object(settings.BASE_ROOM_TYPECLASS,
-                                   key="placeholder")
-            new_room.key = f"Block {block_num} Room{new_room.id}"
-            set_room_block(new_room, block_num)  # Tag handles block number
+        def on_done(job):
+            caller.msg(f"Created a maze of {len(plan.rooms)} rooms starting {full_direction} (block #{block_num}).")
+            # Every maze room should be reachable from where it was started
+            graph = GLOBAL_SCRIPTS.exit_graph
+            if graph:
+                unreachable = graph.unreachable(start_room.id, builder.new_ids)
+                if unreachable:
+                    caller.msg(f"Warning: {len(unreachable)} maze rooms can't be reached from "
+                               f"{start_room.key}: {', '.join(f'#{room_id}' for room_id in sorted(unreachable))}")
             
-            # Try to find a valid position for this room
-            placed = False
-            for attempt in range(10):  # Try up to 10 different source rooms
-                source = random.choice(created_rooms)
-                rand_dir, new_coords = self.get_valid_direction(source, created_rooms)
-                
-                if rand_dir:
-                    # Found a valid position
-                    coord_map.set_room_coords(new_room, *new_coords)
-                    
-                    if force_connections:
-                        self.connect_to_adjacent_rooms(new_room, exclude_rooms=created_rooms + [caller.location])
-                    
-                    # Create exits between rooms
-                    rand_aliases = []
-                    rand_short = alias_map.get(rand_dir)
-                    if rand_short:
-                        rand_aliases.append(rand_short)
-                        
-                    if create_exit_if_none(rand_dir, rand_aliases, source, new_room, exit_typeclass=exit_typeclass):
-                        # Only create return exit if forward exit was created
-                        back_dir = self.opposites[rand_dir]
-                        back_aliases = []
-                        back_short = alias_map.get(back_dir)
-                        if back_short:
-                            back_aliases.append(back_short)
-                            
-                        create_exit_if_none(back_dir, back_aliases, new_room, source, exit_typeclass=exit_typeclass)
-                    
-                    placed = True
-                    break
-            
-            if not placed:
-                caller.msg("Could not find a valid position for more rooms. Maze generation stopped.")
-                break
-            
-            created_rooms.append(new_room)
-            rooms.append(new_room)
-
-            # 30% chance for additional connection, but only if we can find a valid direction
-            if i > 0 and random.random() < 0.3:
-                # Try to connect to nearby rooms
-                for other_room in random.sample(created_rooms[:-1], min(3, len(created_rooms[:-1]))):
-                    if other_room != source:
-                        # Check if rooms are adjacent before attempting connection
-                        other_coords = coord_map.get_room_coords(other_room)
-                        new_coords = coord_map.get_room_coords(new_room)
-                        
-                        if are_coords_adjacent(other_coords, new_coords):
-                            # Find the direction that connects these rooms
-                            for direction, opposite in self.opposites.items():
-                                test_coords = coord_map.calculate_next_coords(other_room, direction)
-                                if test_coords == new_coords:
-                                    # Found the correct direction
-                                    rand_aliases = []
-                                    rand_short = alias_map.get(direction)
-                                    if rand_short:
-                                        rand_aliases.append(rand_short)
-                                        
-                                    if create_exit_if_none(direction, rand_aliases, other_room, new_room, exit_typeclass=exit_typeclass):
-                                        # Create return exit
-                                        back_aliases = []
-                                        back_short = alias_map.get(opposite)
-                                        if back_short:
-                                            back_aliases.append(back_short)
-                                            
-                                        create_exit_if_none(opposite, back_aliases, new_room, other_room, exit_typeclass=exit_typeclass)
-                                    break
-                            break
-
-        caller.msg(f"Created a maze of {len(created_rooms)} rooms starting {full_direction} (block #{block_num}).")
-
-        # Set region on all created rooms
-        for room in created_rooms:
-            room.db.regions = {
-                'descriptive': region_id,
-                'spawning': None, 
-                'resource': None
-            }
+        # Large mazes are built in the background a batch at a time
+        start_build_job(caller, f"buildmaze block {block_num}",
+                        builder.steps(), on_done=on_done)
 
 class CmdInitCoords(ObjManipCommand):
     """
@@ -1077,8 +738,6 @@ class CmdDeleteBlock(ObjManipCommand):
             return
             
         # Find all rooms with this block number using evennia's search_tag
-        from evennia import search_tag
-        from evennia.objects.models import ObjectDB
         tag_key = f"room_block_{block_num}"
         rooms = search_tag(tag_key, category="room_block")
         
@@ -1099,61 +758,111 @@ class CmdDeleteBlock(ObjManipCommand):
             caller.msg("Use 'deleteblock <number>/force' to skip this warning.")
             return
             
-        coord_map = get_coord_map()
-        room_ids = set(room.id for room in rooms)
-        
-        # First pass - collect all exits and validate rooms still exist
-        valid_rooms = []
-        exits_to_delete = set()
+        deleter = BulkDeleter(rooms, get_coord_map())
         
-        # Find all exits connected to any of these rooms
-        exits = ObjectDB.objects.filter(db_typeclass_path__contains="exits.Exit").exclude(db_destination__isnull=True)
-        
-        for room in rooms:
-            try:
-                # Check if room still exists
-                if not room.pk:
-                    continue
-                valid_rooms.append(room)
-                
-                # Get exits in this room leading anywhere
-                exits_to_delete.update(exit for exit in room.exits if exit.pk)
-                
-                # Find exits from any room that lead to this room
-                exits_to_delete.update(
-                    exit for exit in exits 
-                    if exit.pk and exit.destination 
-                    and exit.destination.id == room.id
-                )
-                
-            except ObjectDoesNotExist:
-                continue
+        def on_done(job):
+            caller.msg(f"Deleted block {block_num}: {deleter.rooms_deleted} rooms and {deleter.exits_deleted} exits removed.")
+            
+        # Large blocks are deleted in the background a batch at a time
+        start_build_job(caller, f"deleteblock {block_num}", deleter.steps(), on_done=on_done)
+
+class CmdBuildJobs(ObjManipCommand):
+    """
+    List and control background build jobs.
+
+    Usage:
+      buildjobs
+      buildjobs/pause <job #>
+      buildjobs/resume <job #>
+      buildjobs/cancel <job #>
+
+    Large buildgrid, buildmaze and deleteblock runs work in the background
+    a batch at a time. Cancelling keeps whatever was already built or
+    deleted. Jobs do not survive a server reload.
+    """
+
+    key = "buildjobs"
+    locks = "cmd:perm(build) or perm(Builder)"
+    help_category = "Building"
+    switch_options = ("pause", "resume", "cancel")
+
+    def func(self):
+        """List or control jobs."""
+        caller = self.caller
+        manager = GLOBAL_SCRIPTS.build_jobs
         
-        # Delete exits first
-        exit_count = 0
-        for exit in exits_to_delete:
-            try:
-                if exit.pk and exit.id:  # Double check exit still exists
-                    exit.delete()
-                    exit_count += 1
-            except (ObjectDoesNotExist, AttributeError):
-                continue
+        if not self.switches:
+            jobs = sorted(manager.jobs.values(), key=lambda job: job.id)
+            if not jobs:
+                caller.msg("No build jobs are running.")
+                return
+            for job in jobs:
+                caller.msg(job.progress_msg())
+            return
             
-        # Then delete rooms and clean up coordinate tracking
-        rooms_deleted = 0
-        for room in valid_rooms:
-            try:
-                if room.pk and room.id:  # Double check room still exists
-                    # Remove from coordinate tracking
-                    if room.id in coord_map.db.rooms:
-                        del coord_map.db.rooms[room.id]
-                    # Delete the room
-                    room.delete()
-                    rooms_deleted += 1
-            except (ObjectDoesNotExist, AttributeError):
-                continue
+        try:
+            job_id = int(self.args.strip().lstrip("#"))
+        except ValueError:
+            caller.msg("Usage: buildjobs/<pause|resume|cancel> <job #>")
+            return
             
-        caller.msg(f"Deleted block {block_num}: {rooms_deleted} rooms and {exit_count} exits removed.")
+        action = self.switches[0]
+        if getattr(manager, action)(job_id):
+            caller.msg(f"Build job #{job_id}: {action} done.")
+        else:
+            caller.msg(f"Build job #{job_id} can't be {action}d right now.")
+
+class CmdRngSeed(ObjManipCommand):
+    """
+    Show or seed the game's random number streams.
+
+    Usage:
+      rngseed
+      rngseed <stream> <seed>
+      rngseed all <seed>
+      rngseed <stream> clear
+
+    Each subsystem (combat, wounds, exits, build, spawn, ai) draws from its
+    own stream. Seeding a stream makes its rolls repeat exactly, e.g. to
+    replay a fight from a bug report. 'all' seeds every stream from one
+    master seed; 'clear' goes back to an unpredictable seed.
+    """
+
+    key = "rngseed"
+    locks = "cmd:perm(Developer)"
+    help_category = "Building"
+
+    def func(self):
+        """Show or set stream seeds."""
+        caller = self.caller
+        args = self.args.split()
+        if not args:
+            for name in rng.STREAM_NAMES:
+                seed = rng.get_stream(name).seed_value
+                caller.msg(f"{name}: {'unseeded' if seed is None else seed}")
+            return
+        if len(args) != 2:
+            caller.msg("Usage: rngseed <stream|all> <seed|clear>")
+            return
+            
+        name, seed = args
+        if seed == "clear":
+            seed = None
+        elif seed.lstrip("-").isdigit():
+            seed = int(seed)
+            
+        if name == "all":
+            if seed is None:
+                for stream_name in rng.STREAM_NAMES:
+                    rng.seed_stream(stream_name, None)
+            else:
+                rng.seed_all(seed)
+            caller.msg("All random streams reseeded.")
+        elif name in rng.STREAM_NAMES:
+            rng.seed_stream(name, seed)
+            caller.msg(f"Random stream '{name}' reseeded.")
+        else:
+            caller.msg(f"Unknown stream. Streams: {', '.join(rng.STREAM_NAMES)}")
 
 class CmdAddRegion(ObjManipCommand):
     """
@@ -1247,7 +956,6 @@ class CmdAddRegion(ObjManipCommand):
             # Determine target rooms
             if len(args) > 1 and args[1].isdigit():  # If block number provided
                 block_num = int(args[1])
-                from evennia import search_tag
                 rooms = search_tag(f"room_block_{block_num}", category="room_block")
                 if not rooms:
                     caller.msg(f"No rooms found in block {block_num}.")
@@ -1318,7 +1026,6 @@ class CmdAddRegion(ObjManipCommand):
         # Handle block specification
         if len(args) > 2 and args[2].isdigit():
             block_num = int(args[2])
-            from evennia import search_tag
             rooms = search_tag(f"room_block_{block_num}", category="room_block")
             if not rooms:
                 caller.msg(f"No rooms found in block {block_num}.")
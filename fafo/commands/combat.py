@@ -2,19 +2,55 @@
 Combat commands module.
 """
 from evennia import Command, GLOBAL_SCRIPTS
-from evennia.utils.utils import time_format
+from evennia.utils.utils import time_format, run_async
+from scripts import combat_core
+from scripts.message_batcher import VERBOSITY_LEVELS
 from typeclasses.characters import Character
 from typeclasses.hostiles import Hostile
 import time
 
+# Most foes a single sweep can hit
+MAX_SWEEP_TARGETS = 5
+
+def find_auto_target(caller, combat):
+    """
+    Pick a target for an attack with no target given: the foe with the
+    most threat against the caller, then any hostile already fighting
+    in the room, then the first living hostile in the room.
+    
+    Args:
+        caller (Object): The attacker
+        combat (CombatHandler): The combat handler
+        
+    Returns:
+        Object or None: The target, if any
+    """
+    engagements = combat.engagements
+    target = engagements.top_threat(caller)
+    if target:
+        return target
+    if not caller.location:
+        return None
+    for obj in engagements.room_combatants(caller.location):
+        if isinstance(obj, Hostile):
+            return obj
+    # Nobody is fighting here yet
+    for obj in caller.location.contents:
+        if isinstance(obj, Hostile) and obj.is_alive():
+            return obj
+    return None
+
 class CmdKill(Command):
     """
     Attack another character or NPC.
     
     Usage:
       kill <target>
+      kill
       
-    Initiates combat with the specified target.
+    Initiates combat with the specified target. Without a target you
+    attack whoever is pressing you hardest, or join a fight already
+    going on in the room.
     """
     key = "kill"
     aliases = ["attack", "k", "kil"]
@@ -24,6 +60,7 @@ class CmdKill(Command):
     def func(self):
         """Handle the kill command."""
         target = None
+        combat = GLOBAL_SCRIPTS.combat_handler
         
         if self.args:
             target = self.caller.search(self.args)
@@ -31,12 +68,8 @@ class CmdKill(Command):
                 # search handled error message
                 return
         else:
-            # No target specified, look for the first hostile in the room
-            if self.caller.location:
-                for obj in self.caller.location.contents:
-                    if isinstance(obj, Hostile) and obj.is_alive():
-                        target = obj
-                        break
+            # No target specified, pick one from the fights in the room
+            target = find_auto_target(self.caller, combat)
             
             if not target:
                 self.caller.msg("No valid targets found!")
@@ -53,17 +86,72 @@ class CmdKill(Command):
             return
             
         # Check we're not in roundtime
-        combat = GLOBAL_SCRIPTS.combat_handler
         in_roundtime, remaining = combat.is_in_roundtime(self.caller)
         if in_roundtime:
             self.caller.msg(f"You are still recovering from your last action! ({time_format(remaining, 1)} remaining)")
             return
             
-        # Process the attack through combat handler
-        hit, damage, roundtime_script = combat.process_attack(self.caller, target)
-        
-        # Set roundtime
-        self.caller.db.roundtime = roundtime_script
+        # Process the attack through combat handler, which tracks the roundtime
+        combat.process_attack(self.caller, target)
+
+class CmdCombatVerbosity(Command):
+    """
+    Choose how much of other people's fights you see.
+    
+    Usage:
+      combatmsg
+      combatmsg full|brief|off
+      
+    full shows every roll, brief a one line summary of each swing, and
+    off hides swings in fights you aren't part of. Your own fights are
+    always shown in full.
+    """
+    key = "combatmsg"
+    locks = "cmd:all()"
+    help_category = "Combat"
+    
+    def func(self):
+        """Show or set the combat verbosity."""
+        caller = self.caller
+        level = self.args.strip().lower()
+        if not level:
+            caller.msg(f"Combat verbosity: {caller.combat_verbosity}")
+            return
+        if level not in VERBOSITY_LEVELS:
+            caller.msg(f"Usage: combatmsg {'|'.join(VERBOSITY_LEVELS)}")
+            return
+        caller.combat_verbosity = level
+        caller.msg(f"Combat verbosity set to {level}.")
+
+class CmdSweep(Command):
+    """
+    Swing at every foe you are fighting at once.
+    
+    Usage:
+      sweep
+      
+    Hits up to five of the foes engaged with you, most threatening
+    first, for a single roundtime.
+    """
+    key = "sweep"
+    locks = "cmd:all()"
+    help_category = "Combat"
+    
+    def func(self):
+        """Attack every engaged foe."""
+        caller = self.caller
+        combat = GLOBAL_SCRIPTS.combat_handler
+        targets = combat.engagements.opponents(caller)[:MAX_SWEEP_TARGETS]
+        if not targets:
+            caller.msg("You aren't fighting anyone!")
+            return
+            
+        in_roundtime, remaining = combat.is_in_roundtime(caller)
+        if in_roundtime:
+            caller.msg(f"You are still recovering from your last action! ({time_format(remaining, 1)} remaining)")
+            return
+            
+        combat.process_area_attack(caller, targets)
 
 class CmdAim(Command):
     """
@@ -140,4 +228,84 @@ class CmdAim(Command):
             self.caller.aim = target
             self.caller.msg(f"You will target the {target.replace('_', ' ')} with your next attack.")
         except ValueError as e:
-            self.caller.msg(str(e))
\ No newline at end of file
+            self.caller.msg(str(e))
+
+class CmdSimCombat(Command):
+    """
+    Simulate a matchup for balance testing.
+    
+    Usage:
+      simcombat <attacker> = <defender> [swings]
+      
+    Runs the combat rules over many simulated swings using both
+    combatants' current stats, then reports hit rates, damage and
+    time-to-kill for the attacker. Nothing in the game is changed.
+    
+    Examples:
+      simcombat me = goblin
+      simcombat goblin = me 100000
+    """
+    key = "simcombat"
+    locks = "cmd:perm(Builder)"
+    help_category = "Combat"
+    
+    # Upper limit on swings, lower when NumPy isn't available
+    max_swings = 1000000 if combat_core.np is not None else 50000
+    
+    def func(self):
+        """Handle the simcombat command."""
+        caller = self.caller
+        if "=" not in self.args:
+            caller.msg("Usage: simcombat <attacker> = <defender> [swings]")
+            return
+            
+        lhs, rhs = self.args.split("=", 1)
+        rhs = rhs.split()
+        if not lhs.strip() or not rhs:
+            caller.msg("Usage: simcombat <attacker> = <defender> [swings]")
+            return
+            
+        swings = 100000
+        if len(rhs) > 1:
+            if not rhs[-1].isdigit():
+                caller.msg("Swings must be a positive number.")
+                return
+            swings = int(rhs.pop())
+        swings = max(1, min(swings, self.max_swings))
+        
+        attacker = caller.search(lhs.strip())
+        defender = caller.search(" ".join(rhs))
+        if not attacker or not defender:
+            return
+        if not all(isinstance(obj, (Character, Hostile)) for obj in (attacker, defender)):
+            caller.msg("Both sides must be characters or hostiles.")
+            return
+            
+        combat = GLOBAL_SCRIPTS.combat_handler
+        attacker_stats = combat.get_combatant(attacker)
+        defender_stats = combat.get_combatant(defender)
+        fights = max(1, swings // 100)
+        caller.msg(f"Simulating {swings} swings and {fights} fights of {attacker.key} against {defender.key}...")
+        
+        def _report(report):
+            damage = report["damage"]
+            ttk = report["time_to_kill"]
+            lines = [
+                f"|wSimulation: {attacker.key} vs {defender.key}|n",
+                f"Hit rate: {report['hit_rate']:.1%} (power hits {report['power_hit_rate']:.1%})",
+                f"Left vulnerable: {report['vulnerable_rate']:.1%} of swings",
+                f"Damage per hit: mean {damage['mean']:.1f}, p10 {damage['p10']}, "
+                f"p50 {damage['p50']}, p90 {damage['p90']}, max {damage['max']}",
+            ]
+            if ttk["mean"] is None:
+                lines.append("Time to kill: no kills")
+            else:
+                lines.append(f"Time to kill: mean {ttk['mean']:.1f}s, p50 {ttk['p50']}s, p90 {ttk['p90']}s")
+            if ttk["unfinished"]:
+                lines.append(f"Unfinished fights: {ttk['unfinished']} of {ttk['fights']}")
+            caller.msg("\n".join(lines))
+            
+        # Run off the reactor thread; the core only works on plain numbers
+        run_async(combat_core.simulate_matchup, attacker_stats, defender_stats,
+                  swings=swings, fights=fights, at_return=_report,
+                  at_err=lambda err: caller.msg(f"Simulation failed: {err}"))
@@ -2,6 +2,7 @@
 Compass direction commands for navigation.
 """
 from evennia.commands.default.building import ObjManipCommand
+from typeclasses.exits import exit_direction
 
 class CompassCommand(ObjManipCommand):
     """Base class for compass direction navigation commands."""
@@ -15,15 +16,18 @@ class CompassCommand(ObjManipCommand):
             caller.msg("You have no location to move from!")
             return
 
-        exits = [exit for exit in caller.location.exits 
-                if exit.key.lower() == direction.lower()]
+        location = caller.location
+        if hasattr(location, "get_exit"):
+            exit_obj = location.get_exit(direction)
+        else:
+            exit_obj = next((exit for exit in location.exits
+                             if exit_direction(exit) == direction), None)
         
-        if not exits:
+        if not exit_obj:
             caller.msg(f"You cannot go {direction}.")
             return
             
-        # Move through the first matching exit
-        exits[0].at_traverse(caller)
+        exit_obj.at_traverse(caller, exit_obj.destination)
 
 class CmdNorth(CompassCommand):
     """
@@ -12,10 +12,11 @@ To create new commands to populate the cmdset, see
 from evennia import default_cmds, CmdSet
 from commands.builder import (CmdBuildRoom, CmdBuildGrid, CmdBuildMaze, 
                             CmdInitCoords, CmdCheckCoords, CmdDeleteBlock,
-                            CmdAddRegion)
+                            CmdAddRegion, CmdBuildJobs, CmdRngSeed)
 from commands.compass import (CmdNorth, CmdSouth, CmdEast, CmdWest,
                             CmdNortheast, CmdNorthwest, CmdSoutheast, CmdSouthwest)
-from commands.combat import CmdKill, CmdAim
+from commands.travel import CmdTravel
+from commands.combat import CmdKill, CmdAim, CmdSimCombat, CmdCombatVerbosity, CmdSweep
 from commands import stat_effects
 
 class CompassCmdSet(CmdSet):
@@ -37,6 +38,7 @@ class CompassCmdSet(CmdSet):
         self.add(CmdNorthwest())
         self.add(CmdSoutheast())
         self.add(CmdSouthwest())
+        self.add(CmdTravel())
 
 class BuilderCmdSet(CmdSet):
     """
@@ -56,6 +58,8 @@ class BuilderCmdSet(CmdSet):
         self.add(CmdBuildGrid())
         self.add(CmdBuildMaze())
         self.add(CmdAddRegion())
+        self.add(CmdBuildJobs())
+        self.add(CmdRngSeed())
 
 class CombatCmdSet(CmdSet):
     """
@@ -69,7 +73,10 @@ class CombatCmdSet(CmdSet):
         Add combat commands to the set.
         """
         self.add(CmdKill())
+        self.add(CmdSweep())
         self.add(CmdAim())
+        self.add(CmdSimCombat())
+        self.add(CmdCombatVerbosity())
 
 class CharacterCmdSet(default_cmds.CharacterCmdSet):
     """
@@ -40,12 +40,7 @@ class CmdEffect(Command):
         args = self.args.split()
         if args[0] == "list":
             # Show active effects
-            char_id = self.caller.id
-            if char_id not in effect_handler.db.effects:
-                self.caller.msg("You have no active effects.")
-                return
-                
-            effects = effect_handler.db.effects[char_id]
+            effects = effect_handler.get_effects(self.caller)
             if not effects:
                 self.caller.msg("You have no active effects.")
                 return
@@ -115,7 +110,7 @@ class CmdEffect(Command):
                 
             if args[1] == "all":
                 # Remove all effects
-                for stat in list(effect_handler.db.effects.get(self.caller.id, {}).keys()):
+                for stat in list(effect_handler.get_effects(self.caller).keys()):
                     effect_handler.remove_effect(self.caller, stat=stat)
                 self.caller.msg("Removed all effects.")
             else:
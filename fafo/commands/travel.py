@@ -0,0 +1,165 @@
+"""
+Travel command for walking to a distant room along the exit graph.
+"""
+from evennia import Command, GLOBAL_SCRIPTS, ObjectDB
+from evennia.utils.utils import delay
+
+# Seconds between steps while travelling
+TRAVEL_STEP_DELAY = 1
+
+class CmdTravel(Command):
+    """
+    Walk to a distant room along the shortest route.
+
+    Usage:
+      travel <#room id>
+      travel <x> <y> [z]
+      travel stop
+
+    Works out a route through the exits and walks it one room per second.
+    Roundtime pauses the journey; wandering off the route or travelling
+    somewhere else stops it.
+
+    Examples:
+      travel #1234
+      travel 1003 998
+      goto stop
+    """
+    key = "travel"
+    aliases = ["goto"]
+    locks = "cmd:all()"
+    help_category = "Navigation"
+
+    def func(self):
+        """Find a route and start walking it."""
+        caller = self.caller
+        args = self.args.strip().split()
+        if not args:
+            caller.msg("Usage: travel <#room id> OR travel <x> <y> [z] OR travel stop")
+            return
+
+        if args[0].lower() == "stop":
+            if caller.ndb.travel_path:
+                caller.ndb.travel_path = None
+                caller.msg("You stop travelling.")
+            else:
+                caller.msg("You aren't travelling anywhere.")
+            return
+
+        if not caller.location:
+            caller.msg("You have no location to travel from!")
+            return
+
+        target = self.find_target(args)
+        if not target:
+            return
+        if target == caller.location:
+            caller.msg("You are already there.")
+            return
+
+        path = GLOBAL_SCRIPTS.exit_graph.find_path(caller.location.id, target.id,
+                                                   exit_filter=passable_exits(caller))
+        if path is None:
+            caller.msg(f"You can't find a way to {target.get_display_name(caller)}.")
+            return
+
+        caller.msg(f"You set off towards {target.get_display_name(caller)} ({len(path)} steps).")
+        # A new list, so a journey started later replaces this one
+        caller.ndb.travel_path = list(path)
+        delay(TRAVEL_STEP_DELAY, take_step, caller, caller.ndb.travel_path, caller.location.id)
+
+    def find_target(self, args):
+        """Get the destination room from a #dbref or coordinates."""
+        caller = self.caller
+        if args[0].startswith("#"):
+            try:
+                return ObjectDB.objects.get(id=int(args[0][1:]), db_location__isnull=True)
+            except (ValueError, ObjectDB.DoesNotExist):
+                caller.msg(f"There is no room {args[0]}.")
+                return None
+
+        try:
+            coords = [int(arg) for arg in args[:3]]
+        except ValueError:
+            caller.msg("Usage: travel <#room id> OR travel <x> <y> [z] OR travel stop")
+            return None
+        if len(coords) < 2:
+            caller.msg("Coordinates need at least x and y.")
+            return None
+
+        coord_map = GLOBAL_SCRIPTS.coord_map_manager
+        if len(coords) == 2:
+            current_coords = coord_map.get_room_coords(caller.location)
+            coords.append(current_coords[2] if current_coords else 0)
+        room = coord_map.get_room_at_coords(*coords)
+        if not room:
+            caller.msg(f"There is no room at ({coords[0]}, {coords[1]}, {coords[2]}).")
+        return room
+
+def passable_exits(caller):
+    """
+    Make an exit filter for route searches that only allows exits the
+    caller can see and traverse.
+
+    Args:
+        caller (Object): The traveller
+
+    Returns:
+        callable: Takes an exit id and returns whether the caller may use it
+    """
+    checked = {}
+
+    def can_pass(exit_id):
+        allowed = checked.get(exit_id)
+        if allowed is None:
+            exit_obj = ObjectDB.objects.filter(id=exit_id).first()
+            allowed = checked[exit_id] = bool(
+                exit_obj and exit_obj.access(caller, "view") and exit_obj.access(caller, "traverse"))
+        return allowed
+
+    return can_pass
+
+def take_step(caller, path, expected_room_id):
+    """
+    Walk one exit of a journey, then wait for the next step.
+
+    Args:
+        caller (Object): The traveller
+        path (list): Exit ids still to take; the journey stops if the
+            caller's current journey is no longer this list
+        expected_room_id (int): Where the caller should be standing
+    """
+    if caller.ndb.travel_path is not path or not path:
+        return
+    if not caller.location or caller.location.id != expected_room_id:
+        caller.ndb.travel_path = None
+        caller.msg("You have wandered off your route and stop travelling.")
+        return
+
+    combat = GLOBAL_SCRIPTS.combat_handler
+    if combat and combat.is_in_roundtime(caller)[0]:
+        # Busy fighting, try again next step
+        delay(TRAVEL_STEP_DELAY, take_step, caller, path, expected_room_id)
+        return
+
+    exit_id = path.pop(0)
+    exit_obj = ObjectDB.objects.filter(id=exit_id).first()
+    if not exit_obj or not exit_obj.destination or exit_obj.location != caller.location:
+        caller.ndb.travel_path = None
+        caller.msg("The way ahead has changed and you stop travelling.")
+        return
+    if not exit_obj.access(caller, "traverse"):
+        # Locks may have changed since the route was planned
+        caller.ndb.travel_path = None
+        caller.msg(f"You can't go {exit_obj.get_display_name(caller)} and stop travelling.")
+        return
+
+    exit_obj.at_traverse(caller, exit_obj.destination)
+    if caller.location != exit_obj.destination:
+        caller.ndb.travel_path = None
+        return
+    if not path:
+        caller.ndb.travel_path = None
+        caller.msg("You have arrived.")
+        return
+    delay(TRAVEL_STEP_DELAY, take_step, caller, path, caller.location.id)
@@ -0,0 +1,209 @@
+"""
+Build jobs
+
+Large world-building work (grids, mazes, block deletion) runs as a
+background job instead of inside the command. A job is a generator that
+does one small batch of database work per step; the job manager runs
+steps for a short slice of time, then hands control back to the reactor
+so everyone else's commands keep flowing. Builders get progress reports
+and can pause, resume or cancel their jobs.
+
+Jobs live in memory only and do not survive a server reload.
+"""
+import itertools
+import time
+from twisted.internet import reactor
+from evennia import DefaultScript
+from evennia.utils.logger import log_trace
+
+# Seconds of building done per slice before yielding to the reactor
+SLICE_SECONDS = 0.05
+
+# Seconds to wait between slices
+SLICE_DELAY = 0.05
+
+# Seconds between progress messages to the builder
+PROGRESS_INTERVAL = 5
+
+class BuildJob:
+    """
+    One background build, driven a step at a time by the job manager.
+    """
+    def __init__(self, job_id, caller, description, steps, on_done=None):
+        """
+        Args:
+            job_id (int): Id shown to builders
+            caller (Object): Builder who started the job, gets progress messages
+            description (str): Short description of the job
+            steps (generator): Yields (stage, done, total) after each batch
+            on_done (callable, optional): Called with the job when it finishes
+        """
+        self.id = job_id
+        self.caller = caller
+        self.description = description
+        self.steps = steps
+        self.on_done = on_done
+        self.state = "running"
+        self.progress = ("starting", 0, 0)
+        self.started = time.time()
+        self.last_report = self.started
+        self.call = None
+
+    def progress_msg(self):
+        """Describe where the job is at."""
+        stage, done, total = self.progress
+        return f"Build job #{self.id} ({self.description}) {self.state}: {stage} {done}/{total}"
+
+class BuildJobManager(DefaultScript):
+    """
+    Global script that runs build jobs in small slices.
+    """
+
+    def at_script_creation(self):
+        """Set up the script."""
+        self.key = "build_jobs"
+        self.desc = "Runs world-building jobs in the background"
+        self.persistent = True
+
+    @property
+    def jobs(self):
+        """Jobs that are running or paused, keyed by id."""
+        if self.ndb.jobs is None:
+            self.ndb.jobs = {}
+            self.ndb.counter = itertools.count(1)
+        return self.ndb.jobs
+
+    def start(self, caller, description, steps, on_done=None):
+        """
+        Start a new job. Its first slice runs right away, so small jobs
+        finish before this returns.
+
+        Args:
+            caller (Object): Builder who started the job
+            description (str): Short description of the job
+            steps (generator): Yields (stage, done, total) after each batch
+            on_done (callable, optional): Called with the job when it finishes
+
+        Returns:
+            BuildJob: The new job
+        """
+        jobs = self.jobs
+        job = BuildJob(next(self.ndb.counter), caller, description, steps, on_done=on_done)
+        jobs[job.id] = job
+        self._run_slice(job)
+        if job.state == "running":
+            caller.msg(f"Build job #{job.id} started in the background. "
+                       f"Use 'buildjobs' to check on it.")
+        return job
+
+    def get_job(self, job_id):
+        """Get a running or paused job by id."""
+        return self.jobs.get(job_id)
+
+    def pause(self, job_id):
+        """
+        Stop running a job's steps until it is resumed.
+
+        Returns:
+            bool: True if the job was paused
+        """
+        job = self.get_job(job_id)
+        if not job or job.state != "running":
+            return False
+        job.state = "paused"
+        if job.call and job.call.active():
+            job.call.cancel()
+        job.call = None
+        return True
+
+    def resume(self, job_id):
+        """
+        Continue a paused job where it left off.
+
+        Returns:
+            bool: True if the job was resumed
+        """
+        job = self.get_job(job_id)
+        if not job or job.state != "paused":
+            return False
+        job.state = "running"
+        job.call = reactor.callLater(0, self._run_slice, job)
+        return True
+
+    def cancel(self, job_id):
+        """
+        Stop a job for good. Work already done is kept; the job's own
+        cleanup runs as its generator is closed.
+
+        Returns:
+            bool: True if the job was cancelled
+        """
+        job = self.get_job(job_id)
+        if not job:
+            return False
+        if job.call and job.call.active():
+            job.call.cancel()
+        job.state = "cancelled"
+        try:
+            job.steps.close()
+        except Exception:
+            log_trace(f"Error cancelling build job #{job.id}")
+        del self.jobs[job.id]
+        return True
+
+    def at_stop(self):
+        """Cancel every job when the script stops."""
+        for job_id in list(self.jobs):
+            self.cancel(job_id)
+
+    def _run_slice(self, job):
+        """Run a job's steps for one time slice, then schedule the next slice."""
+        job.call = None
+        if job.state != "running":
+            return
+        deadline = time.time() + SLICE_SECONDS
+        try:
+            while time.time() < deadline:
+                job.progress = next(job.steps)
+        except StopIteration:
+            self._finish(job, "done")
+            return
+        except Exception:
+            log_trace(f"Error in build job #{job.id}")
+            self._finish(job, "failed")
+            return
+
+        now = time.time()
+        if now - job.last_report >= PROGRESS_INTERVAL:
+            job.last_report = now
+            job.caller.msg(job.progress_msg())
+        job.call = reactor.callLater(SLICE_DELAY, self._run_slice, job)
+
+    def _finish(self, job, state):
+        """Mark a job as finished and tell the builder."""
+        job.state = state
+        self.jobs.pop(job.id, None)
+        if state == "failed":
+            job.caller.msg(f"Build job #{job.id} ({job.description}) failed: {job.progress_msg()}")
+            return
+        if job.on_done:
+            try:
+                job.on_done(job)
+            except Exception:
+                log_trace(f"Error finishing build job #{job.id}")
+
+def start_build_job(caller, description, steps, on_done=None):
+    """
+    Run a build through the global job manager.
+
+    Args:
+        caller (Object): Builder who started the job
+        description (str): Short description of the job
+        steps (generator): Yields (stage, done, total) after each batch
+        on_done (callable, optional): Called with the job when it finishes
+
+    Returns:
+        BuildJob: The new job
+    """
+    from evennia import GLOBAL_SCRIPTS
+    return GLOBAL_SCRIPTS.build_jobs.start(caller, description, steps, on_done=on_done)
@@ -0,0 +1,300 @@
+"""
+Combat core
+
+Pure combat rules that work on plain numbers instead of typeclassed objects.
+The live CombatHandler calls these functions for every swing, and the
+simulation helpers below run the same rules over large batches of swings
+so monster stats can be balanced without fighting on the live server.
+
+NumPy is used for batch simulation when it is installed; otherwise the
+simulation falls back to a (much slower) pure-Python loop.
+"""
+import math
+import random
+from collections import namedtuple
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Seconds of roundtime after every attack
+BASE_ROUNDTIME = 5
+
+# Weapon speed used when no weapon is held
+DEFAULT_WEAPON_SPEED = 5
+
+# Plain combat numbers for one side of a simulated matchup
+Combatant = namedtuple("Combatant", ("attack", "defense", "power", "health", "finesse", "weapon_speed"))
+
+def combatant_from_snapshot(snapshot, health, finesse=0, weapon_speed=DEFAULT_WEAPON_SPEED):
+    """
+    Build a Combatant from a StatSnapshot.
+
+    Args:
+        snapshot (StatSnapshot): Resolved stats of a character or hostile
+        health (int): Health to simulate with
+        finesse (int): Weapon finesse rank
+        weapon_speed (float): Weapon speed of the held weapon
+
+    Returns:
+        Combatant: The combatant's plain stats
+    """
+    return Combatant(snapshot.attack, snapshot.defense, snapshot.power,
+                     health, finesse, weapon_speed)
+
+def roll_d100(rng=random):
+    """Roll a d100 (1-100) with the given random generator."""
+    if hasattr(rng, "d100"):
+        # Game random streams hand out pre-rolled d100s
+        return rng.d100()
+    return rng.randint(1, 100)
+
+def apply_vulnerability(defense_base, def_reduction):
+    """
+    Reduce a defense value by a vulnerability percentage.
+
+    Args:
+        defense_base (int): Defense before the d100 roll
+        def_reduction (float): Percentage reduction to defense
+
+    Returns:
+        int: The reduced defense
+    """
+    return int(defense_base * max(0, 1 - (def_reduction / 100)))
+
+def resolve_attack(attack_base, defense_base, attack_roll, defense_roll, power_diff):
+    """
+    Resolve the two-stage hit check.
+
+    Args:
+        attack_base (int): Attack value before the d100 roll
+        defense_base (int): Defense value before the d100 roll
+        attack_roll (int): Attacker's d100 roll
+        defense_roll (int): Defender's d100 roll
+        power_diff (int): Attacker's power advantage (never negative)
+
+    Returns:
+        tuple: (bool hits, bool power_hit, int end_roll)
+    """
+    end_roll = (attack_base + attack_roll) - (defense_base + defense_roll)
+
+    # First check - standard hit
+    if end_roll > 0:
+        return True, False, end_roll
+
+    # Second check - power-based hit
+    if end_roll + power_diff >= 1:
+        return True, True, end_roll
+
+    return False, False, end_roll
+
+def calculate_damage(power_hit, power_diff, end_roll):
+    """
+    Calculate damage for a hit.
+    Normal hits use the end roll, power hits use the power difference.
+
+    Returns:
+        int: Amount of damage to deal
+    """
+    if power_hit:
+        return max(1, power_diff)
+    return max(1, end_roll)
+
+def vulnerability_chance(finesse):
+    """
+    Chance of becoming vulnerable after a miss, based on weapon finesse rank.
+
+    Returns:
+        float: Chance of vulnerability (0.0 to 1.0)
+    """
+    if finesse <= 1:
+        return 0.5  # 50% base chance
+    elif finesse <= 3:
+        return 0.4  # 40% chance at rank 2-3
+    else:  # 4-5
+        return 0.3  # 30% chance at rank 4-5
+
+def vulnerability_time(weapon_speed, finesse):
+    """
+    Vulnerability duration: 50% of weapon speed, reduced 10% per finesse rank.
+
+    Returns:
+        float: Seconds of vulnerability, minimum 1
+    """
+    base_time = weapon_speed * 0.5
+    reduction = finesse * 0.1 * base_time
+    return max(1.0, base_time - reduction)
+
+def vulnerability_defense_reduction(finesse):
+    """
+    Defense reduction while vulnerable: 50% base, minus 10% per finesse rank.
+
+    Returns:
+        int: Percentage reduction between 0 and 50
+    """
+    return max(0, min(50, 50 - (finesse * 10)))
+
+def _simulate_swings_numpy(rng, attacker, defender, count):
+    """Vectorized swings, returning (hits, power_hits, vulnerable, damage) arrays."""
+    power_diff = max(0, attacker.power - defender.power)
+    attack_rolls = rng.integers(1, 101, size=count)
+    defense_rolls = rng.integers(1, 101, size=count)
+    end_rolls = (attacker.attack + attack_rolls) - (defender.defense + defense_rolls)
+
+    clean_hits = end_rolls > 0
+    power_hits = ~clean_hits & (end_rolls + power_diff >= 1)
+    hits = clean_hits | power_hits
+    damage = np.where(clean_hits, np.maximum(1, end_rolls), 0)
+    damage = np.where(power_hits, max(1, power_diff), damage)
+    vulnerable = ~hits & (rng.random(count) < vulnerability_chance(attacker.finesse))
+    return hits, power_hits, vulnerable, damage
+
+def _simulate_swings_python(rng, attacker, defender, count):
+    """Pure-Python fallback for _simulate_swings_numpy, returning lists."""
+    power_diff = max(0, attacker.power - defender.power)
+    vuln_chance = vulnerability_chance(attacker.finesse)
+    hits, power_hits, vulnerable, damage = [], [], [], []
+    for _ in range(count):
+        hit, power_hit, end_roll = resolve_attack(attacker.attack, defender.defense,
+                                                  roll_d100(rng), roll_d100(rng), power_diff)
+        hits.append(hit)
+        power_hits.append(power_hit)
+        vulnerable.append(not hit and rng.random() < vuln_chance)
+        damage.append(calculate_damage(power_hit, power_diff, end_roll) if hit else 0)
+    return hits, power_hits, vulnerable, damage
+
+def _histogram_percentile(histogram, total, fraction):
+    """Nearest-rank percentile of a {value: count} histogram holding total samples."""
+    if not total:
+        return 0
+    rank = max(1, math.ceil(fraction * total))
+    seen = 0
+    for value in sorted(histogram):
+        seen += histogram[value]
+        if seen >= rank:
+            return value
+    return value
+
+def _kill_swings_numpy(rng, attacker, defender, fights, max_swings):
+    """
+    Swings needed to kill the defender in each of a batch of fights.
+    Fights are advanced together a chunk of swings at a time.
+
+    Returns:
+        ndarray: Swings per fight, 0 for fights not finished within max_swings
+    """
+    health = np.full(fights, defender.health, dtype=np.int64)
+    taken = np.zeros(fights, dtype=np.int64)
+    result = np.zeros(fights, dtype=np.int64)
+    alive = np.arange(fights)
+    chunk = 16
+    while alive.size and taken[alive[0]] < max_swings:
+        chunk = min(chunk, max_swings - int(taken[alive[0]]))
+        _, _, _, damage = _simulate_swings_numpy(rng, attacker, defender, alive.size * chunk)
+        dealt = damage.reshape(alive.size, chunk).cumsum(axis=1)
+        killed = dealt >= health[alive, None]
+        done = killed.any(axis=1)
+        result[alive[done]] = taken[alive[done]] + killed[done].argmax(axis=1) + 1
+        taken[alive] += chunk
+        health[alive] -= dealt[:, -1]
+        alive = alive[~done]
+        chunk *= 2
+    return result
+
+def _kill_swings_python(rng, attacker, defender, fights, max_swings):
+    """Pure-Python fallback for _kill_swings_numpy, returning a list."""
+    result = []
+    for _ in range(fights):
+        health = defender.health
+        swings_needed = 0
+        for swing in range(1, max_swings + 1):
+            _, _, _, damage = _simulate_swings_python(rng, attacker, defender, 1)
+            health -= damage[0]
+            if health <= 0:
+                swings_needed = swing
+                break
+        result.append(swings_needed)
+    return result
+
+def simulate_matchup(attacker, defender, swings=1000000, fights=10000, seed=None,
+                     batch_size=100000, max_swings_per_fight=1000):
+    """
+    Simulate an attacker repeatedly swinging at a defender.
+
+    Args:
+        attacker (Combatant): The attacking side
+        defender (Combatant): The defending side
+        swings (int): Number of swings to sample for hit and damage rates
+        fights (int): Number of fights to the death to sample for time-to-kill
+        seed (int, optional): Seed for reproducible results
+        batch_size (int): Swings generated per batch
+        max_swings_per_fight (int): Fights still going after this many swings
+            are counted as unfinished
+
+    Returns:
+        dict: Report with hit_rate, power_hit_rate, vulnerable_rate,
+            damage (mean/p10/p50/p90/max per hit, plus a {damage: count}
+            histogram) and time_to_kill (mean/p50/p90 in seconds, plus
+            the number of unfinished fights)
+    """
+    use_numpy = np is not None
+    rng = np.random.default_rng(seed) if use_numpy else random.Random(seed)
+
+    # Hit and damage rates
+    hit_count = power_hit_count = vulnerable_count = 0
+    histogram = {}
+    remaining = swings
+    while remaining > 0:
+        count = min(batch_size, remaining)
+        if use_numpy:
+            hits, power_hits, vulnerable, damage = _simulate_swings_numpy(rng, attacker, defender, count)
+            hit_count += int(hits.sum())
+            power_hit_count += int(power_hits.sum())
+            vulnerable_count += int(vulnerable.sum())
+            values, counts = np.unique(damage[hits], return_counts=True)
+            for value, value_count in zip(values.tolist(), counts.tolist()):
+                histogram[value] = histogram.get(value, 0) + value_count
+        else:
+            hits, power_hits, vulnerable, damage = _simulate_swings_python(rng, attacker, defender, count)
+            hit_count += sum(hits)
+            power_hit_count += sum(power_hits)
+            vulnerable_count += sum(vulnerable)
+            for hit, value in zip(hits, damage):
+                if hit:
+                    histogram[value] = histogram.get(value, 0) + 1
+        remaining -= count
+    total_damage = sum(value * count for value, count in histogram.items())
+
+    # Time to kill
+    if use_numpy:
+        kill_swings = _kill_swings_numpy(rng, attacker, defender, fights, max_swings_per_fight).tolist()
+    else:
+        kill_swings = _kill_swings_python(rng, attacker, defender, fights, max_swings_per_fight)
+    kill_histogram = {}
+    for swing_count in kill_swings:
+        if swing_count:
+            kill_histogram[swing_count] = kill_histogram.get(swing_count, 0) + 1
+    kills = fights - kill_swings.count(0)
+
+    return {
+        "swings": swings,
+        "hit_rate": hit_count / swings if swings else 0,
+        "power_hit_rate": power_hit_count / swings if swings else 0,
+        "vulnerable_rate": vulnerable_count / swings if swings else 0,
+        "damage": {
+            "mean": total_damage / hit_count if hit_count else 0,
+            "p10": _histogram_percentile(histogram, hit_count, 0.1),
+            "p50": _histogram_percentile(histogram, hit_count, 0.5),
+            "p90": _histogram_percentile(histogram, hit_count, 0.9),
+            "max": max(histogram) if histogram else 0,
+            "histogram": histogram,
+        },
+        "time_to_kill": {
+            "mean": BASE_ROUNDTIME * sum(kill_swings) / kills if kills else None,
+            "p50": BASE_ROUNDTIME * _histogram_percentile(kill_histogram, kills, 0.5) if kills else None,
+            "p90": BASE_ROUNDTIME * _histogram_percentile(kill_histogram, kills, 0.9) if kills else None,
+            "fights": fights,
+            "unfinished": fights - kills,
+        },
+    }
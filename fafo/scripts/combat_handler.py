@@ -1,105 +1,64 @@
 """
 Combat handler script for processing combat actions.
 """
-import random
-from evennia import DefaultScript, create_script, GLOBAL_SCRIPTS
-from evennia.utils import lazy_property
+from evennia import DefaultScript, GLOBAL_SCRIPTS
+from evennia.utils.logger import log_trace
 from evennia.utils.utils import time_format
 from typeclasses.hostiles import Hostile
-from evennia.server.sessionhandler import SESSIONS
-import time
+from scripts.timer_queue import GameTimer, TimerQueue
+from scripts import combat_core
+from scripts.combat_log import COMBAT_LOG
+from scripts.corpse_queue import CorpseQueue
+from scripts.engagements import EngagementRegistry
+from scripts.message_batcher import BATCHER
+from scripts.rng import get_stream
 
-class RoundtimeScript(DefaultScript):
+class CombatTimer(GameTimer):
     """
-    A script that manages a character's roundtime.
-    The script will automatically delete itself when roundtime expires.
+    An in-memory timer tied to a combatant.
+    Held by the CombatHandler's timer queue and fires once on expiry.
     """
-    def at_script_creation(self):
-        """Set up the script."""
-        self.key = "roundtime_script"
-        self.desc = "Handles character roundtime"
-        self.interval = 1  # Check every second
-        self.persistent = False  # Ensure script doesn't persist through server restart
-        
-        # Initialize with defaults, these will be set properly after creation
-        self.db.start_time = time.time()
-        self.db.duration = 5  # Default 5 seconds
-        
-    def at_repeat(self):
-        """Called every self.interval seconds."""
-        if time.time() >= self.db.start_time + self.db.duration:
-            # Notify the character roundtime is done
-            self.obj.msg("Roundtime expired.")
-            # Stop and delete the script
-            self.stop()
-            self.delete()
-            return
-            
-    def extend_time(self, seconds):
+    key = None
+    expire_msg = None
+    
+    def __init__(self, obj, duration, callback=None):
         """
-        Extend the roundtime by the given number of seconds.
+        Initialize the timer.
         
         Args:
-            seconds (float): Number of seconds to add
-        """
-        self.db.duration += seconds
-        
-    def time_remaining(self):
+            obj (Object): The character the timer applies to
+            duration (float): Number of seconds until expiry
+            callback (callable, optional): Called with the timer on expiry
         """
-        Get the remaining roundtime in seconds.
-        
-        Returns:
-            float: Seconds remaining in roundtime
-        """
-        return max(0, (self.db.start_time + self.db.duration) - time.time())
-        
-    def at_script_stop(self):
-        """Called when script is stopped for any reason."""
-        # Clean up roundtime references
-        if self.obj:
-            if hasattr(self.obj, 'db'):
-                if hasattr(self.obj, 'roundtime'):
-                    self.obj.roundtime = None
-            # Notify the character if online
-            if hasattr(self.obj, 'msg'):
-                self.obj.msg("Roundtime expired.")
-        self.delete()
-        
-    def at_server_reload(self):
-        """Called if server reloads."""
-        self.stop()
-        
-    def at_server_shutdown(self):
-        """Called at server shutdown."""
-        self.stop()
+        super().__init__(duration, callback=callback)
+        self.obj = obj
+        
+    def expire(self):
+        """Notify the character that the timer is done."""
+        super().expire()
+        if self.obj and hasattr(self.obj, 'msg'):
+            self.obj.msg(self.expire_msg)
 
-class VulnerabilityScript(DefaultScript):
+class RoundtimeTimer(CombatTimer):
     """
-    A script that manages a character's vulnerability timer and effects.
+    Tracks a character's roundtime.
     """
-    def at_script_creation(self):
-        """Set up the script."""
-        self.key = "vulnerability_script"
-        self.desc = "Handles character vulnerability period"
-        self.interval = 1  # Check every second
-        self.persistent = False
-        
-        # Initialize with defaults
-        self.db.start_time = time.time()
-        self.db.duration = 5  # Default 5 seconds
-        self.db.vuln_type = None  # Type of vulnerability
-        self.db.def_reduction = 0  # Percentage reduction to defense
+    key = "roundtime"
+    expire_msg = "Roundtime expired."
+
+class VulnerabilityTimer(CombatTimer):
+    """
+    Tracks a character's vulnerability period and effects.
+    """
+    key = "vulnerability"
+    expire_msg = "You manage to recover your guard."
+    
+    def __init__(self, obj, duration, callback=None):
+        """Set up with no vulnerability effect until set_vulnerability is called."""
+        super().__init__(obj, duration, callback=callback)
+        self.vuln_type = None  # Type of vulnerability
+        self.def_reduction = 0  # Percentage reduction to defense
         
-    def at_repeat(self):
-        """Called every self.interval seconds."""
-        if time.time() >= self.db.start_time + self.db.duration:
-            # Notify the character vulnerability is done
-            self.obj.msg("You manage to recover your guard.")
-            # Stop and delete the script
-            self.stop()
-            self.delete()
-            return
-            
     def set_vulnerability(self, vuln_type, def_reduction):
         """
         Set the vulnerability type and its effects.
@@ -108,8 +67,8 @@ class VulnerabilityScript(DefaultScript):
             vuln_type (str): Type of vulnerability (e.g. "miss")
             def_reduction (float): Percentage reduction to defense
         """
-        self.db.vuln_type = vuln_type
-        self.db.def_reduction = def_reduction
+        self.vuln_type = vuln_type
+        self.def_reduction = def_reduction
         
     def get_defense_modifier(self):
         """
@@ -118,45 +77,7 @@ class VulnerabilityScript(DefaultScript):
         Returns:
             float: Multiplier for defense (e.g. 0.5 for 50% reduction)
         """
-        return max(0, 1 - (self.db.def_reduction / 100))
-        
-    def extend_time(self, seconds):
-        """
-        Extend the vulnerability by the given number of seconds.
-        
-        Args:
-            seconds (float): Number of seconds to add
-        """
-        self.db.duration += seconds
-        
-    def time_remaining(self):
-        """
-        Get the remaining vulnerability time in seconds.
-        
-        Returns:
-            float: Seconds remaining in vulnerability
-        """
-        return max(0, (self.db.start_time + self.db.duration) - time.time())
-        
-    def at_script_stop(self):
-        """Called when script is stopped for any reason."""
-        # Clean up vulnerability references
-        if self.obj:
-            if hasattr(self.obj, 'db'):
-                if hasattr(self.obj, 'vulnerability'):
-                    self.obj.vulnerability = None
-            # Notify the character if online
-            if hasattr(self.obj, 'msg'):
-                self.obj.msg("You manage to recover your guard.")
-        self.delete()
-        
-    def at_server_reload(self):
-        """Called if server reloads."""
-        self.stop()
-        
-    def at_server_shutdown(self):
-        """Called at server shutdown."""
-        self.stop()
+        return max(0, 1 - (self.def_reduction / 100))
 
 class CombatHandler(DefaultScript):
     """
@@ -168,6 +89,93 @@ class CombatHandler(DefaultScript):
         self.persistent = True
         self.key = "combat_handler"
         self.desc = "Handles combat calculations"
+        self.interval = 60  # Prune finished fights once a minute
+        
+    @property
+    def timer_queue(self):
+        """Shared in-memory queue holding all roundtime and vulnerability deadlines."""
+        if self.ndb.timer_queue is None:
+            self.ndb.timer_queue = TimerQueue()
+        return self.ndb.timer_queue
+        
+    def at_start(self):
+        """Queue corpses left lying around by a reload to decay again."""
+        from evennia import ObjectDB
+        for corpse in ObjectDB.objects.get_by_attribute(key="corpse", value=True):
+            if corpse.location:
+                self.corpse_queue.add(corpse)
+        
+    def at_stop(self):
+        """Drop the pending corpse decay call; at_start requeues the corpses."""
+        if self.ndb.corpse_queue is not None:
+            self.ndb.corpse_queue.clear()
+        
+    @property
+    def corpse_queue(self):
+        """Corpses waiting to decay, handled in batches by one reactor call."""
+        if self.ndb.corpse_queue is None:
+            self.ndb.corpse_queue = CorpseQueue()
+        return self.ndb.corpse_queue
+        
+    @property
+    def engagements(self):
+        """In-memory record of who is fighting whom, with threat tables."""
+        if self.ndb.engagements is None:
+            self.ndb.engagements = EngagementRegistry()
+        return self.ndb.engagements
+        
+    @property
+    def timers(self):
+        """Active timers, keyed by (character id, timer key)."""
+        if self.ndb.timers is None:
+            self.ndb.timers = {}
+        return self.ndb.timers
+        
+    def get_timer(self, character, key):
+        """
+        Get a character's active combat timer.
+        
+        Args:
+            character (Object): The character to check
+            key (str): Timer key ("roundtime" or "vulnerability")
+            
+        Returns:
+            CombatTimer or None: The active timer, if any
+        """
+        timer = self.timers.get((character.id, key))
+        if timer and timer.active:
+            return timer
+        return None
+        
+    def clear_timer(self, character, key):
+        """
+        Cancel a character's combat timer without firing it.
+        
+        Args:
+            character (Object): The character to clear
+            key (str): Timer key ("roundtime" or "vulnerability")
+            
+        Returns:
+            bool: True if an active timer was cancelled
+        """
+        timer = self.timers.pop((character.id, key), None)
+        if timer and timer.active:
+            timer.cancel()
+            return True
+        return False
+        
+    def _start_timer(self, timer_class, character, duration):
+        """Create, register and queue a new combat timer."""
+        self.clear_timer(character, timer_class.key)
+        timer = timer_class(character, duration, callback=self._on_timer_expired)
+        self.timers[(character.id, timer_class.key)] = timer
+        return self.timer_queue.schedule(timer)
+        
+    def _on_timer_expired(self, timer):
+        """Forget a timer once it fires."""
+        timer_id = (timer.obj.id, timer.key)
+        if self.timers.get(timer_id) is timer:
+            del self.timers[timer_id]
         
     def is_in_roundtime(self, character):
         """
@@ -179,9 +187,9 @@ class CombatHandler(DefaultScript):
         Returns:
             tuple: (bool in_roundtime, float remaining_time)
         """
-        script = character.scripts.get("roundtime_script")
-        if script:
-            return True, script[0].time_remaining()
+        timer = self.get_timer(character, "roundtime")
+        if timer:
+            return True, timer.time_remaining()
         return False, 0
 
     def set_roundtime(self, character, duration, extend=False):
@@ -194,142 +202,100 @@ class CombatHandler(DefaultScript):
             extend (bool): If True, add to existing roundtime
             
         Returns:
-            RoundtimeScript: The roundtime script
+            RoundtimeTimer: The roundtime timer
         """
-        script = character.scripts.get("roundtime_script")
+        timer = self.get_timer(character, "roundtime")
         
-        if script and extend:
+        if timer and extend:
             # Extend existing roundtime
-            script[0].extend_time(duration)
-            return script[0]
-        elif script:
-            # Replace existing roundtime
-            script[0].stop()
+            timer.extend_time(duration)
+            return timer
             
-        # Create new roundtime script and set its properties after creation
-        new_script = create_script(
-            "scripts.combat_handler.RoundtimeScript",
-            obj=character
-        )
-        new_script.db.duration = duration
-        new_script.db.start_time = time.time()
-        return new_script
+        # Replace any existing roundtime
+        return self._start_timer(RoundtimeTimer, character, duration)
 
     def set_vulnerability(self, character, duration):
         """
-        Set or extend a character's vulnerability timer.
+        Set or replace a character's vulnerability timer.
         
         Args:
             character (Object): The character to set vulnerability for
             duration (float): Number of seconds for vulnerability
             
         Returns:
-            VulnerabilityScript: The vulnerability script
+            VulnerabilityTimer: The vulnerability timer
         """
-        script = character.scripts.get("vulnerability_script")
+        return self._start_timer(VulnerabilityTimer, character, duration)
         
-        if script:
-            # Replace existing vulnerability
-            script[0].stop()
-            
-        # Create new vulnerability script
-        new_script = create_script(
-            "scripts.combat_handler.VulnerabilityScript",
-            obj=character,
-            persistent=False,
-            autostart=True
-        )
-        new_script.db.duration = duration
-        new_script.db.start_time = time.time()
-        return new_script
+    def get_weapon_speed(self, combatant):
+        """Get the speed of a combatant's weapon, or the default if unarmed."""
+        weapon = getattr(combatant, 'right_hand', None)
+        if weapon and hasattr(weapon, 'weapon_speed'):
+            return weapon.weapon_speed
+        return combat_core.DEFAULT_WEAPON_SPEED
         
     def calculate_vulnerability_time(self, attacker):
         """Calculate vulnerability time based on weapon speed and finesse."""
-        # Get weapon speed from equipped weapon, default to 5 if no weapon
-        weapon_speed = 5  # Default vulnerability time
-        if hasattr(attacker, 'right_hand') and attacker.right_hand:
-            if hasattr(attacker.right_hand, 'weapon_speed'):
-                weapon_speed = attacker.right_hand.weapon_speed
-                
-        # Get attacker's weapon finesse
-        finesse = attacker.get_weapon_finesse()
-        
-        # Calculate base time (50% of weapon speed)
-        base_time = weapon_speed * 0.5
-        
-        # Reduce by weapon finesse (10% per point)
-        reduction = finesse * 0.1 * base_time
-        
-        # Return final time with minimum of 1 second
-        return max(1.0, base_time - reduction)
+        return combat_core.vulnerability_time(self.get_weapon_speed(attacker),
+                                              attacker.get_weapon_finesse())
         
     def calculate_vulnerability_defense_reduction(self, attacker):
         """Calculate defense reduction percentage based on weapon finesse."""
-        finesse = attacker.get_weapon_finesse()
-        # Base 50% reduction, decreased by 10% per point of finesse
-        reduction = 50 - (finesse * 10)
-        # Ensure reduction stays between 0% and 50%
-        return max(0, min(50, reduction))
+        return combat_core.vulnerability_defense_reduction(attacker.get_weapon_finesse())
 
-    def calculate_hit(self, attacker, defender):
+    def calculate_hit(self, attacker, defender, attacker_stats=None):
         """
         Calculate if an attack hits with two-stage system.
         Takes into account vulnerability defense reductions.
+        
+        Args:
+            attacker (Object): The attacking character/monster
+            defender (Object): The defending character/monster
+            attacker_stats (StatSnapshot, optional): The attacker's stats,
+                when already resolved for several swings at once
         """
+        # Resolve both sides' stats once for the whole swing
+        if attacker_stats is None:
+            attacker_stats = attacker.get_stat_snapshot()
+        defender_stats = defender.get_stat_snapshot()
+        
         # Calculate attacker's base attack value (before d100)
-        attack_base = int(attacker.agility + 
-                         attacker.speed + 
-                         attacker.weapons)
+        attack_base = int(attacker_stats.attack)
         
-        # Calculate defender's base defense value
-        shield_bonus = int(defender.shields if hasattr(defender, 'left_hand') and defender.left_hand else 0)
-        defense_base = int(defender.agility + 
-                          defender.speed + 
-                          shield_bonus)
+        # Calculate defender's base defense value (includes shield if equipped)
+        defense_base = int(defender_stats.defense)
         
         # Check for vulnerability effects on defender
-        vulnerability = defender.scripts.get("vulnerability_script")
+        vulnerability = self.get_timer(defender, "vulnerability")
         if vulnerability:
             # Apply defense reduction before d100
-            defense_base = int(defense_base * vulnerability[0].get_defense_modifier())
-        
-        # Roll d100s
-        attacker_roll = random.randint(1, 100)
-        defender_roll = random.randint(1, 100)
-        
-        # Calculate final values
-        attack_total = attack_base + attacker_roll
-        defense_total = defense_base + defender_roll
+            defense_base = combat_core.apply_vulnerability(defense_base, vulnerability.def_reduction)
         
-        # Calculate initial end result
-        end_roll = attack_total - defense_total
+        # Roll d100s from the combat stream
+        rng = get_stream("combat")
+        attacker_roll = combat_core.roll_d100(rng)
+        defender_roll = combat_core.roll_d100(rng)
         
         # Calculate power difference (never negative)
-        power_diff = int(max(0, attacker.power - defender.power))
+        power_diff = int(max(0, attacker_stats.power - defender_stats.power))
+        
+        hits, power_hit, end_roll = combat_core.resolve_attack(
+            attack_base, defense_base, attacker_roll, defender_roll, power_diff)
         
         # Store all roll information
         roll_info = {
             'attack_base': attack_base,
             'attack_roll': attacker_roll,
-            'attack_total': attack_total,
+            'attack_total': attack_base + attacker_roll,
             'defense_base': defense_base,
             'defense_roll': defender_roll,
-            'defense_total': defense_total,
+            'defense_total': defense_base + defender_roll,
             'end_roll': end_roll,
             'power_diff': power_diff,
-            'power_hit': False
+            'power_hit': power_hit
         }
         
-        # First check - standard hit
-        if end_roll > 0:
-            return True, roll_info
-            
-        # Second check - power-based hit
-        if end_roll + power_diff >= 1:
-            roll_info['power_hit'] = True
-            return True, roll_info
-            
-        return False, roll_info
+        return hits, roll_info
 
     def calculate_damage(self, attacker, power_hit=False, power_diff=0, end_roll=0):
         """
@@ -346,12 +312,7 @@ class CombatHandler(DefaultScript):
         Returns:
             int: Amount of damage to deal
         """
-        if power_hit:
-            # Use power difference as the effective endroll
-            return max(1, power_diff)
-        else:
-            # Use the actual endroll for damage
-            return max(1, end_roll)
+        return combat_core.calculate_damage(power_hit, power_diff, end_roll)
         
     def get_vulnerability_chance(self, attacker):
         """
@@ -363,13 +324,23 @@ class CombatHandler(DefaultScript):
         Returns:
             float: Chance of vulnerability (0.0 to 1.0)
         """
-        finesse = attacker.get_weapon_finesse()
-        if finesse <= 1:
-            return 0.5  # 50% base chance
-        elif finesse <= 3:
-            return 0.4  # 40% chance at rank 2-3
-        else:  # 4-5
-            return 0.3  # 30% chance at rank 4-5
+        return combat_core.vulnerability_chance(attacker.get_weapon_finesse())
+        
+    def get_combatant(self, combatant):
+        """
+        Get the plain combat numbers the simulation core works on.
+        
+        Args:
+            combatant (Object): A character or hostile
+            
+        Returns:
+            Combatant: Current stats, health, finesse and weapon speed
+        """
+        return combat_core.combatant_from_snapshot(
+            combatant.get_stat_snapshot(),
+            health=combatant.max_health,
+            finesse=combatant.get_weapon_finesse(),
+            weapon_speed=self.get_weapon_speed(combatant))
             
     def process_attack(self, attacker, defender):
         """
@@ -380,20 +351,76 @@ class CombatHandler(DefaultScript):
             defender (Object): The defending character/monster
             
         Returns:
-            tuple: (bool hit, int damage, RoundtimeScript)
+            tuple: (bool hit, int damage, RoundtimeTimer)
         """
         # Check if attacker is in roundtime, regardless of type
         in_roundtime, remaining = self.is_in_roundtime(attacker)
         if in_roundtime:
             if hasattr(attacker, 'msg'):  # Only message if it's a player character
-                attacker.msg(f"You are still recovering from your last action! ({time_format(remaining, 1)} remaining)")
+                BATCHER.msg(attacker, f"You are still recovering from your last action! ({time_format(remaining, 1)} remaining)")
             return False, 0, None
             
         # Set base 5 second roundtime
-        roundtime = self.set_roundtime(attacker, 5)
+        roundtime = self.set_roundtime(attacker, combat_core.BASE_ROUNDTIME)
+        
+        hits, damage, _ = self.resolve_swing(attacker, defender)
+        return hits, damage, roundtime
+            
+    def process_area_attack(self, attacker, defenders):
+        """
+        Attack several defenders with one swing. The attacker's stats are
+        resolved once and reused against every defender, and the whole
+        swing costs a single roundtime. A failed swing can leave the
+        attacker exposed at most once.
+        
+        Args:
+            attacker (Object): The attacking character/monster
+            defenders (list): The defending characters/monsters
+            
+        Returns:
+            tuple: (list of (defender, bool hit, int damage), RoundtimeTimer)
+        """
+        in_roundtime, remaining = self.is_in_roundtime(attacker)
+        if in_roundtime:
+            if hasattr(attacker, 'msg'):
+                BATCHER.msg(attacker, f"You are still recovering from your last action! ({time_format(remaining, 1)} remaining)")
+            return [], None
+            
+        roundtime = self.set_roundtime(attacker, combat_core.BASE_ROUNDTIME)
+        attacker_stats = attacker.get_stat_snapshot()
+        results = []
+        exposed = False
+        for defender in defenders:
+            if not defender.pk or defender.location != attacker.location:
+                continue
+            if isinstance(defender, Hostile) and not defender.is_alive():
+                continue
+            hits, damage, exposed_now = self.resolve_swing(
+                attacker, defender, attacker_stats=attacker_stats, can_expose=not exposed)
+            exposed = exposed or exposed_now
+            results.append((defender, hits, damage))
+        return results, roundtime
+            
+    def resolve_swing(self, attacker, defender, attacker_stats=None, can_expose=True):
+        """
+        Roll one swing against a defender and apply the outcome: damage,
+        threat, vulnerability on a miss, messages and death.
+        
+        Args:
+            attacker (Object): The attacking character/monster
+            defender (Object): The defending character/monster
+            attacker_stats (StatSnapshot, optional): The attacker's stats,
+                when already resolved for several swings at once
+            can_expose (bool): Whether a miss may leave the attacker vulnerable
+            
+        Returns:
+            tuple: (bool hit, int damage, bool attacker left vulnerable)
+        """
+        # Engage both sides, so the defender knows who to fight back against
+        self.engagements.engage(attacker, defender)
         
         # Check if attack hits and get the roll details
-        hits, roll_info = self.calculate_hit(attacker, defender)
+        hits, roll_info = self.calculate_hit(attacker, defender, attacker_stats=attacker_stats)
         
         # Construct the combat message
         if roll_info['power_hit']:
@@ -416,54 +443,82 @@ class CombatHandler(DefaultScript):
                                         power_diff=roll_info['power_diff'],
                                         end_roll=roll_info['end_roll'])
             defender.take_damage(damage)
+            self.engagements.add_threat(defender, attacker, damage)
             
             # Complete the message based on hit type
             if roll_info['power_hit']:
                 combat_msg += f"A powerful strike lands for {damage} damage!"
             else:
                 combat_msg += f"A clean hit for {damage} damage!"
+            brief_msg = f"{attacker.key} hits {defender.key} for {damage} damage."
             
-            # Announce to all
-            if attacker.location:
-                attacker.location.msg_contents(combat_msg)
+            # Announce to all, bystanders get the brief line if they prefer
+            BATCHER.msg_room(attacker.location, combat_msg, brief=brief_msg,
+                             participants=(attacker, defender))
                         
             # Check for death
-            if defender.current_health <= 0:
+            killed = defender.current_health <= 0
+            self.log_swing(attacker, defender, roll_info, True, damage=damage, killed=killed)
+            if killed:
                 self.handle_death(attacker, defender)
                 
-            return True, damage, roundtime
+            return True, damage, False
             
         else:
+            exposed = False
+            def_reduction, vuln_time = 0, 0.0
             # Only apply vulnerability if both checks failed (not a power hit)
-            if not roll_info['power_hit']:
+            if not roll_info['power_hit'] and can_expose:
                 # Roll for vulnerability chance
                 vuln_chance = self.get_vulnerability_chance(attacker)
-                if random.random() < vuln_chance:
+                if get_stream("combat").random() < vuln_chance:
+                    exposed = True
                     vuln_time = self.calculate_vulnerability_time(attacker)
                     def_reduction = self.calculate_vulnerability_defense_reduction(attacker)
                     
-                    # Create vulnerability script
-                    vuln_script = self.set_vulnerability(attacker, vuln_time)
-                    vuln_script.set_vulnerability("miss", def_reduction)
+                    # Start vulnerability timer
+                    vuln_timer = self.set_vulnerability(attacker, vuln_time)
+                    vuln_timer.set_vulnerability("miss", def_reduction)
                     
                     # Complete the message for a vulnerable miss
                     combat_msg += "Your failed attack leaves you feeling exposed."
                     
                     if hasattr(attacker, 'msg'):
-                        attacker.msg(f"Defense reduced by {def_reduction}% for {vuln_time:.1f} seconds!")
+                        BATCHER.msg(attacker, f"Defense reduced by {def_reduction}% for {vuln_time:.1f} seconds!")
                 elif hasattr(attacker, 'msg'):
                     # Complete the message for a non-vulnerable miss
                     combat_msg += "a miss."
-                    attacker.msg("Your weapon finesse helps you maintain your defenses despite the miss!")
+                    BATCHER.msg(attacker, "Your weapon finesse helps you maintain your defenses despite the miss!")
             else:
-                # Complete the message for a power-check miss
+                # Complete the message for a power-check miss, or a miss
+                # after an area swing already left the attacker exposed
                 combat_msg += "a miss."
+            brief_msg = f"{attacker.key} misses {defender.key}."
             
-            # Announce to all
-            if attacker.location:
-                attacker.location.msg_contents(combat_msg)
+            # Announce to all, bystanders get the brief line if they prefer
+            BATCHER.msg_room(attacker.location, combat_msg, brief=brief_msg,
+                             participants=(attacker, defender))
                         
-            return False, 0, roundtime
+            self.log_swing(attacker, defender, roll_info, False,
+                           def_reduction=def_reduction, vuln_time=vuln_time)
+            return False, 0, exposed
+            
+    def log_swing(self, attacker, defender, roll_info, hit, **kwargs):
+        """
+        Append a resolved swing to the combat event log. Logging problems
+        never interrupt the fight.
+        
+        Args:
+            attacker (Object): The attacking character/monster
+            defender (Object): The defending character/monster
+            roll_info (dict): Roll details from calculate_hit
+            hit (bool): Whether the swing hit
+            **kwargs: Damage, kill and vulnerability details, as for CombatLog.append
+        """
+        try:
+            COMBAT_LOG.append(attacker.id, defender.id, roll_info, hit, **kwargs)
+        except Exception:
+            log_trace("Error writing the combat log")
             
     def handle_death(self, attacker, defender):
         """
@@ -474,29 +529,30 @@ class CombatHandler(DefaultScript):
             attacker.gain_experience(defender.experience)
             
         # Announce death
-        if attacker.location:
-            attacker.location.msg_contents(f"{defender.key} has been slain by {attacker.key}!")
+        BATCHER.msg_room(attacker.location, f"{defender.key} has been slain by {attacker.key}!")
+        
+        # The dead are out of every fight
+        self.engagements.disengage(defender)
             
         # If it's a hostile, turn it into a temporary corpse
         if isinstance(defender, Hostile):
             # Change the name to indicate it's a corpse
             original_name = defender.key
             defender.key = f"the body of {original_name}"
-            defender.db.corpse = True  # Mark as a corpse
             
             # Set locks to prevent interaction
             defender.locks.add("get:false();delete:perm(Wizards);puppet:false()")
             
-            # Disable combat-related attributes
-            defender.db.inactive = True
+            # Mark as a corpse and disable combat-related attributes
+            defender.attributes.batch_add(("corpse", True), ("inactive", True))
             
-            # Create corpse deletion script
-            create_script(
-                "scripts.combat_handler.CorpseScript",
-                obj=defender,
-                persistent=False,
-                autostart=True
-            )
+            # Free its place in the spawning region's population
+            spawner = GLOBAL_SCRIPTS.spawn_engine
+            if spawner:
+                spawner.on_death(defender)
+            
+            # Queue the corpse to decay
+            self.corpse_queue.add(defender)
         else:
             # For non-hostiles (like players), just handle normally
             defender.delete()
@@ -504,10 +560,9 @@ class CombatHandler(DefaultScript):
     def at_repeat(self):
         """
         Called every self.interval seconds (1 minute).
-        Clean up old roundtimes to prevent memory bloat.
+        Drop finished fights from the engagement registry to prevent memory bloat.
         """
-        # Nothing to do for now - will be used for more complex combat tracking later
-        pass
+        self.engagements.prune()
 
     def get_combat_details(self, attacker, defender, attacker_roll, defender_roll, endroll, power_diff):
         """Generate a detailed breakdown of combat calculations."""
@@ -544,29 +599,3 @@ class CombatHandler(DefaultScript):
         room_msg = f" (Roll: {endroll})"
         
         return attacker_msg, defender_msg, room_msg
-
-class CorpseScript(DefaultScript):
-    """A script that deletes a corpse after a delay."""
-    
-    def at_script_creation(self):
-        """Set up the script."""
-        self.key = "corpse_script"
-        self.desc = "Deletes a corpse after delay"
-        self.interval = 20  # 20 second delay
-        self.persistent = False
-        self.repeats = 1    # Run only once
-        self.start_delay = True  # Important: This makes it wait before first repeat
-        
-    def at_repeat(self):
-        """Called after the 20-second delay."""
-        if self.obj and hasattr(self.obj, 'location'):
-            # Announce the corpse disappearing
-            self.obj.location.msg_contents(f"{self.obj.key} crumbles to dust.")
-            # Delete the corpse
-            self.obj.delete()
-        self.stop()
-
-    def at_start(self):
-        """Called when script starts running."""
-        # We don't need to do anything here, just wait for the interval
-        pass
\ No newline at end of file
@@ -0,0 +1,332 @@
+"""
+Combat event log
+
+Every resolved swing is appended to a binary log as one fixed-width
+record: time, attacker and defender ids, attack and defense bases and
+rolls, end roll, power difference, outcome flags, damage and any
+vulnerability applied. Log files are preallocated and memory-mapped, so
+an append is a struct pack into the map; when a file fills up the log
+rotates to a new one and the oldest files beyond MAX_LOG_FILES are
+deleted.
+
+File layout: a header (magic, version, record size, record count)
+followed by records. The count is updated with every append, so a file
+cut short by a crash still reads up to the last complete record.
+
+This module only uses the standard library, so the logs can be analysed
+away from the server:
+
+    python -m scripts.combat_log summary server/logs/combat
+    python -m scripts.combat_log summary server/logs/combat --by-attacker
+    python -m scripts.combat_log replay server/logs/combat --attacker 12 --defender 345
+    python -m scripts.combat_log replay server/logs/combat --verify
+"""
+import argparse
+import glob
+import mmap
+import os
+import struct
+import sys
+import time
+from collections import defaultdict, namedtuple
+
+FILE_MAGIC = b"FCLG"
+FILE_VERSION = 1
+
+# magic, version, record size, record count
+HEADER = struct.Struct("<4sHHI")
+
+# Where the record count sits in the header
+COUNT = struct.Struct("<I")
+COUNT_OFFSET = 8
+
+# time, attacker id, defender id, attack base, attack roll, defense base,
+# defense roll, end roll, power diff, flags, damage, defense reduction %,
+# vulnerability seconds
+RECORD = struct.Struct("<dIIhBhBhhBHBf")
+
+CombatRecord = namedtuple("CombatRecord", (
+    "time", "attacker_id", "defender_id", "attack_base", "attack_roll",
+    "defense_base", "defense_roll", "end_roll", "power_diff", "flags",
+    "damage", "def_reduction", "vuln_time"))
+
+# Outcome flags
+FLAG_HIT = 1
+FLAG_POWER_HIT = 2
+FLAG_VULNERABLE = 4
+FLAG_KILL = 8
+
+# Records per log file before rotating (about 2.5 MB)
+RECORDS_PER_FILE = 65536
+
+# Log files kept; older ones are deleted on rotation
+MAX_LOG_FILES = 50
+
+LOG_FILE_PATTERN = "combat-*.log"
+
+def _file_order(path):
+    """Sort key putting log files oldest first, by name when written in the same instant."""
+    return (os.path.getmtime(path), os.path.basename(path))
+
+def _clamp(value, low, high):
+    """Keep a value inside a struct field's range."""
+    return max(low, min(high, int(value)))
+
+class CombatLog:
+    """
+    Appends combat records to rotating memory-mapped log files.
+    """
+    def __init__(self, log_dir=None, records_per_file=RECORDS_PER_FILE):
+        """
+        Args:
+            log_dir (str, optional): Directory for the log files, defaults
+                to combat/ under the server's log directory
+            records_per_file (int): Records per file before rotating
+        """
+        self.log_dir = log_dir
+        self.records_per_file = records_per_file
+        self.file = None
+        self.map = None
+        self.count = 0
+        self.sequence = 0
+
+    def _open(self):
+        """Start a new preallocated, memory-mapped log file."""
+        if self.log_dir is None:
+            from django.conf import settings
+            self.log_dir = os.path.join(settings.LOG_DIR, "combat")
+        os.makedirs(self.log_dir, exist_ok=True)
+        self._remove_old_files()
+
+        self.sequence += 1
+        name = time.strftime("combat-%Y%m%d-%H%M%S") + f"-{os.getpid()}-{self.sequence:06d}.log"
+        path = os.path.join(self.log_dir, name)
+        size = HEADER.size + RECORD.size * self.records_per_file
+        self.file = open(path, "w+b")
+        self.file.truncate(size)
+        self.map = mmap.mmap(self.file.fileno(), size)
+        self.count = 0
+        HEADER.pack_into(self.map, 0, FILE_MAGIC, FILE_VERSION, RECORD.size, 0)
+
+    def _remove_old_files(self):
+        """Delete the oldest log files so at most MAX_LOG_FILES remain after rotating."""
+        paths = sorted(glob.glob(os.path.join(self.log_dir, LOG_FILE_PATTERN)), key=_file_order)
+        for path in paths[:max(0, len(paths) - MAX_LOG_FILES + 1)]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def close(self):
+        """Flush and close the current log file."""
+        if self.map is not None:
+            self.map.flush()
+            self.map.close()
+            self.map = None
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+    def append(self, attacker_id, defender_id, roll_info, hit, damage=0, killed=False,
+               def_reduction=0, vuln_time=0.0, timestamp=None):
+        """
+        Append one resolved swing.
+
+        Args:
+            attacker_id (int): Id of the attacker
+            defender_id (int): Id of the defender
+            roll_info (dict): Roll details from CombatHandler.calculate_hit
+            hit (bool): Whether the swing hit
+            damage (int): Damage dealt, 0 on a miss
+            killed (bool): Whether the swing killed the defender
+            def_reduction (int): Defense reduction % if the miss left the
+                attacker vulnerable
+            vuln_time (float): Seconds of vulnerability applied
+            timestamp (float, optional): Time of the swing, defaults to now
+        """
+        if self.map is None or self.count >= self.records_per_file:
+            self.close()
+            self._open()
+        flags = 0
+        if hit:
+            flags |= FLAG_HIT
+        if roll_info['power_hit']:
+            flags |= FLAG_POWER_HIT
+        if vuln_time:
+            flags |= FLAG_VULNERABLE
+        if killed:
+            flags |= FLAG_KILL
+        RECORD.pack_into(
+            self.map, HEADER.size + self.count * RECORD.size,
+            timestamp or time.time(), attacker_id, defender_id,
+            _clamp(roll_info['attack_base'], -32768, 32767), _clamp(roll_info['attack_roll'], 0, 255),
+            _clamp(roll_info['defense_base'], -32768, 32767), _clamp(roll_info['defense_roll'], 0, 255),
+            _clamp(roll_info['end_roll'], -32768, 32767), _clamp(roll_info['power_diff'], -32768, 32767),
+            flags, _clamp(damage, 0, 65535), _clamp(def_reduction, 0, 255), vuln_time)
+        self.count += 1
+        # The count goes in last, so readers never see a half-written record
+        COUNT.pack_into(self.map, COUNT_OFFSET, self.count)
+
+# Shared by the combat handler
+COMBAT_LOG = CombatLog()
+
+def read_file(path):
+    """
+    Read every complete record in a log file.
+
+    Args:
+        path (str): The log file
+
+    Returns:
+        list: CombatRecords in the order they were written
+
+    Raises:
+        ValueError: If the file isn't a combat log this version can read
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+    magic, version, record_size, count = HEADER.unpack_from(data, 0)
+    if magic != FILE_MAGIC or version != FILE_VERSION or record_size != RECORD.size:
+        raise ValueError(f"{path} is not a version {FILE_VERSION} combat log")
+    end = HEADER.size + min(count, (len(data) - HEADER.size) // RECORD.size) * RECORD.size
+    return [CombatRecord._make(fields)
+            for fields in RECORD.iter_unpack(data[HEADER.size:end])]
+
+def iter_records(paths):
+    """
+    Read records from log files or directories of them, oldest file first.
+
+    Args:
+        paths (list): Log files and/or directories
+
+    Yields:
+        CombatRecord: Every record
+    """
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(glob.glob(os.path.join(path, LOG_FILE_PATTERN)))
+        else:
+            files.append(path)
+    for path in sorted(files, key=_file_order):
+        yield from read_file(path)
+
+def summarize(records, by_attacker=False):
+    """
+    Work out hit, power hit, vulnerability and damage rates.
+
+    Args:
+        records (iterable): CombatRecords
+        by_attacker (bool): Also break the numbers down per attacker
+
+    Returns:
+        dict: {"all": stats} plus {attacker id: stats} if by_attacker
+    """
+    def new_stats():
+        return {"swings": 0, "hits": 0, "power_hits": 0, "vulnerable": 0,
+                "kills": 0, "damage": 0, "end_roll": 0}
+
+    totals = defaultdict(new_stats)
+    for record in records:
+        keys = ("all", record.attacker_id) if by_attacker else ("all",)
+        for key in keys:
+            stats = totals[key]
+            stats["swings"] += 1
+            stats["hits"] += bool(record.flags & FLAG_HIT)
+            stats["power_hits"] += bool(record.flags & FLAG_POWER_HIT)
+            stats["vulnerable"] += bool(record.flags & FLAG_VULNERABLE)
+            stats["kills"] += bool(record.flags & FLAG_KILL)
+            stats["damage"] += record.damage
+            stats["end_roll"] += record.end_roll
+    return dict(totals)
+
+def format_stats(label, stats):
+    """Format one line of summary numbers."""
+    swings = stats["swings"] or 1
+    hits = stats["hits"] or 1
+    return (f"{label:>10}: {stats['swings']} swings, "
+            f"hit {stats['hits'] / swings:.1%}, power {stats['power_hits'] / swings:.1%}, "
+            f"exposed {stats['vulnerable'] / swings:.1%}, kills {stats['kills']}, "
+            f"dmg/hit {stats['damage'] / hits:.1f}, avg end roll {stats['end_roll'] / swings:.1f}")
+
+def replay(records, attacker_id=None, defender_id=None, verify=False):
+    """
+    Print fights swing by swing, optionally checking each outcome against
+    the current combat rules.
+
+    Args:
+        records (iterable): CombatRecords
+        attacker_id (int, optional): Only swings involving this combatant
+        defender_id (int, optional): Only swings involving this combatant too
+        verify (bool): Re-resolve every swing from its logged bases and rolls
+
+    Returns:
+        int: Number of swings whose outcome differs from the current rules
+    """
+    mismatches = 0
+    if verify:
+        from scripts import combat_core
+    for record in records:
+        ids = {record.attacker_id, record.defender_id}
+        if attacker_id is not None and attacker_id not in ids:
+            continue
+        if defender_id is not None and defender_id not in ids:
+            continue
+        stamp = time.strftime("%H:%M:%S", time.localtime(record.time))
+        if record.flags & FLAG_HIT:
+            outcome = f"{'power hit' if record.flags & FLAG_POWER_HIT else 'hit'} for {record.damage}"
+        else:
+            outcome = "miss"
+        if record.flags & FLAG_VULNERABLE:
+            outcome += f", exposed -{record.def_reduction}% for {record.vuln_time:.1f}s"
+        if record.flags & FLAG_KILL:
+            outcome += ", kill"
+        line = (f"{stamp} #{record.attacker_id} -> #{record.defender_id}: "
+                f"ATT {record.attack_base}+{record.attack_roll} vs DEF {record.defense_base}+{record.defense_roll} "
+                f"= {record.end_roll}: {outcome}")
+        if verify:
+            hits, power_hit, end_roll = combat_core.resolve_attack(
+                record.attack_base, record.defense_base, record.attack_roll,
+                record.defense_roll, record.power_diff)
+            damage = combat_core.calculate_damage(power_hit, record.power_diff, end_roll) if hits else 0
+            if (hits != bool(record.flags & FLAG_HIT) or end_roll != record.end_roll
+                    or min(damage, 65535) != record.damage):
+                mismatches += 1
+                line += f"  [MISMATCH: now {'hit ' + str(damage) if hits else 'miss'}]"
+        print(line)
+    return mismatches
+
+def main(argv=None):
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(description="Analyse and replay combat event logs.")
+    subparsers = parser.add_subparsers(dest="action", required=True)
+    summary_parser = subparsers.add_parser("summary", help="hit, damage and vulnerability rates")
+    summary_parser.add_argument("paths", nargs="+", help="log files or directories")
+    summary_parser.add_argument("--by-attacker", action="store_true")
+    replay_parser = subparsers.add_parser("replay", help="print fights swing by swing")
+    replay_parser.add_argument("paths", nargs="+", help="log files or directories")
+    replay_parser.add_argument("--attacker", type=int, help="only swings involving this id")
+    replay_parser.add_argument("--defender", type=int, help="only swings also involving this id")
+    replay_parser.add_argument("--verify", action="store_true",
+                               help="check every swing against the current combat rules")
+    args = parser.parse_args(argv)
+
+    records = iter_records(args.paths)
+    if args.action == "summary":
+        totals = summarize(records, by_attacker=args.by_attacker)
+        if not totals:
+            print("No records found.")
+            return 0
+        print(format_stats("all", totals.pop("all")))
+        for attacker_id in sorted(totals):
+            print(format_stats(f"#{attacker_id}", totals[attacker_id]))
+        return 0
+
+    mismatches = replay(records, attacker_id=args.attacker, defender_id=args.defender,
+                        verify=args.verify)
+    if args.verify:
+        print(f"{mismatches} swing(s) resolve differently under the current rules.")
+    return 1 if mismatches else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,108 @@
+"""
+Corpse decay queue
+
+Every corpse lasts the same time, so corpses are queued in the order they
+died and a single reactor call waits for the oldest one. When it fires,
+every corpse that is due decays in one batched transaction. Spawned
+corpses go back to the spawn engine's pool to be revived later; the rest
+are deleted. This replaces a CorpseScript per death, which cost a script
+row and a ticker for every kill.
+"""
+import time
+from collections import deque
+from django.db import transaction
+from twisted.internet import reactor
+from evennia import GLOBAL_SCRIPTS
+from evennia.utils.logger import log_trace
+from scripts.message_batcher import BATCHER
+
+# Seconds a corpse lies before it crumbles
+CORPSE_DECAY_TIME = 20
+
+# Most corpses decayed in one batch; the rest wait for the next reactor tick
+MAX_DECAY_BATCH = 100
+
+# Hand spawned corpses to the spawn engine for reuse instead of deleting them
+RECYCLE_CORPSES = True
+
+class CorpseQueue:
+    """
+    Corpses waiting to decay, oldest first, driven by one reactor call.
+    """
+    def __init__(self, decay_time=CORPSE_DECAY_TIME):
+        """
+        Args:
+            decay_time (float): Seconds a corpse lies before it decays
+        """
+        self.decay_time = decay_time
+        self.queue = deque()  # (deadline, corpse), in deadline order
+        self.call = None
+
+    def __len__(self):
+        return len(self.queue)
+
+    def add(self, corpse):
+        """
+        Queue a corpse to decay after the decay time.
+
+        Args:
+            corpse (Object): The dead hostile
+        """
+        self.queue.append((time.time() + self.decay_time, corpse))
+        self._schedule()
+
+    def clear(self):
+        """Forget every queued corpse and the pending reactor call."""
+        self.queue.clear()
+        if self.call and self.call.active():
+            self.call.cancel()
+        self.call = None
+
+    def _schedule(self):
+        """Make sure a reactor call is pending for the oldest corpse."""
+        if self.call or not self.queue:
+            return
+        self.call = reactor.callLater(max(0, self.queue[0][0] - time.time()), self._fire)
+
+    def _fire(self):
+        """Decay a batch of due corpses, then wait for the next one."""
+        self.call = None
+        now = time.time()
+        batch = []
+        while self.queue and self.queue[0][0] <= now and len(batch) < MAX_DECAY_BATCH:
+            batch.append(self.queue.popleft()[1])
+        try:
+            self.decay(batch)
+        except Exception:
+            log_trace("Error decaying corpses")
+        self._schedule()
+
+    def decay(self, corpses):
+        """
+        Remove corpses from the world in one transaction.
+
+        Args:
+            corpses (list): The corpses to decay
+
+        Returns:
+            int: Number of corpses decayed
+        """
+        spawner = GLOBAL_SCRIPTS.spawn_engine if RECYCLE_CORPSES else None
+        decayed = 0
+        with transaction.atomic():
+            for corpse in corpses:
+                # Skip corpses deleted or revived while they waited
+                if not corpse.pk or not corpse.db.corpse:
+                    continue
+                if corpse.location:
+                    BATCHER.msg_room(corpse.location, f"{corpse.key} crumbles to dust.")
+                try:
+                    # Savepoint, so one bad corpse doesn't roll back the batch
+                    with transaction.atomic():
+                        if not (spawner and spawner.recycle(corpse)):
+                            corpse.delete()
+                except Exception:
+                    log_trace(f"Error decaying corpse {corpse}")
+                    continue
+                decayed += 1
+        return decayed
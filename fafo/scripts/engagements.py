@@ -0,0 +1,209 @@
+"""
+Combat engagements
+
+Keeps track of who is fighting whom. Every swing engages attacker and
+defender in their room and adds threat to the defender's table for the
+attacker; combatants joined by engagements form a combat group. Auto
+targeting and hostile AI pick targets from these tables instead of
+scanning room contents.
+
+Engagements live in memory only. A combatant drops out when they die,
+leave the room or go ENGAGEMENT_TIMEOUT seconds without a swing.
+"""
+import time
+
+# Threat added for every swing, on top of the damage it did
+THREAT_PER_ATTACK = 1
+
+# Seconds without a swing before a combatant drops out of combat
+ENGAGEMENT_TIMEOUT = 60
+
+class EngagementRegistry:
+    """
+    Combat groups and threat tables for every room with a fight in it.
+    """
+    def __init__(self):
+        self.threat = {}  # combatant id -> {opponent id: threat against the combatant}
+        self.combatants = {}  # combatant id -> combatant
+        self.room_of = {}  # combatant id -> id of the room they are fighting in
+        self.rooms = {}  # room id -> set of combatant ids
+        self.last_active = {}  # combatant id -> time of their last swing or being swung at
+
+    def engage(self, attacker, defender):
+        """
+        Record a swing, engaging both sides in the attacker's room.
+
+        Args:
+            attacker (Object): The attacking combatant
+            defender (Object): The defending combatant
+        """
+        room = attacker.location
+        if not room or defender.location != room:
+            return
+        now = time.time()
+        for combatant in (attacker, defender):
+            old_room_id = self.room_of.get(combatant.id)
+            if old_room_id is not None and old_room_id != room.id:
+                self.disengage(combatant)
+            self.combatants[combatant.id] = combatant
+            self.room_of[combatant.id] = room.id
+            self.rooms.setdefault(room.id, set()).add(combatant.id)
+            self.last_active[combatant.id] = now
+
+        table = self.threat.setdefault(defender.id, {})
+        table[attacker.id] = table.get(attacker.id, 0) + THREAT_PER_ATTACK
+        # The attacker is now fighting the defender too
+        self.threat.setdefault(attacker.id, {}).setdefault(defender.id, 0)
+
+    def add_threat(self, defender, attacker, amount):
+        """
+        Add threat to a defender's table, e.g. for damage dealt.
+
+        Args:
+            defender (Object): Combatant holding the table
+            attacker (Object): Combatant the threat is against
+            amount (int): Threat to add
+        """
+        table = self.threat.get(defender.id)
+        if table is not None and attacker.id in table:
+            table[attacker.id] += amount
+
+    def disengage(self, combatant):
+        """
+        Drop a combatant from every fight, e.g. when they die.
+
+        Args:
+            combatant (Object): The combatant to drop
+        """
+        self._drop(combatant.id)
+
+    def _drop(self, combatant_id):
+        """Forget a combatant by id, which still works once it is deleted."""
+        self.combatants.pop(combatant_id, None)
+        self.last_active.pop(combatant_id, None)
+        room_id = self.room_of.pop(combatant_id, None)
+        if room_id is not None:
+            room_ids = self.rooms.get(room_id)
+            if room_ids is not None:
+                room_ids.discard(combatant_id)
+                if not room_ids:
+                    del self.rooms[room_id]
+        # Tables are kept symmetric, so only opponents can hold this combatant
+        for opponent_id in self.threat.pop(combatant_id, {}):
+            table = self.threat.get(opponent_id)
+            if table is not None:
+                table.pop(combatant_id, None)
+
+    def is_engaged(self, combatant, now=None):
+        """
+        Check whether a combatant is still fighting in the room they
+        were engaged in.
+
+        Args:
+            combatant (Object): The combatant to check
+            now (float, optional): Current time, to save looking it up
+
+        Returns:
+            bool: True if still in combat
+        """
+        if combatant is None or not combatant.pk or not combatant.location:
+            return False
+        if combatant.location.id != self.room_of.get(combatant.id):
+            return False
+        if hasattr(combatant, 'is_alive') and not combatant.is_alive():
+            return False
+        now = now or time.time()
+        return now - self.last_active.get(combatant.id, 0) < ENGAGEMENT_TIMEOUT
+
+    def opponents(self, combatant):
+        """
+        Get a combatant's opponents that are still in the fight, most
+        threatening first.
+
+        Args:
+            combatant (Object): The combatant
+
+        Returns:
+            list: Opponent objects
+        """
+        if not self.is_engaged(combatant):
+            return []
+        now = time.time()
+        table = self.threat.get(combatant.id, {})
+        ranked = sorted(table.items(), key=lambda item: item[1], reverse=True)
+        opponents = []
+        for opponent_id, _ in ranked:
+            opponent = self.combatants.get(opponent_id)
+            if self.is_engaged(opponent, now) and opponent.location == combatant.location:
+                opponents.append(opponent)
+        return opponents
+
+    def top_threat(self, combatant, candidates=None):
+        """
+        Get the opponent with the most threat against a combatant.
+
+        Args:
+            combatant (Object): The combatant choosing a target
+            candidates (iterable, optional): Only consider these objects
+
+        Returns:
+            Object or None: The target, if any
+        """
+        allowed = None if candidates is None else {obj.id for obj in candidates}
+        for opponent in self.opponents(combatant):
+            if allowed is None or opponent.id in allowed:
+                return opponent
+        return None
+
+    def group(self, combatant):
+        """
+        Get every combatant joined to this one by engagements in their room.
+
+        Args:
+            combatant (Object): Any member of the group
+
+        Returns:
+            list: The group's combatants, including this one
+        """
+        if not self.is_engaged(combatant):
+            return []
+        seen = {combatant.id: combatant}
+        queue = [combatant]
+        while queue:
+            for opponent in self.opponents(queue.pop()):
+                if opponent.id not in seen:
+                    seen[opponent.id] = opponent
+                    queue.append(opponent)
+        return list(seen.values())
+
+    def room_combatants(self, room):
+        """
+        Get everyone still fighting in a room.
+
+        Args:
+            room (Object): The room
+
+        Returns:
+            list: Combatants, in no particular order
+        """
+        now = time.time()
+        combatants = []
+        for combatant_id in list(self.rooms.get(room.id, ())):
+            combatant = self.combatants.get(combatant_id)
+            if self.is_engaged(combatant, now):
+                combatants.append(combatant)
+        return combatants
+
+    def prune(self):
+        """
+        Drop every combatant that died, left or went quiet.
+
+        Returns:
+            int: Number of combatants dropped
+        """
+        now = time.time()
+        stale = [combatant_id for combatant_id, combatant in self.combatants.items()
+                 if not self.is_engaged(combatant, now)]
+        for combatant_id in stale:
+            self._drop(combatant_id)
+        return len(stale)
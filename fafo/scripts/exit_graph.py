@@ -0,0 +1,176 @@
+"""
+Exit graph
+
+An in-memory directed graph of rooms joined by exits, built once from the
+exit table and kept current as exits are created and deleted. Routes are
+found with A*, using the coordinate map as the distance estimate, and
+searches never touch the database.
+"""
+import heapq
+from collections import deque
+from evennia import DefaultScript, GLOBAL_SCRIPTS, ObjectDB
+
+# Most rooms a single path search may expand before giving up
+MAX_SEARCH_NODES = 20000
+
+class ExitGraph(DefaultScript):
+    """
+    Global script holding the room/exit graph and answering route queries.
+    """
+
+    def at_script_creation(self):
+        """Set up the script."""
+        self.key = "exit_graph"
+        self.desc = "Room and exit graph for pathfinding"
+        self.persistent = True
+
+    def at_start(self):
+        """Build the graph from the database."""
+        self.rebuild()
+
+    def rebuild(self):
+        """Load every exit with one query over the exit table."""
+        edges = {}
+        exit_index = {}
+        exits = ObjectDB.objects.filter(
+            db_location__isnull=False, db_destination__isnull=False
+        ).values_list("id", "db_location_id", "db_destination_id")
+        for exit_id, source_id, dest_id in exits:
+            edges.setdefault(source_id, {})[exit_id] = dest_id
+            exit_index[exit_id] = source_id
+        self.ndb.edges = edges  # {room id: {exit id: destination room id}}
+        self.ndb.exit_index = exit_index  # {exit id: room id}
+
+    @property
+    def edges(self):
+        """The room id -> {exit id: destination id} adjacency map."""
+        if self.ndb.edges is None:
+            self.rebuild()
+        return self.ndb.edges
+
+    def add_exit(self, exit_obj):
+        """
+        Add or update an exit in the graph.
+
+        Args:
+            exit_obj (Object): Exit with a location and destination
+        """
+        if not exit_obj.location or not exit_obj.destination:
+            return
+        self.remove_exit(exit_obj)
+        self.edges.setdefault(exit_obj.location.id, {})[exit_obj.id] = exit_obj.destination.id
+        self.ndb.exit_index[exit_obj.id] = exit_obj.location.id
+
+    def remove_exit(self, exit_obj):
+        """
+        Drop an exit from the graph.
+
+        Args:
+            exit_obj (Object): The exit being deleted or moved
+        """
+        edges = self.edges
+        source_id = self.ndb.exit_index.pop(exit_obj.id, None)
+        if source_id is not None:
+            room_edges = edges.get(source_id, {})
+            room_edges.pop(exit_obj.id, None)
+            if not room_edges:
+                edges.pop(source_id, None)
+
+    def _coords(self):
+        """The coordinate map's room id -> (x, y, z) table."""
+        coord_map = GLOBAL_SCRIPTS.coord_map_manager
+        return coord_map.rooms if coord_map else {}
+
+    def find_path(self, start_id, goal_id, max_nodes=MAX_SEARCH_NODES, exit_filter=None):
+        """
+        Find the shortest route between two rooms with A*.
+        Every exit costs one step; the estimate is the number of grid
+        steps between the rooms' coordinates (zero without coordinates).
+
+        Args:
+            start_id (int): Id of the room to start in
+            goal_id (int): Id of the room to reach
+            max_nodes (int): Rooms to expand before giving up
+            exit_filter (callable, optional): Called with an exit id, returns
+                False for exits the route may not use, e.g. locked ones
+
+        Returns:
+            list or None: Exit ids to take in order, or None if no route
+                was found
+        """
+        if start_id == goal_id:
+            return []
+        edges = self.edges
+        coords = self._coords()
+        goal_coords = coords.get(goal_id)
+
+        def estimate(room_id):
+            room_coords = coords.get(room_id)
+            if not room_coords or not goal_coords:
+                return 0
+            return max(abs(a - b) for a, b in zip(room_coords, goal_coords))
+
+        came_from = {start_id: (None, None)}
+        cost = {start_id: 0}
+        frontier = [(estimate(start_id), 0, start_id)]
+        expanded = 0
+        while frontier:
+            _, steps, room_id = heapq.heappop(frontier)
+            if room_id == goal_id:
+                path = []
+                while room_id != start_id:
+                    room_id, exit_id = came_from[room_id]
+                    path.append(exit_id)
+                path.reverse()
+                return path
+            if steps > cost[room_id]:
+                continue  # Stale entry, a shorter route was found later
+            expanded += 1
+            if expanded > max_nodes:
+                return None
+            for exit_id, dest_id in edges.get(room_id, {}).items():
+                new_cost = steps + 1
+                if new_cost < cost.get(dest_id, new_cost + 1):
+                    if exit_filter and not exit_filter(exit_id):
+                        continue
+                    cost[dest_id] = new_cost
+                    came_from[dest_id] = (room_id, exit_id)
+                    heapq.heappush(frontier, (new_cost + estimate(dest_id), new_cost, dest_id))
+        return None
+
+    def reachable(self, start_id, limit=None):
+        """
+        Find every room that can be walked to from a room.
+
+        Args:
+            start_id (int): Id of the room to start in
+            limit (int, optional): Stop after finding this many rooms
+
+        Returns:
+            set: Ids of reachable rooms, including the start room
+        """
+        edges = self.edges
+        seen = {start_id}
+        queue = deque([start_id])
+        while queue:
+            room_id = queue.popleft()
+            for dest_id in edges.get(room_id, {}).values():
+                if dest_id not in seen:
+                    seen.add(dest_id)
+                    if limit and len(seen) >= limit:
+                        return seen
+                    queue.append(dest_id)
+        return seen
+
+    def unreachable(self, start_id, room_ids):
+        """
+        Find which of the given rooms can't be reached from a room.
+
+        Args:
+            start_id (int): Id of the room to start in
+            room_ids (iterable): Ids of rooms that should be reachable
+
+        Returns:
+            set: Ids of the rooms that can't be reached
+        """
+        return set(room_ids) - self.reachable(start_id)
@@ -0,0 +1,142 @@
+"""
+Exit sweeper
+
+Trails decay while nobody walks them. Instead of working the decay out
+when someone next traverses an exit, this script sweeps every degrading
+exit in the background: a few small batches per tick, and only while the
+server is quiet. Each batch works out the new traverse counts, writes
+them in one transaction and renames the exits with one UPDATE per new
+name, so trails nobody uses fade and hide on time.
+
+Traversals are counted in memory on each exit; every tick the sweeper
+also writes those counts out in a single transaction.
+"""
+import time
+from datetime import datetime
+from django.db import transaction
+from django.utils import timezone
+from evennia import DefaultScript, ObjectDB
+from evennia.server.sessionhandler import SESSIONS
+from evennia.utils.logger import log_trace
+from typeclasses.exits import DegradingExit, flush_traversals, get_exit_settings
+
+# Seconds between sweeper ticks
+SWEEP_TICK_INTERVAL = 30
+
+# Exits loaded and updated per batch
+SWEEP_BATCH_SIZE = 200
+
+# Batches done per tick while the server is quiet
+SWEEP_BATCHES_PER_TICK = 5
+
+# Seconds to wait after finishing a full sweep before starting the next
+SWEEP_PERIOD = 3600
+
+# Server-local hours counted as off-peak, when sweeping always runs
+OFF_PEAK_HOURS = range(2, 8)
+
+# Outside off-peak hours, only sweep with at most this many players connected
+MAX_SESSIONS_FOR_SWEEP = 5
+
+class ExitSweeper(DefaultScript):
+    """
+    Global script that applies degradation to every degrading exit.
+    """
+
+    def at_script_creation(self):
+        """Set up the script."""
+        self.key = "exit_sweeper"
+        self.desc = "Applies trail degradation in the background"
+        self.interval = SWEEP_TICK_INTERVAL
+        self.persistent = True
+        self.db.cursor = 0  # Highest exit id swept in the current pass
+        self.db.last_sweep = 0  # When the last full pass finished
+
+    def is_quiet(self):
+        """
+        Check whether the server is quiet enough to sweep.
+
+        Returns:
+            bool: True during off-peak hours or with few players connected
+        """
+        if datetime.now().hour in OFF_PEAK_HOURS:
+            return True
+        return len(SESSIONS.get_sessions()) <= MAX_SESSIONS_FOR_SWEEP
+
+    def at_stop(self):
+        """Write out buffered traversals before the script stops."""
+        flush_traversals()
+
+    def at_repeat(self):
+        """
+        Write out buffered traversals, then sweep a few batches if a pass
+        is due and the server is quiet.
+        """
+        try:
+            flush_traversals()
+        except Exception:
+            log_trace("Error writing exit traversal counts")
+
+        cursor = self.db.cursor or 0
+        if not cursor and time.time() - (self.db.last_sweep or 0) < SWEEP_PERIOD:
+            return
+        if not self.is_quiet():
+            return
+
+        for _ in range(SWEEP_BATCHES_PER_TICK):
+            try:
+                cursor = self.sweep_batch(cursor)
+            except Exception:
+                log_trace("Error sweeping degrading exits")
+                return
+            if cursor is None:
+                # Pass finished, start over after SWEEP_PERIOD
+                self.db.cursor = 0
+                self.db.last_sweep = time.time()
+                return
+        self.db.cursor = cursor
+
+    def sweep_batch(self, cursor):
+        """
+        Apply degradation to the next batch of exits.
+
+        Exits are walked in id order, so the pass can stop between ticks
+        and carry on where it left off.
+
+        Args:
+            cursor (int): Highest exit id already swept in this pass
+
+        Returns:
+            int or None: The new cursor, or None if the pass is finished
+        """
+        exits = list(DegradingExit.objects.all_family().filter(
+            id__gt=cursor).order_by("id")[:SWEEP_BATCH_SIZE])
+        if not exits:
+            return None
+
+        now = timezone.now()
+        wear_settings = get_exit_settings()
+        renames = {}
+        with transaction.atomic():
+            for exit_obj in exits:
+                degradation = exit_obj.degradation_due(now)
+                if degradation <= 0:
+                    continue
+                old_count = exit_obj.traverse_count
+                stored = max(0, (exit_obj.db.traverse_count or 0) - degradation)
+                attrs = [("traverse_count", stored), ("last_traverse", now)]
+                count = stored + (exit_obj.ndb.pending_traversals or 0)
+                if count == 0 and not exit_obj.db.hidden:
+                    attrs.append(("hidden", True))
+                exit_obj.attributes.batch_add(*attrs)
+                # Only rename exits that dropped to a lower wear level
+                if wear_settings.level_for(count) != wear_settings.level_for(old_count):
+                    renames.setdefault(exit_obj.wear_level_name(count), []).append(exit_obj)
+
+            # One UPDATE per distinct name instead of a save per exit
+            for key, renamed in renames.items():
+                ObjectDB.objects.filter(id__in=[exit_obj.id for exit_obj in renamed]).update(db_key=key)
+        for key, renamed in renames.items():
+            for exit_obj in renamed:
+                exit_obj.db_key = key
+        return exits[-1].id
@@ -0,0 +1,95 @@
+"""
+Message batcher
+
+Every swing in a fight sends several messages to everyone in the room,
+and each msg call is its own round trip to the portal. Messages sent
+through the batcher are instead gathered per receiver and sent as a
+single msg call once the current reactor tick is done, so each session
+gets one payload however much happened in that tick.
+
+Room messages can carry a brief version for bystanders. Players pick
+how much of other people's fights they see with their combat verbosity:
+
+    full  - the whole ATT/DEF breakdown
+    brief - a one line summary
+    off   - nothing from fights they aren't in
+"""
+from twisted.internet import reactor
+from evennia.utils.logger import log_trace
+
+# Combat verbosity levels for messages about other people's fights
+VERBOSITY_FULL = "full"
+VERBOSITY_BRIEF = "brief"
+VERBOSITY_OFF = "off"
+VERBOSITY_LEVELS = (VERBOSITY_FULL, VERBOSITY_BRIEF, VERBOSITY_OFF)
+
+class MessageBatcher:
+    """
+    Gathers outgoing messages per receiver and sends them together at
+    the end of the reactor tick.
+    """
+    def __init__(self):
+        self.pending = {}  # receiver id -> (receiver, [texts])
+        self.call = None
+
+    def msg(self, receiver, text):
+        """
+        Queue a message for a receiver.
+
+        Args:
+            receiver (Object): Object to message
+            text (str): The message
+        """
+        if not text:
+            return
+        entry = self.pending.get(receiver.id)
+        if entry is None:
+            self.pending[receiver.id] = (receiver, [text])
+        else:
+            entry[1].append(text)
+        if self.call is None:
+            self.call = reactor.callLater(0, self.flush)
+
+    def msg_room(self, room, text, brief=None, participants=()):
+        """
+        Queue a message for every connected player in a room.
+
+        Args:
+            room (Object): The room
+            text (str): Full message, always sent to participants
+            brief (str, optional): Short version for bystanders. Without
+                one, everybody gets the full message whatever their verbosity
+            participants (iterable): Objects the message is about
+        """
+        if not room:
+            return
+        participant_ids = {obj.id for obj in participants}
+        for con in room.contents:
+            if not con.has_account:
+                continue
+            if brief is None or con.id in participant_ids:
+                self.msg(con, text)
+                continue
+            level = getattr(con, "combat_verbosity", VERBOSITY_FULL)
+            if level == VERBOSITY_FULL:
+                self.msg(con, text)
+            elif level == VERBOSITY_BRIEF:
+                self.msg(con, brief)
+
+    def flush(self):
+        """Send every queued message, one msg call per receiver."""
+        call, self.call = self.call, None
+        if call is not None and call.active():
+            # Flushed early by hand, the reactor call is no longer needed
+            call.cancel()
+        pending, self.pending = self.pending, {}
+        for receiver, texts in pending.values():
+            if not receiver.pk:
+                continue
+            try:
+                receiver.msg("\n".join(texts))
+            except Exception:
+                log_trace(f"Error sending batched messages to {receiver}")
+
+# Shared by everything that sends combat output
+BATCHER = MessageBatcher()
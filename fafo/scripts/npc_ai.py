@@ -0,0 +1,106 @@
+"""
+NPC AI scheduler
+
+One global script drives every hostile instead of a ticker per monster.
+Each tick only rooms holding a connected player are woken, so idle zones
+cost nothing. The awake hostiles are split into batches that run at
+staggered offsets across the tick, which keeps large rooms from all
+acting in the same instant.
+"""
+from functools import partial
+from evennia import DefaultScript, GLOBAL_SCRIPTS
+from evennia.server.sessionhandler import SESSIONS
+from evennia.utils.logger import log_trace
+from scripts.timer_queue import GameTimer, TimerQueue
+from typeclasses.hostiles import Hostile
+
+# Seconds between AI ticks
+AI_TICK_INTERVAL = 2
+
+# Number of batches each tick is split into
+STAGGER_SLOTS = 8
+
+class NPCAIScheduler(DefaultScript):
+    """
+    Global script that wakes hostiles near connected players.
+    """
+
+    def at_script_creation(self):
+        """Set up the script."""
+        self.key = "npc_ai"
+        self.desc = "Drives hostile NPC actions"
+        self.interval = AI_TICK_INTERVAL
+        self.persistent = True
+
+    @property
+    def timer_queue(self):
+        """In-memory queue holding this tick's staggered batches."""
+        if self.ndb.timer_queue is None:
+            self.ndb.timer_queue = TimerQueue()
+        return self.ndb.timer_queue
+
+    def at_stop(self):
+        """Drop any batches still waiting to run."""
+        if self.ndb.timer_queue is not None:
+            self.ndb.timer_queue.clear()
+
+    def get_active_rooms(self):
+        """
+        Find every room holding at least one connected player.
+
+        Returns:
+            dict: {room id: (room, [puppeted characters])}
+        """
+        rooms = {}
+        for session in SESSIONS.get_sessions():
+            puppet = session.get_puppet()
+            if not puppet or not puppet.location:
+                continue
+            room = puppet.location
+            entry = rooms.setdefault(room.id, (room, []))
+            if puppet not in entry[1]:
+                entry[1].append(puppet)
+        return rooms
+
+    def at_repeat(self):
+        """
+        Collect the awake hostiles and queue them in staggered batches.
+        Hostiles still in roundtime sit this tick out.
+        """
+        combat = GLOBAL_SCRIPTS.combat_handler
+        batches = [[] for _ in range(STAGGER_SLOTS)]
+        for room, players in self.get_active_rooms().values():
+            for obj in room.contents:
+                if not isinstance(obj, Hostile) or not obj.is_alive():
+                    continue
+                if combat and combat.is_in_roundtime(obj)[0]:
+                    continue
+                # A hostile keeps the same slot every tick, spacing its actions evenly
+                batches[obj.id % STAGGER_SLOTS].append((obj, players))
+
+        slot_length = self.interval / STAGGER_SLOTS
+        for slot, batch in enumerate(batches):
+            if batch:
+                self.timer_queue.schedule(
+                    GameTimer(slot * slot_length, callback=partial(self.run_batch, batch)))
+
+    def run_batch(self, batch, timer=None):
+        """
+        Let each hostile in a batch act.
+
+        Args:
+            batch (list): [(hostile, [players in its room]), ...]
+            timer (GameTimer, optional): The timer that fired the batch
+        """
+        for hostile, players in batch:
+            # Things may have changed since the batch was queued
+            if not hostile.pk or not hostile.is_alive():
+                continue
+            targets = [player for player in players
+                       if player.pk and player.location == hostile.location and player.sessions.count()]
+            if not targets:
+                continue
+            try:
+                hostile.at_ai_tick(targets)
+            except Exception:
+                log_trace(f"Error running AI for {hostile}")
@@ -0,0 +1,282 @@
+"""
+Spawn engine
+
+One global script keeps every spawning region at its population cap,
+instead of a ticker per room. Each region's rooms are indexed once, and
+the population cap, respawn rate and hostile list are read from
+world/regions/spawning.json:
+
+    "forest_wolves": {
+        "name": "Forest wolves",
+        "max_population": 20,
+        "respawn_rate": 6,
+        "hostiles": [
+            {"key": "a grey wolf", "weight": 3, "attrs": {"base_power": 4}},
+            {"key": "a wolf pup", "attrs": {"max_health": 40, "current_health": 40}}
+        ]
+    }
+
+respawn_rate is hostiles per minute. Spawns are done in capped batches
+every tick, and dead spawns are parked in a pool and brought back to
+life instead of being deleted and recreated.
+"""
+from django.db import transaction
+from evennia import DefaultScript, GLOBAL_SCRIPTS, ObjectDB, create_object
+from evennia.utils.logger import log_trace
+from scripts.rng import get_stream
+
+# Seconds between spawn ticks
+SPAWN_TICK_INTERVAL = 10
+
+# Most hostiles spawned in a single tick across all regions
+MAX_SPAWNS_PER_TICK = 50
+
+# Most dead hostiles kept for reuse
+MAX_POOL_SIZE = 200
+
+# Tag category marking which region a hostile was spawned for
+SPAWN_TAG_CATEGORY = "spawn_region"
+
+DEFAULT_HOSTILE_TYPECLASS = "typeclasses.hostiles.Hostile"
+
+class SpawnEngine(DefaultScript):
+    """
+    Global script that keeps spawning regions populated.
+    """
+
+    def at_script_creation(self):
+        """Set up the script."""
+        self.key = "spawn_engine"
+        self.desc = "Keeps spawning regions populated"
+        self.interval = SPAWN_TICK_INTERVAL
+        self.persistent = True
+
+    def at_start(self):
+        """Index regions and existing spawns."""
+        self.rebuild()
+
+    def rebuild(self):
+        """
+        Rebuild the region -> rooms index, the live population and the
+        corpse pool from the database.
+        """
+        self.ndb.region_rooms = {}
+        self.ndb.room_regions = {}
+        self.ndb.rooms = {}
+        self.ndb.population = {}
+        self.ndb.pool = []
+        self.ndb.budget = {}
+
+        rooms = ObjectDB.objects.filter(db_attributes__db_key="spawning_regions").distinct()
+        for room in rooms:
+            self.update_room(room)
+
+        for hostile in ObjectDB.objects.filter(db_tags__db_category=SPAWN_TAG_CATEGORY).distinct():
+            region_id = hostile.tags.get(category=SPAWN_TAG_CATEGORY)
+            if not hostile.location:
+                self.ndb.pool.append(hostile)
+            elif hostile.db.corpse:
+                # Still lying in a room, the corpse queue recycles it when it decays
+                continue
+            elif region_id:
+                self.population(region_id).add(hostile.id)
+
+    def _indexes(self):
+        """Return the in-memory indexes, rebuilding them if the script restarted."""
+        if self.ndb.region_rooms is None:
+            self.rebuild()
+        return self.ndb.region_rooms, self.ndb.room_regions
+
+    def population(self, region_id):
+        """
+        Get the ids of the living hostiles spawned for a region.
+
+        Args:
+            region_id (str): The spawning region
+
+        Returns:
+            set: Hostile ids
+        """
+        if self.ndb.population is None:
+            self.rebuild()
+        return self.ndb.population.setdefault(region_id, set())
+
+    def get_rooms(self, region_id):
+        """
+        Get the ids of every room in a spawning region.
+
+        Args:
+            region_id (str): The spawning region
+
+        Returns:
+            list: Room ids
+        """
+        region_rooms, _ = self._indexes()
+        return region_rooms.get(region_id, [])
+
+    def update_room(self, room):
+        """
+        Re-index a room after its spawning regions changed.
+
+        Args:
+            room (Object): The room to index
+        """
+        region_rooms, room_regions = self._indexes()
+        new_regions = set(room.attributes.get("spawning_regions") or ()) if room.pk else set()
+        old_regions = room_regions.get(room.id, set())
+
+        for region_id in old_regions - new_regions:
+            rooms = region_rooms.get(region_id, [])
+            if room.id in rooms:
+                rooms.remove(room.id)
+        for region_id in new_regions - old_regions:
+            region_rooms.setdefault(region_id, []).append(room.id)
+
+        if new_regions:
+            room_regions[room.id] = new_regions
+            self.ndb.rooms[room.id] = room
+        else:
+            room_regions.pop(room.id, None)
+            self.ndb.rooms.pop(room.id, None)
+
+    def _get_room(self, room_id):
+        """Get an indexed room, dropping it from the index if it was deleted."""
+        room = self.ndb.rooms.get(room_id)
+        if room is not None and room.pk:
+            return room
+        region_rooms, room_regions = self._indexes()
+        for region_id in room_regions.pop(room_id, ()):
+            region_rooms[region_id].remove(room_id)
+        self.ndb.rooms.pop(room_id, None)
+        return None
+
+    def at_repeat(self):
+        """Spend this tick's spawn budget on the regions below their cap."""
+        region_handler = getattr(GLOBAL_SCRIPTS.region_manager.ndb, "spawning", None)
+        if not region_handler:
+            return
+        region_rooms, _ = self._indexes()
+
+        plan = []
+        for region_id in list(region_rooms):
+            config = region_handler.get_region(region_id)
+            if not config or not config.get("hostiles") or not region_rooms[region_id]:
+                continue
+            missing = config.get("max_population", 0) - len(self.population(region_id))
+            if missing <= 0:
+                self.ndb.budget.pop(region_id, None)
+                continue
+            # Respawn rate is per minute, carried over between ticks as a fraction
+            budget = self.ndb.budget.get(region_id, 0) + config.get("respawn_rate", 1) * self.interval / 60
+            count = min(missing, int(budget))
+            self.ndb.budget[region_id] = min(budget - count, missing)
+            plan.extend((region_id, config) for _ in range(count))
+
+        if len(plan) > MAX_SPAWNS_PER_TICK:
+            get_stream("spawn").shuffle(plan)
+            plan = plan[:MAX_SPAWNS_PER_TICK]
+        if plan:
+            self.spawn_batch(plan)
+
+    def spawn_batch(self, plan):
+        """
+        Spawn a batch of hostiles inside one transaction.
+
+        Args:
+            plan (list): [(region id, region config), ...], one per hostile
+
+        Returns:
+            int: Number of hostiles spawned
+        """
+        spawned = 0
+        with transaction.atomic():
+            for region_id, config in plan:
+                room = None
+                rooms = self.get_rooms(region_id)
+                while rooms and room is None:
+                    room = self._get_room(get_stream("spawn").choice(rooms))
+                if room is None:
+                    continue
+                try:
+                    # Savepoint, so one bad spawn doesn't roll back the batch
+                    with transaction.atomic():
+                        hostile = self.spawn_hostile(region_id, config, room)
+                except Exception:
+                    log_trace(f"Error spawning hostile for region {region_id}")
+                    continue
+                self.population(region_id).add(hostile.id)
+                spawned += 1
+        return spawned
+
+    def spawn_hostile(self, region_id, config, room):
+        """
+        Spawn one hostile from a region's hostile list, reusing a pooled
+        corpse of the same typeclass when there is one. A reused corpse is
+        reset before the entry's attrs are applied, so it keeps nothing
+        from the entry it last spawned as.
+
+        Args:
+            region_id (str): The spawning region
+            config (dict): The region's spawning config
+            room (Object): Room to spawn in
+
+        Returns:
+            Object: The spawned hostile
+        """
+        entries = config["hostiles"]
+        entry = get_stream("spawn").choices(entries, weights=[e.get("weight", 1) for e in entries])[0]
+        typeclass = entry.get("typeclass", DEFAULT_HOSTILE_TYPECLASS)
+
+        hostile = self._take_from_pool(typeclass)
+        if hostile:
+            hostile.revive(entry["key"], room, attrs=entry.get("attrs"))
+        else:
+            attrs = entry.get("attrs") or {}
+            hostile = create_object(typeclass, key=entry["key"], location=room, home=room,
+                                    attributes=list(attrs.items()) + [("spawn_attrs", list(attrs))])
+        hostile.tags.remove(category=SPAWN_TAG_CATEGORY)
+        hostile.tags.add(region_id, category=SPAWN_TAG_CATEGORY)
+        room.msg_contents(f"{hostile.key} arrives.", exclude=[hostile])
+        return hostile
+
+    def _take_from_pool(self, typeclass):
+        """Pop a pooled hostile of the given typeclass, if any."""
+        pool = self.ndb.pool or []
+        for index in range(len(pool) - 1, -1, -1):
+            hostile = pool[index]
+            if not hostile.pk:
+                del pool[index]
+            elif hostile.typeclass_path == typeclass:
+                del pool[index]
+                return hostile
+        return None
+
+    def on_death(self, hostile):
+        """
+        Stop counting a dead hostile towards its region's population.
+
+        Args:
+            hostile (Object): The hostile that died
+        """
+        region_id = hostile.tags.get(category=SPAWN_TAG_CATEGORY)
+        if region_id:
+            self.population(region_id).discard(hostile.id)
+
+    def recycle(self, hostile):
+        """
+        Park a spawned corpse for reuse instead of deleting it.
+
+        Args:
+            hostile (Object): The corpse to recycle
+
+        Returns:
+            bool: True if it was pooled, False if the caller should delete it
+        """
+        if self.ndb.pool is None:
+            self.rebuild()
+        if not hostile.tags.get(category=SPAWN_TAG_CATEGORY) or len(self.ndb.pool) >= MAX_POOL_SIZE:
+            return False
+        self.on_death(hostile)
+        hostile.location = None
+        self.ndb.pool.append(hostile)
+        return True
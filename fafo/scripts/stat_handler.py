@@ -3,10 +3,66 @@ Stat Effect Handler
 
 Manages temporary and permanent stat modifications, buffs, and debuffs for all characters.
 """
+from collections import namedtuple
 from evennia import DefaultScript
 from evennia.utils.logger import log_trace
+import heapq
+import itertools
 import time
 
+# Core stats and skills that have a base_ attribute and can carry effects
+STAT_NAMES = (
+    "power", "agility", "speed", "vitality", "resistance",
+    "focus", "discipline", "intelligence", "wisdom", "charisma",
+    "weapons", "shields", "armor", "physical_fitness",
+    "combat_prowess", "evasive_maneuvers",
+)
+
+# Immutable view of every modified stat plus the derived combat values
+StatSnapshot = namedtuple("StatSnapshot", STAT_NAMES + ("attack", "defense"))
+
+def make_stat_snapshot(values, has_shield=False):
+    """
+    Build a StatSnapshot from resolved stat values.
+    
+    Args:
+        values (dict): {stat_name: value} for every name in STAT_NAMES
+        has_shield (bool): Whether a shield is equipped (adds shields to defense)
+        
+    Returns:
+        StatSnapshot: The snapshot, with attack and defense derived
+    """
+    attack = values["agility"] + values["speed"] + values["weapons"]
+    defense = values["agility"] + values["speed"] + (values["shields"] if has_shield else 0)
+    return StatSnapshot(attack=attack, defense=defense, **values)
+
+# Effects lasting at least this many seconds (or permanently) are checkpointed to the DB
+DURABLE_DURATION = 300
+
+# Seconds between checkpoints of durable effects
+CHECKPOINT_INTERVAL = 60
+
+# Seconds a stat with conditional effects may be served from cache (0 disables caching it)
+CONDITIONAL_CACHE_TTL = 1
+
+# The combined effect modifiers on a stat, valid until valid_until. Base values
+# are read fresh on every lookup, so changing a base stat needs no invalidation
+CacheEntry = namedtuple("CacheEntry", ("flat", "multiplier", "valid_until", "conditional"))
+
+def apply_modifiers(base_value, flat, multiplier):
+    """
+    Apply combined effect modifiers to a base stat value.
+    
+    Args:
+        base_value (float): The unmodified stat value
+        flat (float): Sum of the flat modifiers
+        multiplier (float): Product of the percentage modifiers
+        
+    Returns:
+        int: The modified value
+    """
+    return int((base_value + flat) * multiplier)
+
 class StatEffect:
     """
     Represents a single stat modification effect.
@@ -42,6 +98,12 @@ class StatEffect:
             return False
         return time.time() >= self.start_time + self.duration
         
+    def expires_at(self):
+        """Get the absolute expiry time, or None if permanent."""
+        if self.duration is None:
+            return None
+        return self.start_time + self.duration
+        
     def remaining_time(self):
         """Get remaining duration in seconds."""
         if self.duration is None:
@@ -59,11 +121,19 @@ class StatEffect:
                 log_trace("Error in stat effect condition")
                 return False
         return True
+        
+    def is_durable(self):
+        """Check if effect lasts long enough to be saved to the database."""
+        return self.duration is None or self.duration >= DURABLE_DURATION
 
 class StatEffectHandler(DefaultScript):
     """
     Script that manages all stat effects on characters.
     Runs every second to update effects and recalculate stats.
+    
+    Effects and the stat cache live in process memory. Only durable
+    effects (permanent or long-lasting) are checkpointed to the database,
+    in one write every CHECKPOINT_INTERVAL seconds and at shutdown.
     """
     
     def at_script_creation(self):
@@ -73,13 +143,111 @@ class StatEffectHandler(DefaultScript):
         self.interval = 1  # Check every second
         self.persistent = True
         
-        # Initialize effect storage
+        # Checkpoint of durable effects
         # Structure: {character_id: {stat_name: [StatEffect, ...]}}
         self.db.effects = {}
         
-        # Cache of calculated stats
-        # Structure: {character_id: {stat_name: value}}
-        self.db.stat_cache = {}
+    def at_start(self):
+        """Load durable effects back into memory."""
+        if self.ndb.effects is None:
+            self.load_effects()
+        
+    def at_server_reload(self):
+        """Save durable effects before reload."""
+        self.save_effects()
+        
+    def at_server_shutdown(self):
+        """Save durable effects before shutdown."""
+        self.save_effects()
+        
+    @property
+    def effects(self):
+        """
+        In-memory effect store.
+        Structure: {character_id: {stat_name: [StatEffect, ...]}}
+        """
+        if self.ndb.effects is None:
+            self.load_effects()
+        return self.ndb.effects
+        
+    @property
+    def expiry_queue(self):
+        """
+        Min-heap of timed effects ordered by expiry.
+        Structure: [(expires_at, sequence, character_id, StatEffect), ...]
+        """
+        if self.ndb.expiry_queue is None:
+            self.load_effects()
+        return self.ndb.expiry_queue
+        
+    @property
+    def stat_cache(self):
+        """
+        In-memory cache of calculated stats.
+        Structure: {character_id: {stat_name: CacheEntry}}
+        """
+        if self.ndb.stat_cache is None:
+            self.ndb.stat_cache = {}
+        return self.ndb.stat_cache
+        
+    def load_effects(self):
+        """Rebuild the in-memory store from the database checkpoint."""
+        effects = {}
+        self.ndb.expiry_queue = []
+        self.ndb.expiry_counter = itertools.count()
+        for char_id, stats in (self.db.effects or {}).items():
+            for stat, stat_effects in stats.items():
+                active = [e for e in stat_effects if not e.is_expired()]
+                if active:
+                    effects.setdefault(char_id, {})[stat] = active
+                    for effect in active:
+                        self._queue_expiry(char_id, effect)
+        self.ndb.effects = effects
+        self.ndb.stat_cache = {}
+        self.ndb.dirty = False
+        self.ndb.last_checkpoint = time.time()
+        
+        # Older versions stored the stat cache in the database
+        if self.attributes.has("stat_cache"):
+            self.attributes.remove("stat_cache")
+        
+    def save_effects(self):
+        """Checkpoint all durable effects to the database in a single write."""
+        if self.ndb.effects is None:
+            return
+        durable = {}
+        for char_id, stats in self.ndb.effects.items():
+            for stat, stat_effects in stats.items():
+                kept = [e for e in stat_effects if e.is_durable() and not e.is_expired()]
+                if kept:
+                    durable.setdefault(char_id, {})[stat] = kept
+        self.db.effects = durable
+        self.ndb.dirty = False
+        self.ndb.last_checkpoint = time.time()
+        
+    def _queue_expiry(self, char_id, effect):
+        """Add a timed effect to the expiry queue."""
+        expires_at = effect.expires_at()
+        if expires_at is not None:
+            heapq.heappush(self.ndb.expiry_queue,
+                           (expires_at, next(self.ndb.expiry_counter), char_id, effect))
+            
+    def _mark_dirty(self, effects):
+        """Flag that durable effects changed since the last checkpoint."""
+        if any(e.is_durable() for e in effects):
+            self.ndb.dirty = True
+            
+    def get_effects(self, character):
+        """
+        Get all effects currently on a character.
+        
+        Args:
+            character: The character to look up
+            
+        Returns:
+            dict: {stat_name: [StatEffect, ...]}
+        """
+        return self.effects.get(character.id, {})
         
     def add_effect(self, character, effect):
         """
@@ -89,23 +257,21 @@ class StatEffectHandler(DefaultScript):
             character: The character to affect
             effect (StatEffect): The effect to apply
         """
-        char_id = character.id
-        if char_id not in self.db.effects:
-            self.db.effects[char_id] = {}
-            
-        if effect.stat not in self.db.effects[char_id]:
-            self.db.effects[char_id][effect.stat] = []
+        char_effects = self.effects.setdefault(character.id, {})
+        stat_effects = char_effects.setdefault(effect.stat, [])
             
         # Check stacking rules
         if not effect.stacks:
             # Remove existing non-stacking effects from same source
-            self.db.effects[char_id][effect.stat] = [
-                e for e in self.db.effects[char_id][effect.stat]
-                if e.source != effect.source or e.stacks
-            ]
+            removed = [e for e in stat_effects if e.source == effect.source and not e.stacks]
+            if removed:
+                stat_effects[:] = [e for e in stat_effects if e not in removed]
+                self._mark_dirty(removed)
             
-        self.db.effects[char_id][effect.stat].append(effect)
-        self._invalidate_cache(char_id, effect.stat)
+        stat_effects.append(effect)
+        self._queue_expiry(character.id, effect)
+        self._mark_dirty([effect])
+        self._invalidate_cache(character.id, effect.stat)
         
     def remove_effect(self, character, source=None, stat=None):
         """
@@ -117,26 +283,44 @@ class StatEffectHandler(DefaultScript):
             stat (str, optional): Remove effects for this stat
         """
         char_id = character.id
-        if char_id not in self.db.effects:
+        char_effects = self.effects.get(char_id)
+        if not char_effects:
             return
             
-        if stat and stat in self.db.effects[char_id]:
-            if source:
-                self.db.effects[char_id][stat] = [
-                    e for e in self.db.effects[char_id][stat]
-                    if e.source != source
-                ]
-            else:
-                self.db.effects[char_id][stat] = []
-            self._invalidate_cache(char_id, stat)
+        if stat and stat in char_effects:
+            stats = [stat]
         elif source:
-            for stat in self.db.effects[char_id]:
-                self.db.effects[char_id][stat] = [
-                    e for e in self.db.effects[char_id][stat]
-                    if e.source != source
-                ]
-                self._invalidate_cache(char_id, stat)
+            stats = list(char_effects)
+        else:
+            return
+            
+        for stat in stats:
+            stat_effects = char_effects[stat]
+            removed = [e for e in stat_effects if not source or e.source == source]
+            if not removed:
+                continue
+            stat_effects[:] = [e for e in stat_effects if e not in removed]
+            if not stat_effects:
+                del char_effects[stat]
+            self._mark_dirty(removed)
+            self._invalidate_cache(char_id, stat)
+        if not char_effects:
+            del self.effects[char_id]
                 
+    def clear_character(self, character):
+        """
+        Drop every effect and cached stat on a character, e.g. when a
+        recycled hostile comes back as a fresh spawn under the same id.
+        
+        Args:
+            character: The character to clear
+        """
+        char_effects = self.effects.pop(character.id, None)
+        if char_effects:
+            for stat_effects in char_effects.values():
+                self._mark_dirty(stat_effects)
+        self.stat_cache.pop(character.id, None)
+        
     def calculate_stat(self, character, stat):
         """
         Calculate final value for a stat including all effects.
@@ -149,68 +333,185 @@ class StatEffectHandler(DefaultScript):
             int: The final calculated stat value
         """
         char_id = character.id
+        now = time.time()
         
-        # Check cache first
-        if char_id in self.db.stat_cache and stat in self.db.stat_cache[char_id]:
-            return int(self.db.stat_cache[char_id][stat])
-            
         # Get base value (now with base_ prefix)
         base_value = getattr(character, f"base_{stat}", None)
         if base_value is None:
             return None
             
-        if char_id not in self.db.effects or stat not in self.db.effects[char_id]:
+        # Check cache first
+        cached = self._get_cached(char_id, stat, now)
+        if cached:
+            return apply_modifiers(base_value, cached.flat, cached.multiplier)
+            
+        stat_effects = self.effects.get(char_id, {}).get(stat)
+        if not stat_effects:
             return int(base_value)
             
+        return self._apply_effects(character, base_value, stat_effects, stat, now)
+        
+    def _get_cached(self, char_id, stat, now):
+        """
+        Get a cache entry if it can still be served.
+        
+        Args:
+            char_id (int): Character id
+            stat (str): The stat to look up
+            now (float): Current time
+            
+        Returns:
+            CacheEntry or None: The entry, if present and unexpired
+        """
+        entry = self.stat_cache.get(char_id, {}).get(stat)
+        if entry is None or now >= entry.valid_until:
+            return None
+        return entry
+        
+    def _cache_stat(self, char_id, stat, flat, multiplier, stat_effects, now):
+        """
+        Cache a stat's modifiers until its soonest contributing effect expires.
+        Stats with conditional effects are only cached for CONDITIONAL_CACHE_TTL.
+        
+        Args:
+            char_id (int): Character id
+            stat (str): The stat that was calculated
+            flat (float): Sum of the flat modifiers
+            multiplier (float): Product of the percentage modifiers
+            stat_effects (list): StatEffects the modifiers came from
+            now (float): Current time
+        """
+        valid_until = float('inf')
+        conditional = False
+        for effect in stat_effects:
+            expires_at = effect.expires_at()
+            if expires_at is not None and expires_at < valid_until:
+                valid_until = expires_at
+            if effect.condition:
+                conditional = True
+                
+        if conditional:
+            if CONDITIONAL_CACHE_TTL <= 0:
+                return
+            valid_until = min(valid_until, now + CONDITIONAL_CACHE_TTL)
+            
+        self.stat_cache.setdefault(char_id, {})[stat] = CacheEntry(
+            flat, multiplier, valid_until, conditional)
+        
+    def _apply_effects(self, character, base_value, stat_effects, stat, now):
+        """
+        Apply a stat's effects to its base value and cache their modifiers.
+        
+        Args:
+            character: The character the effects are on
+            base_value (float): The unmodified stat value
+            stat_effects (list): StatEffects on this stat
+            stat (str): The stat being calculated
+            now (float): Current time
+            
+        Returns:
+            int: The modified value
+        """
         # Get all active effects
         active_effects = [
-            e for e in self.db.effects[char_id][stat]
+            e for e in stat_effects
             if e.should_apply(character)
         ]
         
         # Sort by priority
         active_effects.sort(key=lambda e: e.priority)
         
-        # Apply flat modifiers first
-        value = base_value
-        for effect in active_effects:
-            if not effect.is_percentage:
-                value += effect.value
-                
-        # Then percentage modifiers
+        # Flat modifiers are added first, then percentage modifiers multiply
+        flat = 0
+        multiplier = 1.0
         for effect in active_effects:
             if effect.is_percentage:
-                value *= (1 + effect.value/100.0)
+                multiplier *= (1 + effect.value/100.0)
+            else:
+                flat += effect.value
                 
+        self._cache_stat(character.id, stat, flat, multiplier, stat_effects, now)
         # Convert to integer for combat stats
-        value = int(value)
-                
-        # Cache the result
-        if char_id not in self.db.stat_cache:
-            self.db.stat_cache[char_id] = {}
-        self.db.stat_cache[char_id][stat] = value
+        return apply_modifiers(base_value, flat, multiplier)
         
-        return value
+    def get_snapshot(self, character):
+        """
+        Resolve every stat for a character in one pass.
+        
+        Base values are read with a single attribute lookup, cached
+        modifiers are reused and the rest have their effects applied in
+        one sweep.
+        
+        Args:
+            character: The character to snapshot
+            
+        Returns:
+            StatSnapshot: Immutable snapshot of the character's stats
+        """
+        char_id = character.id
+        now = time.time()
+        char_effects = self.effects.get(char_id, {})
+        
+        keys = [f"base_{stat}" for stat in STAT_NAMES] + ["left_hand"]
+        # return_obj keeps a None in place of each missing attribute, so
+        # the results stay aligned with the keys
+        stored = [attr.value if attr else None for attr in
+                  character.attributes.get(keys, return_obj=True, return_list=True)]
+        
+        values = {}
+        for stat, base_value in zip(STAT_NAMES, stored):
+            if base_value is None:
+                # Not saved yet, fall back to the AttributeProperty default
+                base_value = getattr(character, f"base_{stat}", None)
+                if base_value is None:
+                    base_value = 1
+            cached = self._get_cached(char_id, stat, now)
+            if cached:
+                values[stat] = apply_modifiers(base_value, cached.flat, cached.multiplier)
+                continue
+            stat_effects = char_effects.get(stat)
+            if stat_effects:
+                values[stat] = self._apply_effects(character, base_value, stat_effects, stat, now)
+            else:
+                values[stat] = int(base_value)
+                
+        return make_stat_snapshot(values, has_shield=bool(stored[-1]))
         
     def _invalidate_cache(self, char_id, stat):
-        """Invalidate cached value for a stat."""
-        if char_id in self.db.stat_cache and stat in self.db.stat_cache[char_id]:
-            del self.db.stat_cache[char_id][stat]
+        """Invalidate cached modifiers for a stat."""
+        char_cache = self.stat_cache.get(char_id)
+        if char_cache and stat in char_cache:
+            del char_cache[stat]
             
     def clean_expired(self):
-        """Remove all expired effects."""
-        for char_id in self.db.effects:
-            for stat in self.db.effects[char_id]:
-                # Remove expired effects
-                original_len = len(self.db.effects[char_id][stat])
-                self.db.effects[char_id][stat] = [
-                    e for e in self.db.effects[char_id][stat]
-                    if not e.is_expired()
-                ]
-                # Invalidate cache if effects were removed
-                if len(self.db.effects[char_id][stat]) != original_len:
-                    self._invalidate_cache(char_id, stat)
+        """
+        Remove effects that have expired.
+        Only pops due entries from the expiry queue, so the cost depends on
+        the number of expiries rather than the total number of effects.
+        Effects removed early leave stale queue entries that are skipped here.
+        """
+        queue = self.expiry_queue
+        now = time.time()
+        while queue and queue[0][0] <= now:
+            _, _, char_id, effect = heapq.heappop(queue)
+            char_effects = self.effects.get(char_id)
+            if not char_effects:
+                continue
+            stat_effects = char_effects.get(effect.stat)
+            if not stat_effects or not any(e is effect for e in stat_effects):
+                continue
+            stat_effects.remove(effect)
+            if not stat_effects:
+                del char_effects[effect.stat]
+                if not char_effects:
+                    del self.effects[char_id]
+            self._invalidate_cache(char_id, effect.stat)
+            self._mark_dirty([effect])
                     
     def at_repeat(self):
         """Called every self.interval seconds."""
-        self.clean_expired()
\ No newline at end of file
+        self.clean_expired()
+        
+        # Checkpoint durable effects in one batch
+        if self.ndb.dirty and time.time() - (self.ndb.last_checkpoint or 0) >= CHECKPOINT_INTERVAL:
+            self.save_effects()
@@ -0,0 +1,139 @@
+"""
+Timer queue for short-lived, non-persistent game timers.
+
+Holds any number of deadlines in a single min-heap and keeps exactly one
+reactor callLater pending for the soonest of them, instead of running a
+ticking script per timer.
+"""
+import heapq
+import itertools
+import time
+from twisted.internet import reactor
+from evennia.utils.logger import log_trace
+
+class GameTimer:
+    """
+    A single deadline tracked by a TimerQueue.
+    Fires its expire() hook exactly once, unless cancelled first.
+    """
+    def __init__(self, duration, callback=None):
+        """
+        Initialize a timer.
+
+        Args:
+            duration (float): Seconds until the timer expires
+            callback (callable, optional): Called with the timer on expiry
+        """
+        self.start_time = time.time()
+        self.duration = duration
+        self.callback = callback
+        self.active = True
+        self.queue = None
+
+    @property
+    def deadline(self):
+        """Absolute time at which the timer expires."""
+        return self.start_time + self.duration
+
+    def extend_time(self, seconds):
+        """
+        Extend the timer by the given number of seconds.
+
+        Args:
+            seconds (float): Number of seconds to add
+        """
+        self.duration += seconds
+        if seconds < 0 and self.queue:
+            # The queued entry would fire late, so queue the earlier deadline too
+            self.queue.schedule(self)
+
+    def time_remaining(self):
+        """
+        Get the remaining time in seconds.
+
+        Returns:
+            float: Seconds remaining before expiry
+        """
+        return max(0, self.deadline - time.time())
+
+    def cancel(self):
+        """Stop the timer without firing it."""
+        self.active = False
+
+    def expire(self):
+        """Called once when the deadline is reached."""
+        self.active = False
+        if self.callback:
+            self.callback(self)
+
+class TimerQueue:
+    """
+    Min-heap of GameTimers driven by a single reactor callLater.
+
+    Cancelled and extended timers are handled lazily: their stale heap
+    entries are skipped or re-queued when they reach the top.
+    """
+    def __init__(self):
+        self._heap = []
+        self._counter = itertools.count()
+        self._call = None
+        self._call_time = None
+
+    def __len__(self):
+        return len(self._heap)
+
+    def schedule(self, timer):
+        """
+        Add a timer to the queue.
+
+        Args:
+            timer (GameTimer): The timer to schedule
+
+        Returns:
+            GameTimer: The scheduled timer
+        """
+        timer.queue = self
+        heapq.heappush(self._heap, (timer.deadline, next(self._counter), timer))
+        self._reschedule()
+        return timer
+
+    def clear(self):
+        """Cancel every queued timer and the pending reactor call."""
+        for _, _, timer in self._heap:
+            timer.cancel()
+        self._heap = []
+        if self._call and self._call.active():
+            self._call.cancel()
+        self._call = None
+        self._call_time = None
+
+    def _reschedule(self):
+        """Make sure a reactor call is pending for the soonest deadline."""
+        if not self._heap:
+            return
+        next_deadline = self._heap[0][0]
+        if self._call and self._call.active():
+            if self._call_time <= next_deadline:
+                return
+            self._call.cancel()
+        self._call_time = next_deadline
+        self._call = reactor.callLater(max(0, next_deadline - time.time()), self._fire)
+
+    def _fire(self):
+        """Expire every timer that is due, then wait for the next one."""
+        self._call = None
+        self._call_time = None
+        now = time.time()
+        while self._heap and self._heap[0][0] <= now:
+            _, _, timer = heapq.heappop(self._heap)
+            if not timer.active:
+                continue
+            if timer.deadline > now:
+                # Extended since it was queued
+                heapq.heappush(self._heap, (timer.deadline, next(self._counter), timer))
+                continue
+            try:
+                timer.expire()
+            except Exception:
+                log_trace("Error expiring timer")
+        self._reschedule()
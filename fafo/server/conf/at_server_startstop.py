@@ -38,9 +38,10 @@ def at_server_start():
                      persistent=True,
                      autostart=True)
                      
-    # Clean up any lingering roundtime scripts from previous shutdown
+    # Clean up roundtime and corpse scripts left over from before combat
+    # timers and corpse decay moved into the combat handler's in-memory queues
     from evennia.scripts.models import ScriptDB
-    for script_type in ["RoundtimeScript", "VulnerabilityScript"]:
+    for script_type in ["RoundtimeScript", "VulnerabilityScript", "CorpseScript"]:
         scripts = ScriptDB.objects.filter(db_typeclass_path__contains=script_type)
         for script in scripts:
             script.delete()
@@ -51,7 +52,13 @@ def at_server_stop():
     This is called just before the server is shut down, regardless
     of it is for a reload, reset or shutdown.
     """
-    pass
+    # Write out exit traversals still buffered in memory
+    from typeclasses.exits import flush_traversals
+    flush_traversals()
+    
+    # Flush the combat event log to disk
+    from scripts.combat_log import COMBAT_LOG
+    COMBAT_LOG.close()
 
 
 def at_server_reload_start():
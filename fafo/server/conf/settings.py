@@ -37,6 +37,10 @@ SERVERNAME = "fafo"
 # The next available block number for room groups
 NEXT_ROOM_BLOCK = 1
 
+# Seeds for named random streams (scripts/rng.py), e.g. {"combat": 1234}.
+# Streams not listed are seeded unpredictably.
+RNG_SEEDS = {}
+
 # Global scripts configuration
 GLOBAL_SCRIPTS = {
     "room_block_manager": {
@@ -57,7 +61,33 @@ GLOBAL_SCRIPTS = {
     "combat_handler": {
         "typeclass": "scripts.combat_handler.CombatHandler",
         "persistent": True,
+        "interval": 60,
         "desc": "Handles combat mechanics"
+    },
+    "npc_ai": {
+        "typeclass": "scripts.npc_ai.NPCAIScheduler",
+        "persistent": True,
+        "desc": "Drives hostile NPC actions"
+    },
+    "spawn_engine": {
+        "typeclass": "scripts.spawner.SpawnEngine",
+        "persistent": True,
+        "desc": "Keeps spawning regions populated"
+    },
+    "build_jobs": {
+        "typeclass": "scripts.build_jobs.BuildJobManager",
+        "persistent": True,
+        "desc": "Runs world-building jobs in the background"
+    },
+    "exit_graph": {
+        "typeclass": "scripts.exit_graph.ExitGraph",
+        "persistent": True,
+        "desc": "Room and exit graph for pathfinding"
+    },
+    "exit_sweeper": {
+        "typeclass": "scripts.exit_sweeper.ExitSweeper",
+        "persistent": True,
+        "desc": "Applies trail degradation in the background"
     }
 }
 
@@ -0,0 +1,142 @@
+"""
+Tests for bulk build planning.
+"""
+import random
+from unittest import TestCase
+from world.bulk_build import (BuildError, BuildPlan, DIRECTION_OFFSETS, OPPOSITES,
+                              direction_between, plan_grid, plan_maze)
+
+class FakeRoom:
+    def __init__(self, key):
+        self.key = key
+
+class FakeCoordMap:
+    """The parts of CoordMapScript the planners use, over a plain dict."""
+    def __init__(self):
+        self.coords = {}  # room -> (x, y, z)
+        self.index = {}  # (x, y, z) -> room
+
+    def add(self, key, coords):
+        room = FakeRoom(key)
+        self.coords[room] = coords
+        self.index[coords] = room
+        return room
+
+    def get_room_coords(self, room):
+        return self.coords.get(room)
+
+    def get_room_at_coords(self, x, y, z=0):
+        return self.index.get((x, y, z))
+
+    def neighbors(self, coords, vertical=False):
+        x, y, z = coords
+        found = {}
+        for direction, (dx, dy, dz) in DIRECTION_OFFSETS.items():
+            room = self.get_room_at_coords(x + dx, y + dy, z + dz)
+            if room:
+                found[direction] = room
+        return found
+
+class TestPlanGrid(TestCase):
+    def setUp(self):
+        self.coord_map = FakeCoordMap()
+        self.start = self.coord_map.add("start", (0, 0, 0))
+
+    def test_layout(self):
+        plan = plan_grid(self.coord_map, self.start, "east", 2, "north", 1, block_num=1)
+        self.assertEqual(plan.rooms, [(1, 0, 0), (2, 0, 0), (0, 1, 0), (1, 1, 0), (2, 1, 0)])
+        # Two links per row and three between the rows
+        self.assertEqual(len(plan.exits), 7)
+        source, destination, key, aliases, back_key, back_aliases = plan.exits[0]
+        self.assertIs(source, self.start)
+        self.assertEqual((destination, key, aliases, back_key, back_aliases),
+                         ((1, 0, 0), "east", ["e"], "west", ["w"]))
+
+    def test_short_directions(self):
+        plan = plan_grid(self.coord_map, self.start, "s", 1, "w", 1, block_num=1)
+        self.assertEqual(plan.rooms, [(0, -1, 0), (-1, 0, 0), (-1, -1, 0)])
+        self.assertEqual({(key, tuple(aliases), back_key) for _, _, key, aliases, back_key, _ in plan.exits},
+                         {("s", ("south",), "north"), ("w", ("west",), "east")})
+
+    def test_overlap(self):
+        self.coord_map.add("blocker", (2, 1, 0))
+        with self.assertRaises(BuildError):
+            plan_grid(self.coord_map, self.start, "east", 2, "north", 1, block_num=1)
+
+    def test_connect(self):
+        neighbor = self.coord_map.add("neighbor", (1, -1, 0))
+        plan = plan_grid(self.coord_map, self.start, "east", 1, "north", 1, block_num=1,
+                         connect=True)
+        links = [exit_plan for exit_plan in plan.exits if exit_plan[0] is neighbor]
+        self.assertEqual(links, [(neighbor, (1, 0, 0), "north", ["n"], "south", ["s"])])
+
+class TestConnectNeighbors(TestCase):
+    def setUp(self):
+        self.coord_map = FakeCoordMap()
+        self.west = self.coord_map.add("west", (-1, 0, 0))
+        self.northeast = self.coord_map.add("northeast", (1, 1, 0))
+
+    def test_cardinal_only(self):
+        plan = BuildPlan(1, exit_typeclass=object)
+        plan.add_room((0, 0, 0))
+        plan.connect_neighbors(self.coord_map, (0, 0, 0))
+        self.assertEqual(plan.exits, [(self.west, (0, 0, 0), "east", ["e"], "west", ["w"])])
+
+    def test_all_directions_and_exclude(self):
+        plan = BuildPlan(1, exit_typeclass=object)
+        plan.add_room((0, 0, 0))
+        plan.connect_neighbors(self.coord_map, (0, 0, 0), tuple(DIRECTION_OFFSETS),
+                               exclude={(-1, 0, 0)})
+        self.assertEqual(plan.exits, [(self.northeast, (0, 0, 0), "southwest", ["sw"],
+                                       "northeast", ["ne"])])
+
+class TestPlanMaze(TestCase):
+    def setUp(self):
+        self.coord_map = FakeCoordMap()
+        self.start = self.coord_map.add("start", (0, 0, 0))
+
+    def plan(self, number=30, seed=7, **kwargs):
+        return plan_maze(self.coord_map, self.start, "north", number, block_num=1,
+                         rng=random.Random(seed), **kwargs)
+
+    def test_layout(self):
+        plan = self.plan()
+        self.assertEqual(len(plan.rooms), 30)
+        self.assertEqual(len(set(plan.rooms)), 30)
+        self.assertEqual(plan.rooms[0], (0, 1, 0))
+        self.assertFalse(plan.stopped_early)
+        self.assertIs(plan.exits[0][0], self.start)
+        for source, destination, key, aliases, back_key, back_aliases in plan.exits[1:]:
+            # Every exit joins adjacent cells and points the right way
+            self.assertEqual(direction_between(source, destination), key)
+            self.assertEqual(back_key, OPPOSITES[key])
+            self.assertIn(destination, plan.planned)
+
+    def test_every_room_reachable(self):
+        plan = self.plan()
+        links = {}
+        for source, destination, *_ in plan.exits[1:]:
+            links.setdefault(source, set()).add(destination)
+            links.setdefault(destination, set()).add(source)
+        seen, queue = {plan.rooms[0]}, [plan.rooms[0]]
+        while queue:
+            for other in links.get(queue.pop(), ()):
+                if other not in seen:
+                    seen.add(other)
+                    queue.append(other)
+        self.assertEqual(seen, set(plan.rooms))
+
+    def test_seed_is_reproducible(self):
+        self.assertEqual(self.plan().exits[1:], self.plan().exits[1:])
+
+    def test_first_cell_taken(self):
+        self.coord_map.add("blocker", (0, 1, 0))
+        with self.assertRaises(BuildError):
+            self.plan()
+
+    def test_avoids_existing_rooms(self):
+        taken = {(x, y, 0) for x in range(-3, 4) for y in range(2, 5)}
+        for coords in taken:
+            self.coord_map.add("blocker", coords)
+        plan = self.plan(number=40)
+        self.assertFalse(taken & plan.planned)
@@ -0,0 +1,92 @@
+"""
+Tests for the pure combat rules and the matchup simulator.
+"""
+from unittest import TestCase, mock, skipIf
+from scripts import combat_core
+from scripts.combat_core import Combatant, calculate_damage, resolve_attack, simulate_matchup
+
+# Even attack and defense: a clean hit needs the attack roll to beat the
+# defense roll, which happens in 4950 of the 10000 roll pairs
+EVEN_HIT_RATE = 0.495
+
+class TestResolveAttack(TestCase):
+    def test_clean_hit(self):
+        self.assertEqual(resolve_attack(50, 40, 30, 35, 0), (True, False, 5))
+        self.assertEqual(calculate_damage(False, 0, 5), 5)
+
+    def test_tie_misses(self):
+        self.assertEqual(resolve_attack(50, 50, 20, 20, 0), (False, False, 0))
+
+    def test_power_hit(self):
+        # Power advantage turns a narrow miss into a power hit
+        self.assertEqual(resolve_attack(50, 50, 20, 24, 5), (True, True, -4))
+        self.assertEqual(calculate_damage(True, 5, -4), 5)
+
+    def test_power_miss(self):
+        self.assertEqual(resolve_attack(50, 50, 20, 25, 5), (False, False, -5))
+
+    def test_minimum_damage(self):
+        self.assertEqual(calculate_damage(False, 0, 0), 1)
+        self.assertEqual(calculate_damage(True, 0, -3), 1)
+
+class SimulateMatchupMixin:
+    """Checks shared by the NumPy and pure-Python simulation paths."""
+    swings = 20000
+    fights = 200
+
+    even = Combatant(attack=50, defense=50, power=10, health=100, finesse=0, weapon_speed=5)
+
+    def simulate(self, **kwargs):
+        kwargs.setdefault("swings", self.swings)
+        kwargs.setdefault("fights", self.fights)
+        kwargs.setdefault("seed", 1234)
+        return simulate_matchup(self.even, self.even, **kwargs)
+
+    def test_seed_is_reproducible(self):
+        self.assertEqual(self.simulate(), self.simulate())
+
+    def test_seed_changes_results(self):
+        self.assertNotEqual(self.simulate()["damage"]["histogram"],
+                            self.simulate(seed=4321)["damage"]["histogram"])
+
+    def test_even_matchup_rates(self):
+        report = self.simulate()
+        self.assertAlmostEqual(report["hit_rate"], EVEN_HIT_RATE, delta=0.02)
+        self.assertEqual(report["power_hit_rate"], 0)
+        # Half of the misses leave a finesse 0 attacker vulnerable
+        self.assertAlmostEqual(report["vulnerable_rate"], (1 - EVEN_HIT_RATE) / 2, delta=0.02)
+        damage = report["damage"]
+        self.assertEqual(sum(damage["histogram"].values()), round(report["hit_rate"] * self.swings))
+        self.assertLessEqual(damage["p10"], damage["p50"])
+        self.assertLessEqual(damage["p50"], damage["p90"])
+        self.assertLessEqual(damage["max"], 99)
+
+    def test_batches_do_not_change_totals(self):
+        report = self.simulate(batch_size=self.swings // 7)
+        self.assertAlmostEqual(report["hit_rate"], EVEN_HIT_RATE, delta=0.02)
+
+    def test_time_to_kill(self):
+        ttk = self.simulate()["time_to_kill"]
+        self.assertEqual(ttk["fights"], self.fights)
+        self.assertEqual(ttk["unfinished"], 0)
+        self.assertGreaterEqual(ttk["p50"], combat_core.BASE_ROUNDTIME)
+        self.assertLessEqual(ttk["p50"], ttk["p90"])
+
+    def test_unfinished_fights(self):
+        tank = self.even._replace(health=10 ** 9)
+        report = simulate_matchup(self.even, tank, swings=100, fights=5, seed=1,
+                                  max_swings_per_fight=10)
+        self.assertEqual(report["time_to_kill"]["unfinished"], 5)
+        self.assertIsNone(report["time_to_kill"]["mean"])
+
+@skipIf(combat_core.np is None, "NumPy is not installed")
+class TestSimulateMatchupNumpy(SimulateMatchupMixin, TestCase):
+    pass
+
+class TestSimulateMatchupPython(SimulateMatchupMixin, TestCase):
+    fights = 50
+
+    def setUp(self):
+        patcher = mock.patch.object(combat_core, "np", None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
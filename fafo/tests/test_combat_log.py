@@ -0,0 +1,138 @@
+"""
+Tests for the binary combat event log and its analysis tool.
+"""
+import glob
+import io
+import os
+import shutil
+import tempfile
+from contextlib import redirect_stdout
+from unittest import TestCase, mock
+from scripts import combat_log
+from scripts.combat_log import (FLAG_HIT, FLAG_KILL, FLAG_POWER_HIT, FLAG_VULNERABLE,
+                                CombatLog, iter_records, read_file, replay, summarize)
+
+def roll_info(attack_base=50, attack_roll=60, defense_base=40, defense_roll=30,
+              end_roll=None, power_diff=0, power_hit=False):
+    if end_roll is None:
+        end_roll = (attack_base + attack_roll) - (defense_base + defense_roll)
+    return {"attack_base": attack_base, "attack_roll": attack_roll,
+            "defense_base": defense_base, "defense_roll": defense_roll,
+            "end_roll": end_roll, "power_diff": power_diff, "power_hit": power_hit}
+
+class CombatLogTestCase(TestCase):
+    def setUp(self):
+        self.log_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.log_dir)
+
+    def make_log(self, records_per_file=100):
+        log = CombatLog(log_dir=self.log_dir, records_per_file=records_per_file)
+        self.addCleanup(log.close)
+        return log
+
+    def log_files(self):
+        return glob.glob(os.path.join(self.log_dir, combat_log.LOG_FILE_PATTERN))
+
+class TestCombatLog(CombatLogTestCase):
+    def test_round_trip(self):
+        log = self.make_log()
+        log.append(1, 2, roll_info(), True, damage=40, timestamp=1000.5)
+        log.append(2, 1, roll_info(attack_roll=1, defense_roll=100), False,
+                   def_reduction=30, vuln_time=2.5, timestamp=1001.0)
+        log.append(1, 2, roll_info(attack_roll=10, defense_roll=25, power_diff=7, power_hit=True),
+                   True, damage=7, killed=True, timestamp=1002.0)
+        log.close()
+
+        (path,) = self.log_files()
+        hit, miss, kill = read_file(path)
+        self.assertEqual((hit.time, hit.attacker_id, hit.defender_id), (1000.5, 1, 2))
+        self.assertEqual((hit.attack_base, hit.attack_roll, hit.defense_base, hit.defense_roll),
+                         (50, 60, 40, 30))
+        self.assertEqual((hit.end_roll, hit.flags, hit.damage), (40, FLAG_HIT, 40))
+        self.assertEqual(miss.flags, FLAG_VULNERABLE)
+        self.assertEqual((miss.def_reduction, miss.vuln_time), (30, 2.5))
+        self.assertEqual(kill.flags, FLAG_HIT | FLAG_POWER_HIT | FLAG_KILL)
+        self.assertEqual((kill.end_roll, kill.power_diff, kill.damage), (-5, 7, 7))
+
+    def test_values_are_clamped(self):
+        log = self.make_log()
+        log.append(1, 2, roll_info(attack_base=10 ** 6, attack_roll=300), True, damage=10 ** 6)
+        log.close()
+        (record,) = read_file(self.log_files()[0])
+        self.assertEqual((record.attack_base, record.attack_roll, record.damage), (32767, 255, 65535))
+
+    def test_open_file_is_readable(self):
+        # The header count is kept current, so a file can be read while
+        # it is still being written, e.g. after a crash
+        log = self.make_log()
+        for _ in range(3):
+            log.append(1, 2, roll_info(), True, damage=1)
+        self.assertEqual(len(read_file(self.log_files()[0])), 3)
+
+    def test_not_a_log(self):
+        path = os.path.join(self.log_dir, "combat-bogus.log")
+        with open(path, "wb") as f:
+            f.write(b"\0" * 64)
+        with self.assertRaises(ValueError):
+            read_file(path)
+
+    def test_rotation(self):
+        log = self.make_log(records_per_file=10)
+        with mock.patch.object(combat_log, "MAX_LOG_FILES", 3):
+            for index in range(45):
+                log.append(index, 0, roll_info(), True, damage=1, timestamp=1000 + index)
+        log.close()
+        self.assertEqual(len(self.log_files()), 3)
+        # The two oldest files were dropped; the rest read back in order
+        ids = [record.attacker_id for record in iter_records([self.log_dir])]
+        self.assertEqual(ids, list(range(20, 45)))
+
+class TestAnalysis(CombatLogTestCase):
+    def setUp(self):
+        super().setUp()
+        log = self.make_log()
+        log.append(1, 2, roll_info(), True, damage=40)
+        log.append(1, 2, roll_info(attack_roll=1, defense_roll=100), False,
+                   def_reduction=30, vuln_time=2.5)
+        log.append(2, 1, roll_info(attack_roll=10, defense_roll=25, power_diff=7, power_hit=True),
+                   True, damage=7, killed=True)
+        log.append(3, 4, roll_info(), True, damage=40)
+        log.close()
+
+    def test_summary(self):
+        totals = summarize(iter_records([self.log_dir]), by_attacker=True)
+        self.assertEqual(totals["all"]["swings"], 4)
+        self.assertEqual(totals["all"]["hits"], 3)
+        self.assertEqual(totals["all"]["damage"], 87)
+        self.assertEqual(totals[1], {"swings": 2, "hits": 1, "power_hits": 0, "vulnerable": 1,
+                                     "kills": 0, "damage": 40, "end_roll": -49})
+        self.assertEqual(totals[2]["power_hits"], 1)
+        self.assertEqual(totals[2]["kills"], 1)
+        self.assertNotIn(1, summarize(iter_records([self.log_dir])))
+
+    def test_replay_filters(self):
+        output = io.StringIO()
+        with redirect_stdout(output):
+            replay(iter_records([self.log_dir]), attacker_id=1, defender_id=2)
+        lines = output.getvalue().splitlines()
+        self.assertEqual(len(lines), 3)
+        self.assertIn("#1 -> #2", lines[0])
+        self.assertIn("hit for 40", lines[0])
+        self.assertIn("exposed -30% for 2.5s", lines[1])
+        self.assertIn("power hit for 7, kill", lines[2])
+
+    def test_replay_verify(self):
+        with redirect_stdout(io.StringIO()):
+            self.assertEqual(replay(iter_records([self.log_dir]), verify=True), 0)
+            # A swing the current rules would resolve differently
+            log = self.make_log()
+            log.append(5, 6, roll_info(), False)
+            log.close()
+            self.assertEqual(replay(iter_records([self.log_dir]), verify=True), 1)
+
+    def test_main(self):
+        output = io.StringIO()
+        with redirect_stdout(output):
+            self.assertEqual(combat_log.main(["summary", self.log_dir, "--by-attacker"]), 0)
+        self.assertIn("4 swings", output.getvalue())
+        self.assertIn("#3", output.getvalue())
@@ -0,0 +1,115 @@
+"""
+Tests for the exit graph and its path searches.
+"""
+from unittest import mock
+from evennia.utils.create import create_script
+from evennia.utils.test_resources import BaseEvenniaTest
+from scripts.exit_graph import ExitGraph
+
+# Room ids for the synthetic graphs, well clear of the test rooms
+GRID_SIZE = 5
+LINE_LENGTH = 100
+
+def grid_id(x, y):
+    return 10000 + y * GRID_SIZE + x
+
+class TestExitGraph(BaseEvenniaTest):
+    def setUp(self):
+        super().setUp()
+        self.graph = create_script(ExitGraph, key="test_exit_graph")
+        self.coords = {}
+        patcher = mock.patch.object(self.graph, "_coords", return_value=self.coords)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        self.graph.delete()
+        super().tearDown()
+
+    def load(self, links):
+        """Replace the graph with (source id, destination id) links, one exit each."""
+        edges, exit_index = {}, {}
+        for exit_id, (source_id, dest_id) in enumerate(links, start=50000):
+            edges.setdefault(source_id, {})[exit_id] = dest_id
+            exit_index[exit_id] = source_id
+        self.graph.ndb.edges = edges
+        self.graph.ndb.exit_index = exit_index
+
+    def load_grid(self, blocked=()):
+        """A grid with two-way exits between orthogonal neighbors."""
+        links = []
+        for y in range(GRID_SIZE):
+            for x in range(GRID_SIZE):
+                if (x, y) in blocked:
+                    continue
+                self.coords[grid_id(x, y)] = (x, y, 0)
+                for nx, ny in ((x + 1, y), (x, y + 1)):
+                    if nx < GRID_SIZE and ny < GRID_SIZE and (nx, ny) not in blocked:
+                        links.append((grid_id(x, y), grid_id(nx, ny)))
+                        links.append((grid_id(nx, ny), grid_id(x, y)))
+        self.load(links)
+
+    def walk(self, start_id, path):
+        """Follow a list of exit ids and return the room it ends in."""
+        room_id = start_id
+        for exit_id in path:
+            self.assertEqual(self.graph.ndb.exit_index[exit_id], room_id)
+            room_id = self.graph.edges[room_id][exit_id]
+        return room_id
+
+    def test_shortest_path(self):
+        self.load_grid()
+        start, goal = grid_id(0, 0), grid_id(4, 3)
+        path = self.graph.find_path(start, goal)
+        self.assertEqual(len(path), 7)
+        self.assertEqual(self.walk(start, path), goal)
+
+    def test_path_around_wall(self):
+        # A wall down the middle with a gap at the top
+        self.load_grid(blocked={(2, 0), (2, 1), (2, 2), (2, 3)})
+        start, goal = grid_id(0, 0), grid_id(4, 0)
+        path = self.graph.find_path(start, goal)
+        self.assertEqual(len(path), 12)
+        self.assertEqual(self.walk(start, path), goal)
+
+    def test_path_without_coordinates(self):
+        self.load([(1, 2), (2, 3), (1, 4), (4, 5), (5, 3)])
+        self.assertEqual(len(self.graph.find_path(1, 3)), 2)
+
+    def test_same_room(self):
+        self.load_grid()
+        self.assertEqual(self.graph.find_path(grid_id(1, 1), grid_id(1, 1)), [])
+
+    def test_one_way_exits(self):
+        self.load([(1, 2), (2, 3)])
+        self.assertEqual(len(self.graph.find_path(1, 3)), 2)
+        self.assertIsNone(self.graph.find_path(3, 1))
+
+    def test_node_cap(self):
+        self.load([(room_id, room_id + 1) for room_id in range(1, LINE_LENGTH)])
+        self.assertIsNone(self.graph.find_path(1, LINE_LENGTH, max_nodes=10))
+        self.assertEqual(len(self.graph.find_path(1, LINE_LENGTH)), LINE_LENGTH - 1)
+
+    def test_exit_filter(self):
+        self.load([(1, 2), (2, 3), (1, 4), (4, 5), (5, 3)])
+        locked = self.graph.find_path(1, 3)[0]
+        path = self.graph.find_path(1, 3, exit_filter=lambda exit_id: exit_id != locked)
+        self.assertEqual(len(path), 3)
+        self.assertNotIn(locked, path)
+        self.assertIsNone(self.graph.find_path(1, 3, exit_filter=lambda exit_id: False))
+
+    def test_reachable(self):
+        self.load([(1, 2), (2, 3), (3, 1), (4, 1)])
+        self.assertEqual(self.graph.reachable(1), {1, 2, 3})
+        self.assertEqual(self.graph.reachable(4), {1, 2, 3, 4})
+        self.assertEqual(len(self.graph.reachable(4, limit=2)), 2)
+        self.assertEqual(self.graph.unreachable(1, [2, 3, 4, 5]), {4, 5})
+
+    def test_rebuild_and_updates(self):
+        self.graph.rebuild()
+        self.assertEqual(self.graph.edges[self.room1.id][self.exit.id], self.room2.id)
+        self.graph.remove_exit(self.exit)
+        self.assertNotIn(self.room1.id, self.graph.edges)
+        self.assertIsNone(self.graph.find_path(self.room1.id, self.room2.id))
+        self.graph.add_exit(self.exit)
+        self.assertEqual(self.graph.find_path(self.room1.id, self.room2.id), [self.exit.id])
@@ -0,0 +1,57 @@
+"""
+Tests for reviving recycled hostiles.
+"""
+from unittest import mock
+from evennia.utils.create import create_object, create_script
+from evennia.utils.test_resources import BaseEvenniaTest
+from scripts.stat_handler import StatEffect, StatEffectHandler
+from typeclasses import hostiles
+from typeclasses.hostiles import Hostile
+
+class TestRevive(BaseEvenniaTest):
+    def setUp(self):
+        super().setUp()
+        self.effect_handler = create_script(StatEffectHandler, key="test_stat_effect_handler")
+        self.addCleanup(self.effect_handler.delete)
+        patcher = mock.patch.object(hostiles, "GLOBAL_SCRIPTS", mock.Mock(
+            combat_handler=None, stat_effect_handler=self.effect_handler))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        troll_attrs = {"base_power": 40, "max_health": 300, "regenerates": True}
+        self.hostile = create_object(Hostile, key="cave troll", location=self.room1,
+                                     attributes=list(troll_attrs.items())
+                                     + [("spawn_attrs", list(troll_attrs))])
+        self.hostile.wounds["head"].append("gash")
+        self.hostile.current_health = 0
+        self.hostile.db.corpse = True
+        self.hostile.location = None
+
+    def test_revive_as_other_entry(self):
+        self.hostile.revive("giant rat", self.room2, attrs={"base_agility": 12, "max_health": 20})
+        self.assertEqual(self.hostile.key, "giant rat")
+        self.assertEqual(self.hostile.location, self.room2)
+        self.assertTrue(self.hostile.is_alive())
+        # Nothing carries over from the troll
+        self.assertEqual(self.hostile.base_power, 1)
+        self.assertIsNone(self.hostile.db.regenerates)
+        self.assertEqual(self.hostile.wounds["head"], [])
+        # The rat's own attrs are applied
+        self.assertEqual(self.hostile.base_agility, 12)
+        self.assertEqual(self.hostile.max_health, 20)
+        self.assertEqual(self.hostile.current_health, 20)
+        self.assertEqual(sorted(self.hostile.db.spawn_attrs), ["base_agility", "max_health"])
+
+    def test_revive_clears_effects(self):
+        self.effect_handler.add_effect(self.hostile, StatEffect("power", 25, source="frenzy"))
+        self.assertEqual(self.effect_handler.calculate_stat(self.hostile, "power"), 65)
+        self.hostile.revive("giant rat", self.room2)
+        self.assertEqual(self.effect_handler.get_effects(self.hostile), {})
+        self.assertNotIn(self.hostile.id, self.effect_handler.stat_cache)
+        self.assertEqual(self.effect_handler.calculate_stat(self.hostile, "power"), 1)
+
+    def test_revive_without_attrs(self):
+        self.hostile.revive("cave troll", self.room1)
+        self.assertEqual(self.hostile.base_power, 1)
+        self.assertEqual(self.hostile.max_health, 100)
+        self.assertEqual(self.hostile.current_health, 100)
+        self.assertEqual(self.hostile.db.spawn_attrs, [])
@@ -0,0 +1,55 @@
+"""
+Tests for batched stat snapshots.
+"""
+from evennia.utils.create import create_script
+from evennia.utils.test_resources import BaseEvenniaTest
+from scripts.stat_handler import STAT_NAMES, StatEffect, StatEffectHandler
+from typeclasses.characters import Character
+
+class TestStatSnapshot(BaseEvenniaTest):
+    character_typeclass = Character
+
+    def setUp(self):
+        super().setUp()
+        self.handler = create_script(StatEffectHandler, key="test_stat_effect_handler")
+        self.base = {stat: index + 2 for index, stat in enumerate(STAT_NAMES)}
+        for stat, value in self.base.items():
+            self.char1.attributes.add(f"base_{stat}", value)
+        self.char1.attributes.add("left_hand", self.obj1)
+
+    def tearDown(self):
+        self.handler.delete()
+        super().tearDown()
+
+    def test_snapshot_matches_base_stats(self):
+        snapshot = self.handler.get_snapshot(self.char1)
+        for stat, value in self.base.items():
+            self.assertEqual(getattr(snapshot, stat), value)
+        self.assertEqual(snapshot.defense,
+                         self.base["agility"] + self.base["speed"] + self.base["shields"])
+
+    def test_missing_base_stat(self):
+        # A missing attribute must not shift the later stats or the shield
+        self.char1.attributes.remove("base_agility")
+        snapshot = self.handler.get_snapshot(self.char1)
+        self.assertEqual(snapshot.agility, 1)
+        for stat, value in self.base.items():
+            if stat != "agility":
+                self.assertEqual(getattr(snapshot, stat), value)
+        self.assertEqual(snapshot.defense, 1 + self.base["speed"] + self.base["shields"])
+
+    def test_missing_shield(self):
+        self.char1.attributes.remove("left_hand")
+        snapshot = self.handler.get_snapshot(self.char1)
+        self.assertEqual(snapshot.defense, self.base["agility"] + self.base["speed"])
+
+    def test_base_change_with_cached_effects(self):
+        # Permanent effects are cached indefinitely; the base value must
+        # still be read fresh
+        self.handler.add_effect(self.char1, StatEffect("power", 5, source="ring"))
+        self.handler.add_effect(self.char1, StatEffect("power", 50, is_percentage=True, source="rage"))
+        base = self.base["power"]
+        self.assertEqual(self.handler.calculate_stat(self.char1, "power"), int((base + 5) * 1.5))
+        self.char1.attributes.add("base_power", 20)
+        self.assertEqual(self.handler.calculate_stat(self.char1, "power"), int((20 + 5) * 1.5))
+        self.assertEqual(self.handler.get_snapshot(self.char1).power, int((20 + 5) * 1.5))
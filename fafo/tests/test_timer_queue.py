@@ -0,0 +1,93 @@
+"""
+Tests for the timer queue.
+
+Run with `evennia test --settings settings.py tests` from the game directory.
+"""
+from unittest import TestCase, mock
+from twisted.internet.task import Clock
+from scripts import timer_queue
+from scripts.timer_queue import GameTimer, TimerQueue
+
+class TestTimerQueue(TestCase):
+    def setUp(self):
+        # Drive the queue from a fake reactor and clock
+        self.clock = Clock()
+        self.clock.advance(1000)
+        fake_time = mock.Mock(time=self.clock.seconds)
+        patchers = [mock.patch.object(timer_queue, "reactor", self.clock),
+                    mock.patch.object(timer_queue, "time", fake_time)]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.queue = TimerQueue()
+        self.fired = []
+
+    def make_timer(self, name, duration):
+        return self.queue.schedule(GameTimer(duration, callback=lambda timer: self.fired.append(name)))
+
+    def test_fires_once(self):
+        timer = self.make_timer("a", 5)
+        self.clock.advance(4)
+        self.assertEqual(self.fired, [])
+        self.assertTrue(timer.active)
+        self.clock.advance(1)
+        self.assertEqual(self.fired, ["a"])
+        self.assertFalse(timer.active)
+        self.clock.advance(10)
+        self.assertEqual(self.fired, ["a"])
+        self.assertEqual(len(self.queue), 0)
+
+    def test_fire_order(self):
+        self.make_timer("slow", 3)
+        self.make_timer("fast", 1)
+        self.make_timer("middle", 2)
+        self.make_timer("tied", 2)
+        self.clock.advance(5)
+        self.assertEqual(self.fired, ["fast", "middle", "tied", "slow"])
+
+    def test_single_pending_call(self):
+        for duration in (5, 3, 4, 1):
+            self.make_timer(duration, duration)
+        self.assertEqual(len(self.clock.getDelayedCalls()), 1)
+
+    def test_extend(self):
+        timer = self.make_timer("a", 2)
+        timer.extend_time(3)
+        self.clock.advance(2)
+        self.assertEqual(self.fired, [])
+        self.assertAlmostEqual(timer.time_remaining(), 3)
+        self.clock.advance(3)
+        self.assertEqual(self.fired, ["a"])
+
+    def test_shorten(self):
+        timer = self.make_timer("a", 5)
+        timer.extend_time(-4)
+        self.clock.advance(1)
+        self.assertEqual(self.fired, ["a"])
+        self.clock.advance(5)
+        self.assertEqual(self.fired, ["a"])
+
+    def test_cancel(self):
+        timer = self.make_timer("a", 1)
+        self.make_timer("b", 2)
+        timer.cancel()
+        self.clock.advance(3)
+        self.assertEqual(self.fired, ["b"])
+
+    def test_clear(self):
+        timer = self.make_timer("a", 1)
+        self.queue.clear()
+        self.assertFalse(timer.active)
+        self.assertEqual(self.clock.getDelayedCalls(), [])
+        self.clock.advance(2)
+        self.assertEqual(self.fired, [])
+
+    def test_callback_error_does_not_stop_queue(self):
+        def explode(timer):
+            raise RuntimeError("boom")
+        self.queue.schedule(GameTimer(1, callback=explode))
+        self.make_timer("b", 2)
+        with mock.patch.object(timer_queue, "log_trace") as log_trace:
+            self.clock.advance(3)
+        log_trace.assert_called_once()
+        self.assertEqual(self.fired, ["b"])
@@ -9,7 +9,8 @@ creation commands.
 from evennia.objects.objects import DefaultCharacter
 from evennia.typeclasses.attributes import AttributeProperty
 from evennia import GLOBAL_SCRIPTS
-import random
+from scripts.stat_handler import STAT_NAMES, make_stat_snapshot
+from scripts.rng import get_stream
 from .objects import ObjectParent
 
 # Valid body parts for targeting and wounds
@@ -78,6 +79,7 @@ class Character(ObjectParent, DefaultCharacter):
     
     # Combat attributes
     _aim = AttributeProperty(default=None, autocreate=True)  # Currently aimed body part
+    combat_verbosity = AttributeProperty(default="brief", autocreate=False)  # How much of others' fights to show
     
     @property
     def aim(self):
@@ -131,6 +133,19 @@ class Character(ObjectParent, DefaultCharacter):
             return effect_handler.calculate_stat(self, skill)  # Skills use same effect system
         return getattr(self, skill)
 
+    def get_stat_snapshot(self):
+        """
+        Get all modified stats at once.
+        
+        Returns:
+            StatSnapshot: Immutable snapshot of every stat plus attack and defense
+        """
+        effect_handler = GLOBAL_SCRIPTS.stat_effect_handler
+        if effect_handler:
+            return effect_handler.get_snapshot(self)
+        values = {stat: getattr(self, f"base_{stat}") for stat in STAT_NAMES}
+        return make_stat_snapshot(values, has_shield=bool(self.left_hand))
+
     @property
     def attack(self):
         """Calculate attack value from modified agility and speed."""
@@ -232,20 +247,17 @@ class Character(ObjectParent, DefaultCharacter):
 
     def cleanup_vulnerability(self):
         """Clean up any vulnerability timers and restore normal defense calculation."""
-        vulnerability_scripts = self.scripts.get("vulnerability_script")
-        if vulnerability_scripts:
-            for script in vulnerability_scripts:
-                self.msg("You manage to recover your guard.")
-                script.stop()
+        combat = GLOBAL_SCRIPTS.combat_handler
+        if combat and combat.clear_timer(self, "vulnerability"):
+            self.msg("You manage to recover your guard.")
         self.db.vulnerability = None
         
     def cleanup_timers(self):
-        """Clean up any timer scripts attached to this character."""
+        """Clean up any combat timers tracked for this character."""
         # Clean up roundtime
-        roundtime_scripts = self.scripts.get("roundtime_script")
-        if roundtime_scripts:
-            for script in roundtime_scripts:
-                script.stop()
+        combat = GLOBAL_SCRIPTS.combat_handler
+        if combat:
+            combat.clear_timer(self, "roundtime")
         self.db.roundtime = None
         
         # Clean up vulnerability with proper messaging
@@ -266,32 +278,13 @@ class Character(ObjectParent, DefaultCharacter):
         Returns:
             dict: All character stats including core and combat stats
         """
-        return {
-            # Core stats
-            "power": self.power,
-            "agility": self.agility,
-            "speed": self.speed,
-            "vitality": self.vitality,
-            "resistance": self.resistance,
-            "focus": self.focus,
-            "discipline": self.discipline,
-            "intelligence": self.intelligence,
-            "wisdom": self.wisdom,
-            "charisma": self.charisma,
-            # Combat stats
-            "attack": self.attack,
-            "defense": self.defense,
+        stats = self.get_stat_snapshot()._asdict()
+        stats.update({
             "current_health": self.current_health,
             "max_health": self.max_health,
             "experience": self.experience,
-            # Skills
-            "weapons": self.weapons,
-            "shields": self.shields,
-            "armor": self.armor,
-            "physical_fitness": self.physical_fitness,
-            "combat_prowess": self.combat_prowess,
-            "evasive_maneuvers": self.evasive_maneuvers
-        }
+        })
+        return stats
 
     def add_wound(self, location, wound_desc):
         """
@@ -315,7 +308,7 @@ class Character(ObjectParent, DefaultCharacter):
         if location in self.wounds and wound_desc in self.wounds[location]:
             self.wounds[location].remove(wound_desc)
             # 50% chance to leave a scar
-            if random.random() < 0.5:
+            if get_stream("wounds").random() < 0.5:
                 scar_desc = f"Scar from: {wound_desc}"
                 self.scars[location].append(scar_desc)
 
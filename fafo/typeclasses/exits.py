@@ -6,15 +6,160 @@ set and has a single command defined on itself with the same name as its key,
 for allowing Characters to traverse the exit to its destination.
 
 """
+import bisect
 import json
 import os
-import random
+import time
 from evennia.objects.objects import DefaultExit
-from evennia.utils import lazy_property
+from django.db import transaction
 from django.utils import timezone
 from .objects import ObjectParent
+from .scripts import COMPASS_SHORT_FORMS
+from scripts.rng import get_stream
 from evennia import GLOBAL_SCRIPTS
 
+# Wear level settings shared by every DegradingExit
+EXIT_SETTINGS_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'world', 'exits.json')
+
+# Used when the settings file is missing or broken
+DEFAULT_EXIT_SETTINGS = {
+    "degradation_rate": 1,
+    "wear_levels": {
+        "0": {"patterns": ["a faint trail to the {direction}"]}
+    }
+}
+
+# Seconds between checks of the settings file for changes
+EXIT_SETTINGS_CHECK_INTERVAL = 5
+
+class ExitSettings:
+    """
+    Parsed exit settings, with wear level thresholds sorted once so
+    the level for a traverse count can be found by bisection.
+    """
+    def __init__(self, data):
+        """
+        Args:
+            data (dict): Settings as loaded from exits.json
+        """
+        self.data = data
+        self.degradation_rate = data['degradation_rate']
+        levels = sorted((int(threshold), level['patterns'])
+                        for threshold, level in data['wear_levels'].items())
+        self.thresholds = [threshold for threshold, _ in levels]
+        self.patterns = [patterns for _, patterns in levels]
+
+    def level_for(self, count):
+        """
+        Get the index of the highest wear level reached.
+        
+        Args:
+            count (int): The exit's traverse count
+            
+        Returns:
+            int: Index into the sorted wear levels
+        """
+        return max(0, bisect.bisect_right(self.thresholds, count) - 1)
+
+    def patterns_for(self, count):
+        """
+        Get the name patterns for the highest wear level reached.
+        
+        Args:
+            count (int): The exit's traverse count
+            
+        Returns:
+            list: Name patterns with a {direction} placeholder
+        """
+        return self.patterns[self.level_for(count)]
+
+_exit_settings = None
+_exit_settings_mtime = None
+_exit_settings_checked = 0
+
+def get_exit_settings():
+    """
+    Get the shared exit settings, reparsing exits.json only when its
+    modification time changes.
+    
+    Returns:
+        ExitSettings: The current settings
+    """
+    global _exit_settings, _exit_settings_mtime, _exit_settings_checked
+    now = time.time()
+    if _exit_settings is not None and now - _exit_settings_checked < EXIT_SETTINGS_CHECK_INTERVAL:
+        return _exit_settings
+    _exit_settings_checked = now
+    
+    try:
+        mtime = os.path.getmtime(EXIT_SETTINGS_PATH)
+    except OSError:
+        mtime = None
+    if _exit_settings is not None and mtime == _exit_settings_mtime:
+        return _exit_settings
+        
+    try:
+        with open(EXIT_SETTINGS_PATH, 'r') as f:
+            _exit_settings = ExitSettings(json.load(f))
+    except (OSError, ValueError, KeyError, TypeError):
+        _exit_settings = ExitSettings(DEFAULT_EXIT_SETTINGS)
+    _exit_settings_mtime = mtime
+    return _exit_settings
+
+# Long and short compass direction names, mapped to the long name
+DIRECTION_NAMES = {
+    **{direction: direction for direction in COMPASS_SHORT_FORMS},
+    **{short: direction for direction, short in COMPASS_SHORT_FORMS.items()},
+}
+
+def exit_direction(exit_obj):
+    """
+    Get the compass direction an exit leads in, from its original name,
+    key or aliases. Degraded exit names like "a faint trail to the north"
+    keep their direction through the base name.
+    
+    Args:
+        exit_obj (Object): The exit
+        
+    Returns:
+        str or None: Long direction name, or None for non-compass exits
+    """
+    names = [exit_obj.attributes.get("base_name"), exit_obj.key]
+    names.extend(exit_obj.aliases.all())
+    for name in names:
+        direction = DIRECTION_NAMES.get(name.lower()) if name else None
+        if direction:
+            return direction
+    return None
+
+# Degrading exits with traversals not yet written to the database, by id
+_pending_traversals = {}
+
+def flush_traversals():
+    """
+    Write every exit's buffered traversals to the database in one
+    transaction.
+    
+    Returns:
+        int: Number of exits written
+    """
+    exits = list(_pending_traversals.values())
+    _pending_traversals.clear()
+    written = 0
+    with transaction.atomic():
+        for exit_obj in exits:
+            pending = exit_obj.ndb.pending_traversals
+            if not pending or not exit_obj.pk:
+                continue
+            exit_obj.attributes.batch_add(
+                ("traverse_count", (exit_obj.db.traverse_count or 0) + pending),
+                ("last_traverse", exit_obj.ndb.last_traverse))
+            exit_obj.ndb.pending_traversals = 0
+            exit_obj.ndb.last_traverse = None
+            written += 1
+    return written
+
 def are_coords_adjacent(coord1, coord2):
     """
     Check if two sets of coordinates are exactly one step apart.
@@ -58,6 +203,27 @@ class Exit(ObjectParent, DefaultExit):
     Handles basic coordinate validation but no visibility/degradation.
     """
     
+    def at_object_creation(self):
+        """Add the new exit to the exit graph and its room's direction index."""
+        super().at_object_creation()
+        graph = GLOBAL_SCRIPTS.exit_graph
+        if graph:
+            graph.add_exit(self)
+        self._reset_room_index()
+            
+    def at_object_delete(self):
+        """Drop the exit from the exit graph and direction index before it is deleted."""
+        graph = GLOBAL_SCRIPTS.exit_graph
+        if graph:
+            graph.remove_exit(self)
+        self._reset_room_index()
+        return super().at_object_delete()
+
+    def _reset_room_index(self):
+        """Make the exit's room rebuild its direction index on next use."""
+        if self.location and hasattr(self.location, "reset_exit_index"):
+            self.location.reset_exit_index()
+    
     def at_traverse(self, traversing_object, target_location, **kwargs):
         """
         Called when an object traverses this exit.
@@ -112,20 +278,10 @@ class DegradingExit(Exit):
     how well-traveled the path is.
     """
     
-    @lazy_property
+    @property
     def exit_settings(self):
-        """Load exit settings from JSON file."""
-        settings_path = os.path.join('world', 'exits.json')
-        try:
-            with open(settings_path, 'r') as f:
-                return json.load(f)
-        except (FileNotFoundError, json.JSONDecodeError):
-            return {
-                "degradation_rate": 1,
-                "wear_levels": {
-                    "0": {"patterns": ["a faint trail to the {direction}"]}
-                }
-            }
+        """Exit settings as loaded from world/exits.json, shared by all exits."""
+        return get_exit_settings().data
 
     def at_object_creation(self):
         """Called when exit is first created."""
@@ -140,35 +296,50 @@ class DegradingExit(Exit):
         # Set initial exit name
         self.update_wear_level()
 
+    def wear_level_name(self, count):
+        """
+        Pick a display name for the wear level reached by a traverse count.
+        
+        Args:
+            count (int): The traverse count
+            
+        Returns:
+            str: A random pattern of that wear level, formatted with the direction
+        """
+        # Get patterns for the highest threshold reached by the count
+        patterns = get_exit_settings().patterns_for(count)
+        return get_stream("exits").choice(patterns).format(direction=self.db.base_name)
+
+    @property
+    def traverse_count(self):
+        """Traverse count including traversals not yet written to the database."""
+        return (self.db.traverse_count or 0) + (self.ndb.pending_traversals or 0)
+
     def update_wear_level(self):
         """Update the exit's display name based on current traverse count."""
-        count = self.db.traverse_count
-        direction = self.db.base_name
-        wear_levels = self.exit_settings['wear_levels']
-        
-        # Find the highest threshold that's less than or equal to current count
-        current_level = "0"
-        for threshold in sorted(map(int, wear_levels.keys())):
-            if count >= threshold:
-                current_level = str(threshold)
-            else:
-                break
-                
-        # Get patterns for current wear level
-        level_data = wear_levels[current_level]
-        patterns = level_data['patterns']
+        self.key = self.wear_level_name(self.traverse_count)
+
+    def degradation_due(self, now):
+        """
+        Work out how much the traverse count has decayed since the exit
+        was last used or degraded.
         
-        # Randomly select a pattern and format with direction
-        self.key = random.choice(patterns).format(direction=direction)
+        Args:
+            now (datetime): The current time
+            
+        Returns:
+            int: Traverse count points to remove
+        """
+        last_traverse = self.ndb.last_traverse or self.db.last_traverse
+        if not last_traverse:
+            return 0
+        hours_passed = (now - last_traverse).total_seconds() / 3600
+        return int(hours_passed * get_exit_settings().degradation_rate)
 
     def update_degradation(self):
         """Calculate and apply degradation based on time since last traverse."""
-        if not self.db.last_traverse:
-            return
-            
         now = timezone.now()
-        hours_passed = (now - self.db.last_traverse).total_seconds() / 3600
-        degradation = int(hours_passed * self.exit_settings['degradation_rate'])
+        degradation = self.degradation_due(now)
         
         if degradation > 0:
             self.db.traverse_count = max(0, self.db.traverse_count - degradation)
@@ -186,16 +357,20 @@ class DegradingExit(Exit):
         if not super().at_traverse(traversing_object, target_location, **kwargs):
             return False
             
-        # Update degradation before incrementing count
-        self.update_degradation()
+        # Degradation is applied by the exit sweeper, and traversals are
+        # counted in memory until the sweeper flushes them
+        wear_settings = get_exit_settings()
+        old_level = wear_settings.level_for(self.traverse_count)
+        self.ndb.pending_traversals = (self.ndb.pending_traversals or 0) + 1
+        self.ndb.last_traverse = timezone.now()
+        _pending_traversals[self.id] = self
         
-        # Increment traverse count and update timestamp
-        self.db.traverse_count += 1
-        self.db.last_traverse = timezone.now()
-        self.db.hidden = False  # Exit becomes visible after use
+        if self.db.hidden:
+            self.db.hidden = False  # Exit becomes visible after use
         
-        # Update exit name based on new count
-        self.update_wear_level()
+        # Only rename when the count crosses into another wear level
+        if wear_settings.level_for(self.traverse_count) != old_level:
+            self.update_wear_level()
         
         return True
 
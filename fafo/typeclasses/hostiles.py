@@ -7,8 +7,22 @@ This module contains various monster types and base classes.
 from evennia.objects.objects import DefaultCharacter
 from evennia.typeclasses.attributes import AttributeProperty
 from evennia import GLOBAL_SCRIPTS
+from scripts.stat_handler import STAT_NAMES, make_stat_snapshot
+from scripts.rng import get_stream
 from .objects import ObjectParent
-import random
+
+def attribute_property_names(cls):
+    """
+    Get the names of every AttributeProperty a typeclass defines or inherits.
+
+    Args:
+        cls (type): The typeclass
+
+    Returns:
+        set: Attribute names
+    """
+    return {name for klass in cls.__mro__ for name, value in vars(klass).items()
+            if isinstance(value, AttributeProperty)}
 
 class Hostile(ObjectParent, DefaultCharacter):
     """
@@ -73,6 +87,9 @@ class Hostile(ObjectParent, DefaultCharacter):
     current_health = AttributeProperty(default=100, autocreate=True)
     experience = AttributeProperty(default=1, autocreate=True)
 
+    # Whether the hostile attacks players on sight, not only when attacked
+    aggressive = AttributeProperty(default=False, autocreate=True)
+
     def get_modified_stat(self, stat):
         """
         Get a stat's value after all effects are applied.
@@ -104,6 +121,19 @@ class Hostile(ObjectParent, DefaultCharacter):
             return effect_handler.calculate_stat(self, skill)  # Skills use same effect system
         return getattr(self, skill)
 
+    def get_stat_snapshot(self):
+        """
+        Get all modified stats at once.
+        
+        Returns:
+            StatSnapshot: Immutable snapshot of every stat plus attack and defense
+        """
+        effect_handler = GLOBAL_SCRIPTS.stat_effect_handler
+        if effect_handler:
+            return effect_handler.get_snapshot(self)
+        values = {stat: getattr(self, f"base_{stat}") for stat in STAT_NAMES}
+        return make_stat_snapshot(values, has_shield=bool(self.left_hand))
+
     @property
     def attack(self):
         """Calculate attack value from modified agility and speed."""
@@ -217,20 +247,18 @@ class Hostile(ObjectParent, DefaultCharacter):
 
     def cleanup_vulnerability(self):
         """Clean up any vulnerability timers and restore normal defense calculation."""
-        vulnerability_scripts = self.scripts.get("vulnerability_script")
-        if vulnerability_scripts:
-            for script in vulnerability_scripts:
-                # No msg() call since hostiles don't need messages
-                script.stop()
+        combat = GLOBAL_SCRIPTS.combat_handler
+        if combat:
+            # No msg() call since hostiles don't need messages
+            combat.clear_timer(self, "vulnerability")
         self.db.vulnerability = None
         
     def cleanup_timers(self):
-        """Clean up any timer scripts attached to this hostile."""
+        """Clean up any combat timers tracked for this hostile."""
         # Clean up roundtime
-        roundtime_scripts = self.scripts.get("roundtime_script")
-        if roundtime_scripts:
-            for script in roundtime_scripts:
-                script.stop()
+        combat = GLOBAL_SCRIPTS.combat_handler
+        if combat:
+            combat.clear_timer(self, "roundtime")
         self.db.roundtime = None
         
         # Clean up vulnerability
@@ -244,6 +272,42 @@ class Hostile(ObjectParent, DefaultCharacter):
         """Called at server shutdown."""
         self.cleanup_timers()
 
+    def revive(self, key, location, attrs=None):
+        """
+        Bring a recycled corpse back as a fresh hostile.
+        
+        Args:
+            key (str): Name for the revived hostile
+            location (Object): Room to place it in
+            attrs (dict, optional): Attributes to set, as for a new spawn
+        """
+        self.cleanup_timers()
+        combat = GLOBAL_SCRIPTS.combat_handler
+        if combat:
+            combat.engagements.disengage(self)
+        # Effects are stored by id, which the revived hostile keeps
+        effect_handler = GLOBAL_SCRIPTS.stat_effect_handler
+        if effect_handler:
+            effect_handler.clear_character(self)
+        self.key = key
+        self.db.corpse = False
+        self.db.inactive = False
+        # Undo the corpse locks set by the combat handler
+        self.locks.add("delete:perm(Admin);puppet:pperm(Developer)")
+        # The corpse may come back as a different spawn entry, so drop the
+        # attributes its last entry set and put every AttributeProperty
+        # (stats, health, wounds, scars...) back to its default first
+        stale = set(self.db.spawn_attrs or ()) | attribute_property_names(type(self))
+        self.attributes.remove(list(stale))
+        self.init_evennia_properties()
+        attrs = attrs or {}
+        for attr_name, value in attrs.items():
+            self.attributes.add(attr_name, value)
+        self.db.spawn_attrs = list(attrs)
+        self.current_health = self.max_health
+        self.home = location
+        self.location = location
+
     def is_alive(self):
         """Check if this hostile is alive and attackable."""
         return not (self.db.corpse or self.db.inactive)
@@ -255,32 +319,13 @@ class Hostile(ObjectParent, DefaultCharacter):
         Returns:
             dict: All monster stats and skills
         """
-        return {
-            # Core stats
-            "power": self.power,
-            "agility": self.agility,
-            "speed": self.speed,
-            "vitality": self.vitality,
-            "resistance": self.resistance,
-            "focus": self.focus,
-            "discipline": self.discipline,
-            "intelligence": self.intelligence,
-            "wisdom": self.wisdom,
-            "charisma": self.charisma,
-            # Combat stats
-            "attack": self.attack,
-            "defense": self.defense,
+        stats = self.get_stat_snapshot()._asdict()
+        stats.update({
             "current_health": self.current_health,
             "max_health": self.max_health,
             "experience": self.experience,
-            # Skills
-            "weapons": self.weapons,
-            "shields": self.shields,
-            "armor": self.armor,
-            "physical_fitness": self.physical_fitness,
-            "combat_prowess": self.combat_prowess,
-            "evasive_maneuvers": self.evasive_maneuvers
-        }
+        })
+        return stats
         
     def heal(self, amount):
         """
@@ -332,7 +377,7 @@ class Hostile(ObjectParent, DefaultCharacter):
         if location in self.wounds and wound_desc in self.wounds[location]:
             self.wounds[location].remove(wound_desc)
             # 50% chance to leave a scar
-            if random.random() < 0.5:
+            if get_stream("wounds").random() < 0.5:
                 scar_desc = f"Scar from: {wound_desc}"
                 self.scars[location].append(scar_desc)
 
@@ -382,6 +427,26 @@ class Hostile(ObjectParent, DefaultCharacter):
         hit, damage, roundtime = combat.process_attack(self, target)
         return True
 
+    def at_ai_tick(self, players):
+        """
+        Called by the NPC AI scheduler when this hostile may act.
+        Fights back against whoever has built up the most threat
+        against it, or picks a player at random if aggressive.
+        
+        Args:
+            players (list): Connected characters in the same room
+            
+        Returns:
+            bool: Whether an attack was attempted
+        """
+        combat = GLOBAL_SCRIPTS.combat_handler
+        target = combat.engagements.top_threat(self, candidates=players) if combat else None
+        if not target and self.aggressive:
+            target = get_stream("ai").choice(players)
+        if not target:
+            return False
+        return self.npc_attack(target)
+
     def gain_experience(self, amount):
         """
         Add experience points to the hostile NPC.
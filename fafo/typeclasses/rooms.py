@@ -7,6 +7,7 @@ Rooms are simple containers that has no location of their own.
 from evennia.objects.objects import DefaultRoom
 from evennia import GLOBAL_SCRIPTS
 from .objects import ObjectParent
+from .exits import exit_direction
 
 
 class Room(ObjectParent, DefaultRoom):
@@ -40,8 +41,15 @@ class Room(ObjectParent, DefaultRoom):
         Returns:
             str: The display name of the room, including region name if set
         """
-        base_name = super().get_display_name(looker, **kwargs)
+        return self.region_prefix() + super().get_display_name(looker, **kwargs)
+
+    def region_prefix(self):
+        """
+        Get the descriptive region tag shown before the room's name.
         
+        Returns:
+            str: "[Region Name]", or an empty string without a named region
+        """
         # Get descriptive region if set
         if hasattr(self, 'db') and self.db.regions and self.db.regions.get('descriptive'):
             region_id = self.db.regions['descriptive']
@@ -51,10 +59,91 @@ class Room(ObjectParent, DefaultRoom):
                 if region_handler:
                     region_data = region_handler.get_region(region_id)
                     if region_data and 'name' in region_data:
-                        return f"[{region_data['name']}]{base_name}"
+                        return f"[{region_data['name']}]"
+        
+        # If no region or error getting region data, no prefix
+        return ""
+
+    @property
+    def exit_index(self):
+        """The room's compass direction -> exit map, built on first use."""
+        if self.ndb.exit_index is None:
+            index = {}
+            # Lowest id wins if two exits lead the same way
+            for exit_obj in sorted(self.exits, key=lambda obj: obj.id):
+                direction = exit_direction(exit_obj)
+                if direction and direction not in index:
+                    index[direction] = exit_obj
+            self.ndb.exit_index = index
+        return self.ndb.exit_index
+
+    def reset_exit_index(self):
+        """Drop the direction index after exits were added, removed or renamed."""
+        self.ndb.exit_index = None
+
+    def get_exit(self, direction):
+        """
+        Find the exit leading in a compass direction.
+        
+        Args:
+            direction (str): Long direction name
+            
+        Returns:
+            Object or None: The exit, or None if there is no way that direction
+        """
+        exit_obj = self.exit_index.get(direction)
+        if exit_obj is None or not exit_obj.pk or exit_obj.location != self:
+            # Exits may have been renamed or moved without telling the room
+            self.reset_exit_index()
+            exit_obj = self.exit_index.get(direction)
+        return exit_obj
+
+    def _appearance_cache(self):
+        """
+        Get the viewer-independent parts of the room's appearance: its
+        region tag and its exits, hostiles and things sorted into groups.
+        Display names depend on the viewer (builders see dbrefs), so they
+        are worked out per look. The cache is keyed on the room's name,
+        descriptive region and the ids and keys of everything in it, so it
+        is rebuilt whenever anything arrives, leaves or is renamed -
+        including degrading exits changing wear level.
         
-        # If no region or error getting region data, return base name
-        return base_name
+        Returns:
+            dict: The cached appearance parts
+        """
+        contents = self.contents
+        regions = self.db.regions or {}
+        signature = (self.db_key, regions.get('descriptive'),
+                     tuple((con.id, con.db_key) for con in contents))
+        cache = self.ndb.appearance_cache
+        if cache is not None and cache["signature"] == signature:
+            return cache
+
+        exits, hostiles, things, characters = [], [], [], []
+        for con in contents:
+            if con.account:
+                # Whether a character is connected can change at any time
+                characters.append(con)
+                continue
+            # Objects with their own view lock are checked per viewer
+            entry = (con, con.locks.get("view") != "view:all()")
+            if con.destination:
+                exits.append(entry)
+            elif hasattr(con, 'is_alive'): # Check if it's a hostile
+                hostiles.append(entry)
+            else:
+                things.append(entry)
+
+        cache = {
+            "signature": signature,
+            "region_prefix": self.region_prefix(),
+            "exits": exits,
+            "hostiles": hostiles,
+            "things": things,
+            "characters": characters,
+        }
+        self.ndb.appearance_cache = cache
+        return cache
 
     def return_appearance(self, looker, **kwargs):
         """
@@ -68,23 +157,29 @@ class Room(ObjectParent, DefaultRoom):
         if not looker:
             return ""
 
-        # get and identify all objects
-        visible = (con for con in self.contents if con != looker and con.access(looker, "view"))
-        exits, users, things, hostiles = [], [], [], []
-        
-        for con in visible:
-            key = con.get_display_name(looker)
-            if con.destination:
-                exits.append(key)
-            elif con.has_account:
-                users.append(key)
-            elif hasattr(con, 'is_alive'): # Check if it's a hostile
-                hostiles.append(key)
+        cache = self._appearance_cache()
+
+        def visible(entries):
+            return [con.get_display_name(looker) for con, check in entries
+                    if con != looker and (not check or con.access(looker, "view"))]
+
+        exits = visible(cache["exits"])
+        hostiles = visible(cache["hostiles"])
+        things = visible(cache["things"])
+
+        # Characters are sorted per viewer, depending on who is connected
+        users = []
+        for con in cache["characters"]:
+            if con == looker or not con.access(looker, "view"):
+                continue
+            if con.has_account:
+                users.append(con.get_display_name(looker))
             else:
-                things.append(key)
+                things.append(con.get_display_name(looker))
 
         # get description, build string
-        string = f"|c{self.get_display_name(looker)}|n\n"
+        name = cache["region_prefix"] + super().get_display_name(looker)
+        string = f"|c{name}|n\n"
         desc = self.db.desc
         
         if desc:
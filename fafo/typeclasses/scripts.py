@@ -109,6 +109,28 @@ Scripts for fafo.
 
 from evennia import DefaultScript
 
+# Coordinate offset of one step in each compass direction
+COMPASS_OFFSETS = {
+    "north": (0, 1, 0), "northeast": (1, 1, 0),
+    "east": (1, 0, 0), "southeast": (1, -1, 0),
+    "south": (0, -1, 0), "southwest": (-1, -1, 0),
+    "west": (-1, 0, 0), "northwest": (-1, 1, 0)
+}
+
+# Short form of every compass direction
+COMPASS_SHORT_FORMS = {
+    "north": "n", "northeast": "ne", "east": "e", "southeast": "se",
+    "south": "s", "southwest": "sw", "west": "w", "northwest": "nw"
+}
+
+# Offsets of all 26 cells around a room, labelled e.g. "up", "north down"
+NEIGHBOR_OFFSETS_3D = {
+    **COMPASS_OFFSETS,
+    "up": (0, 0, 1), "down": (0, 0, -1),
+    **{f"{direction} up": (dx, dy, 1) for direction, (dx, dy, _) in COMPASS_OFFSETS.items()},
+    **{f"{direction} down": (dx, dy, -1) for direction, (dx, dy, _) in COMPASS_OFFSETS.items()},
+}
+
 class RoomBlockScript(DefaultScript):
     """
     Script for managing room block numbers.
@@ -140,6 +162,8 @@ class CoordMapScript(DefaultScript):
         self.persistent = True
         # Initialize coordinate tracking
         self.db.rooms = {}  # Format: {room.id: (x, y, z)}
+        # Reverse index for O(1) lookups by position
+        self.db.coord_index = {}  # Format: {(x, y, z): room.id}
         # Track the bounds of the map
         self.db.bounds = {
             'min_x': 0, 'max_x': 0,
@@ -157,17 +181,62 @@ class CoordMapScript(DefaultScript):
             y (int): Y coordinate
             z (int): Z coordinate (default: 0)
         """
+        coords = (x, y, z)
+        
+        rooms = self.rooms
+        coord_index = self.coord_index
+        bounds = self.bounds
+        
+        # Drop the room's old position from the index if it is moving
+        old_coords = rooms.get(room.id)
+        if old_coords and old_coords != coords and coord_index.get(old_coords) == room.id:
+            del coord_index[old_coords]
+        
         # Store coordinates both in script and on room
-        self.db.rooms[room.id] = (x, y, z)
+        rooms[room.id] = coords
+        coord_index[coords] = room.id
+        self.room_cache[room.id] = room
         room.db.coordinates = {'x': x, 'y': y, 'z': z}
         
         # Update bounds
-        self.db.bounds['min_x'] = min(self.db.bounds['min_x'], x)
-        self.db.bounds['max_x'] = max(self.db.bounds['max_x'], x)
-        self.db.bounds['min_y'] = min(self.db.bounds['min_y'], y)
-        self.db.bounds['max_y'] = max(self.db.bounds['max_y'], y)
-        self.db.bounds['min_z'] = min(self.db.bounds['min_z'], z)
-        self.db.bounds['max_z'] = max(self.db.bounds['max_z'], z)
+        bounds['min_x'] = min(bounds['min_x'], x)
+        bounds['max_x'] = max(bounds['max_x'], x)
+        bounds['min_y'] = min(bounds['min_y'], y)
+        bounds['max_y'] = max(bounds['max_y'], y)
+        bounds['min_z'] = min(bounds['min_z'], z)
+        bounds['max_z'] = max(bounds['max_z'], z)
+        self.save_map()
+    
+    def set_many_room_coords(self, rooms_coords):
+        """
+        Set coordinates for many rooms with a single write of the map.
+        Unlike set_room_coords, this does not write db.coordinates on each
+        room; bulk builders set that when creating the rooms.
+        
+        Args:
+            rooms_coords (iterable): (room, (x, y, z)) pairs
+        """
+        rooms = self.rooms
+        coord_index = self.coord_index
+        bounds = self.bounds
+        
+        for room, coords in rooms_coords:
+            x, y, z = coords
+            old_coords = rooms.get(room.id)
+            if old_coords and old_coords != coords and coord_index.get(old_coords) == room.id:
+                del coord_index[old_coords]
+            rooms[room.id] = coords
+            coord_index[coords] = room.id
+            self.room_cache[room.id] = room
+            
+            bounds['min_x'] = min(bounds['min_x'], x)
+            bounds['max_x'] = max(bounds['max_x'], x)
+            bounds['min_y'] = min(bounds['min_y'], y)
+            bounds['max_y'] = max(bounds['max_y'], y)
+            bounds['min_z'] = min(bounds['min_z'], z)
+            bounds['max_z'] = max(bounds['max_z'], z)
+            
+        self.save_map()
     
     def get_room_coords(self, room):
         """
@@ -182,7 +251,7 @@ class CoordMapScript(DefaultScript):
         if not room or not room.id:
             return None
             
-        return self.db.rooms.get(room.id)
+        return self.rooms.get(room.id)
     
     def get_room_at_coords(self, x, y, z=0):
         """
@@ -196,16 +265,166 @@ class CoordMapScript(DefaultScript):
         Returns:
             Object or None: Room at coordinates if found
         """
+        room_id = self.coord_index.get((x, y, z))
+        if room_id is None:
+            return None
+            
+        room = self.get_room_by_id(room_id)
+        if not room:
+            # Room no longer exists, clean up our tracking
+            self.remove_room_id(room_id)
+        return room
+    
+    def neighbors(self, coords, vertical=False):
+        """
+        Find the rooms around a position by probing each neighboring cell
+        in the coordinate index, rather than scanning the whole map.
+        
+        Args:
+            coords (tuple): (x, y, z) position to look around
+            vertical (bool): Also probe the 18 cells above and below,
+                not just the 8 on the same level
+            
+        Returns:
+            dict: {direction: room} for each occupied neighboring cell,
+                where direction leads from coords to the room
+        """
+        x, y, z = coords
+        offsets = NEIGHBOR_OFFSETS_3D if vertical else COMPASS_OFFSETS
+        found = {}
+        for direction, (dx, dy, dz) in offsets.items():
+            room = self.get_room_at_coords(x + dx, y + dy, z + dz)
+            if room:
+                found[direction] = room
+        return found
+    
+    def get_room_by_id(self, room_id):
+        """
+        Get a tracked room object, using the in-memory cache when possible.
+        
+        Args:
+            room_id (int): Database id of the room
+            
+        Returns:
+            Object or None: The room, or None if it no longer exists
+        """
         from evennia import ObjectDB
         
-        for room_id, coords in self.db.rooms.items():
-            if coords == (x, y, z):
-                try:
-                    return ObjectDB.objects.get(id=room_id)
-                except ObjectDB.DoesNotExist:
-                    # Room no longer exists, clean up our tracking
-                    del self.db.rooms[room_id]
-        return None
+        room = self.room_cache.get(room_id)
+        if room is not None and room.pk:
+            return room
+            
+        try:
+            room = ObjectDB.objects.get(id=room_id)
+        except ObjectDB.DoesNotExist:
+            self.room_cache.pop(room_id, None)
+            return None
+            
+        self.room_cache[room_id] = room
+        return room
+    
+    def remove_room(self, room):
+        """
+        Stop tracking a room's coordinates.
+        
+        Args:
+            room (Object): The room to remove
+        """
+        if room and room.id:
+            self.remove_room_id(room.id)
+    
+    def remove_room_id(self, room_id):
+        """
+        Stop tracking coordinates for a room id.
+        
+        Args:
+            room_id (int): Database id of the room to remove
+        """
+        coords = self.rooms.pop(room_id, None)
+        if coords is not None:
+            if self.coord_index.get(coords) == room_id:
+                del self.coord_index[coords]
+            self.save_map()
+        self.room_cache.pop(room_id, None)
+    
+    def remove_rooms(self, room_ids):
+        """
+        Stop tracking many rooms with a single write of the map.
+        
+        Args:
+            room_ids (iterable): Database ids of the rooms to remove
+        """
+        rooms = self.rooms
+        coord_index = self.coord_index
+        for room_id in room_ids:
+            coords = rooms.pop(room_id, None)
+            if coords is not None and coord_index.get(coords) == room_id:
+                del coord_index[coords]
+            self.room_cache.pop(room_id, None)
+        self.save_map()
+    
+    def rebuild_index(self):
+        """
+        Rebuild the coordinate index from the room coordinate table.
+        Used for maps created before the index existed.
+        """
+        self.ndb.coord_index = {coords: room_id for room_id, coords in self.rooms.items()}
+        self.db.coord_index = self.ndb.coord_index
+    
+    def load_map(self):
+        """
+        Load the coordinate table, index and bounds into memory. Reading
+        a db attribute unpickles the whole value every time, so lookups
+        are served from these plain copies and db is only written when
+        the map changes.
+        """
+        rooms = self.db.rooms
+        self.ndb.rooms = dict(rooms) if rooms else {}
+        bounds = self.db.bounds
+        self.ndb.bounds = dict(bounds) if bounds else {
+            'min_x': 0, 'max_x': 0,
+            'min_y': 0, 'max_y': 0,
+            'min_z': 0, 'max_z': 0
+        }
+        coord_index = self.db.coord_index
+        if coord_index is None:
+            self.rebuild_index()
+        else:
+            self.ndb.coord_index = dict(coord_index)
+    
+    def save_map(self):
+        """Write the in-memory coordinate table, index and bounds back to db."""
+        self.db.rooms = self.rooms
+        self.db.coord_index = self.coord_index
+        self.db.bounds = self.bounds
+    
+    @property
+    def rooms(self):
+        """In-memory room id -> (x, y, z) table."""
+        if self.ndb.rooms is None:
+            self.load_map()
+        return self.ndb.rooms
+    
+    @property
+    def coord_index(self):
+        """In-memory (x, y, z) -> room id index."""
+        if self.ndb.coord_index is None:
+            self.load_map()
+        return self.ndb.coord_index
+    
+    @property
+    def bounds(self):
+        """In-memory map bounds."""
+        if self.ndb.bounds is None:
+            self.load_map()
+        return self.ndb.bounds
+    
+    @property
+    def room_cache(self):
+        """Non-persistent room id -> room object cache."""
+        if self.ndb.room_cache is None:
+            self.ndb.room_cache = {}
+        return self.ndb.room_cache
     
     def calculate_next_coords(self, base_room, direction):
         """
@@ -297,7 +516,10 @@ class RegionManagerScript(DefaultScript):
         if not manager:
             raise ValueError(f"Invalid region type: {region_type}")
             
-        return manager.apply_to_room(room, region_id)
+        result = manager.apply_to_room(room, region_id)
+        if region_type == "spawning":
+            self._update_spawner(room)
+        return result
     
     def remove_region_from_room(self, room, region_type, region_id=None):
         """
@@ -314,7 +536,10 @@ class RegionManagerScript(DefaultScript):
             
         if region_id:
             # Remove specific region
-            return manager.remove_from_room(room, region_id)
+            result = manager.remove_from_room(room, region_id)
+            if region_type == "spawning":
+                self._update_spawner(room)
+            return result
         else:
             # For descriptive regions, remove the single region if it exists
             if region_type == "descriptive":
@@ -329,5 +554,14 @@ class RegionManagerScript(DefaultScript):
                 for rid in regions:
                     if manager.remove_from_room(room, rid):
                         success = True
+                if region_type == "spawning":
+                    self._update_spawner(room)
                 return success
             return False
+    
+    def _update_spawner(self, room):
+        """Keep the spawn engine's region index in step with a room's spawning regions."""
+        from evennia import GLOBAL_SCRIPTS
+        spawner = GLOBAL_SCRIPTS.spawn_engine
+        if spawner:
+            spawner.update_room(room)
@@ -0,0 +1,526 @@
+"""
+Bulk world building
+
+Large builds are planned entirely in memory first: the coordinates of
+every new room and every exit between rooms. The plan is then carried
+out in batched transactions, and all new coordinates are written to the
+coordinate map in a single update, instead of paying for a save, a tag
+scan and an exit scan for every single room.
+
+Builders and deleters expose steps(), a generator doing one batch per
+iteration, so scripts.build_jobs can spread large jobs over time.
+"""
+from django.db import transaction
+from django.db.models import Q
+from django.db.models import CharField, Value
+from django.db.models.functions import Cast, Concat
+from evennia import ObjectDB, create_object, settings
+from scripts.rng import get_stream
+from typeclasses.scripts import COMPASS_OFFSETS, COMPASS_SHORT_FORMS
+
+# Short form of every compass direction
+SHORT_FORMS = COMPASS_SHORT_FORMS
+LONG_FORMS = {short: long for long, short in SHORT_FORMS.items()}
+
+OPPOSITES = {
+    "north": "south", "northeast": "southwest",
+    "east": "west", "southeast": "northwest",
+    "south": "north", "southwest": "northeast",
+    "west": "east", "northwest": "southeast"
+}
+
+# Coordinate offset of one step in each direction
+DIRECTION_OFFSETS = COMPASS_OFFSETS
+
+OFFSET_DIRECTIONS = {offset: direction for direction, offset in DIRECTION_OFFSETS.items()}
+
+CARDINAL_DIRECTIONS = ("north", "east", "south", "west")
+COMPASS_DIRECTIONS = tuple(DIRECTION_OFFSETS)
+
+# Objects created per transaction, kept small so each step is short
+ROOMS_PER_BATCH = 25
+EXITS_PER_BATCH = 100
+
+# Ids per query when looking objects up by a list of rooms
+QUERY_CHUNK = 400
+
+# Cells claimed by builds that are still running but not yet on the map
+RESERVED_COORDS = set()
+
+class BuildError(Exception):
+    """Raised when a build can't be planned, e.g. a planned cell is taken."""
+    pass
+
+def offset_coords(coords, direction, steps=1):
+    """
+    Move coordinates a number of steps in a direction.
+
+    Args:
+        coords (tuple): (x, y, z) to start from
+        direction (str): Long or short direction name
+        steps (int): Number of steps to move
+
+    Returns:
+        tuple: The new (x, y, z)
+    """
+    dx, dy, dz = DIRECTION_OFFSETS[LONG_FORMS.get(direction, direction)]
+    x, y, z = coords
+    return (x + dx * steps, y + dy * steps, z + dz * steps)
+
+def direction_between(coords1, coords2):
+    """
+    Get the compass direction leading from one cell to an adjacent one.
+
+    Returns:
+        str or None: Long direction name, or None if the cells aren't adjacent
+    """
+    offset = tuple(b - a for a, b in zip(coords1, coords2))
+    return OFFSET_DIRECTIONS.get(offset)
+
+def is_free(coord_map, coords):
+    """Check that no room exists or is being built at the coordinates."""
+    return coords not in RESERVED_COORDS and not coord_map.get_room_at_coords(*coords)
+
+def forward_aliases(direction):
+    """Aliases for an exit keyed as typed: the other form of the direction."""
+    if direction in LONG_FORMS:
+        return [LONG_FORMS[direction]]
+    if direction in SHORT_FORMS:
+        return [SHORT_FORMS[direction]]
+    return []
+
+class BuildPlan:
+    """
+    Rooms and exits to create, held in memory until the build runs.
+
+    Planned rooms are referred to by their coordinates; rooms that already
+    exist are referred to by the room object itself.
+    """
+    def __init__(self, block_num, region_id=None, exit_typeclass=None):
+        """
+        Start an empty plan.
+
+        Args:
+            block_num (int): Room block the new rooms belong to
+            region_id (str, optional): Descriptive region for the new rooms
+            exit_typeclass (class, optional): Typeclass for the new exits
+        """
+        self.block_num = block_num
+        self.region_id = region_id
+        self.exit_typeclass = exit_typeclass or settings.BASE_EXIT_TYPECLASS
+        self.rooms = []  # Coordinates of new rooms, in creation order
+        self.exits = []  # (source, destination, key, aliases, back_key, back_aliases)
+        self.planned = set()
+
+    def add_room(self, coords):
+        """
+        Plan a new room at the given coordinates.
+
+        Raises:
+            BuildError: If a room is already planned there
+        """
+        if coords in self.planned:
+            raise BuildError(f"the build overlaps itself at coordinates "
+                             f"({coords[0]}, {coords[1]}, {coords[2]})")
+        self.rooms.append(coords)
+        self.planned.add(coords)
+
+    def add_exits(self, source, destination, key, aliases, back_key, back_aliases):
+        """
+        Plan an exit and its return exit. The return exit is only created
+        if the forward one is.
+        """
+        self.exits.append((source, destination, key, aliases, back_key, back_aliases))
+
+    def connect_neighbors(self, coord_map, coords, directions=CARDINAL_DIRECTIONS, exclude=()):
+        """
+        Plan exits between a planned room and the existing rooms around it.
+
+        Args:
+            coord_map (CoordMapScript): The coordinate map
+            coords (tuple): Coordinates of the planned room
+            directions (iterable): Directions to look in
+            exclude (iterable): Coordinates of existing rooms to leave alone
+        """
+        for neighbor_dir, neighbor in coord_map.neighbors(coords).items():
+            # The neighbor's exit points back the opposite way, towards coords
+            direction = OPPOSITES[neighbor_dir]
+            if direction not in directions:
+                continue
+            neighbor_coords = offset_coords(coords, neighbor_dir)
+            if neighbor_coords in self.planned or neighbor_coords in exclude:
+                continue
+            self.add_exits(neighbor, coords, direction, [SHORT_FORMS[direction]],
+                           neighbor_dir, [SHORT_FORMS[neighbor_dir]])
+
+    def check_free(self, coord_map):
+        """
+        Make sure no planned room collides with an existing one.
+
+        Raises:
+            BuildError: If a planned cell is already taken
+        """
+        for coords in self.rooms:
+            if coords in RESERVED_COORDS:
+                raise BuildError(f"another build is using coordinates "
+                                 f"({coords[0]}, {coords[1]}, {coords[2]})")
+            existing = coord_map.get_room_at_coords(*coords)
+            if existing:
+                raise BuildError(f"room {existing.key} already exists at coordinates "
+                                 f"({coords[0]}, {coords[1]}, {coords[2]})")
+
+def plan_grid(coord_map, start_room, dir1, num1, dir2, num2, block_num,
+              region_id=None, exit_typeclass=None, connect=False):
+    """
+    Plan a grid of rooms extending from a start room in two directions.
+    The start room is the grid's first corner.
+
+    Args:
+        coord_map (CoordMapScript): The coordinate map
+        start_room (Object): Existing room the grid grows from
+        dir1 (str): First direction, as typed
+        num1 (int): Rooms to add in the first direction
+        dir2 (str): Second direction, as typed
+        num2 (int): Rows to add in the second direction
+        block_num (int): Room block for the new rooms
+        region_id (str, optional): Descriptive region for the new rooms
+        exit_typeclass (class, optional): Typeclass for the new exits
+        connect (bool): Also connect to adjacent existing rooms
+
+    Returns:
+        BuildPlan: The planned grid
+
+    Raises:
+        BuildError: If the grid would overlap an existing room
+    """
+    plan = BuildPlan(block_num, region_id=region_id, exit_typeclass=exit_typeclass)
+    base_coords = coord_map.get_room_coords(start_room) or (0, 0, 0)
+
+    def cell(i, j):
+        """The start room for the first corner, coordinates for every other cell."""
+        if i == 0 and j == 0:
+            return start_room
+        return offset_coords(offset_coords(base_coords, dir1, i), dir2, j)
+
+    for j in range(num2 + 1):
+        for i in range(num1 + 1):
+            if i or j:
+                plan.add_room(cell(i, j))
+    plan.check_free(coord_map)
+
+    dir1_back = OPPOSITES[LONG_FORMS.get(dir1, dir1)]
+    dir2_back = OPPOSITES[LONG_FORMS.get(dir2, dir2)]
+    for j in range(num2 + 1):
+        for i in range(num1 + 1):
+            if i:
+                plan.add_exits(cell(i - 1, j), cell(i, j), dir1, forward_aliases(dir1),
+                               dir1_back, [SHORT_FORMS[dir1_back]])
+            if j:
+                plan.add_exits(cell(i, j - 1), cell(i, j), dir2, forward_aliases(dir2),
+                               dir2_back, [SHORT_FORMS[dir2_back]])
+
+    if connect:
+        for coords in plan.rooms:
+            plan.connect_neighbors(coord_map, coords)
+    return plan
+
+def plan_maze(coord_map, start_room, direction, number, block_num,
+              region_id=None, exit_typeclass=None, connect=False, rng=None):
+    """
+    Plan a randomly branching maze of rooms, starting one step from a room.
+    Each new room branches off a random earlier one in a random free
+    compass direction, with an occasional extra link between neighbors.
+
+    Args:
+        coord_map (CoordMapScript): The coordinate map
+        start_room (Object): Existing room the maze starts next to
+        direction (str): Direction of the first room, as typed
+        number (int): Rooms to place
+        block_num (int): Room block for the new rooms
+        region_id (str, optional): Descriptive region for the new rooms
+        exit_typeclass (class, optional): Typeclass for the new exits
+        connect (bool): Also connect to adjacent existing rooms
+        rng (Random, optional): Random generator used for the layout,
+            defaults to the "build" stream
+
+    Returns:
+        BuildPlan: The planned maze; plan.stopped_early is True if fewer
+            than number rooms could be placed
+
+    Raises:
+        BuildError: If the first cell is already taken
+    """
+    rng = rng or get_stream("build")
+    plan = BuildPlan(block_num, region_id=region_id, exit_typeclass=exit_typeclass)
+    plan.stopped_early = False
+    start_coords = coord_map.get_room_coords(start_room) or (0, 0, 0)
+    exclude = {start_coords}
+
+    def cell_free(coords):
+        return coords not in plan.planned and is_free(coord_map, coords)
+
+    first_coords = offset_coords(start_coords, direction)
+    if not cell_free(first_coords):
+        raise BuildError("a room already exists in that direction!")
+    plan.add_room(first_coords)
+    back_dir = OPPOSITES[LONG_FORMS.get(direction, direction)]
+    plan.add_exits(start_room, first_coords, direction, forward_aliases(direction),
+                   back_dir, [SHORT_FORMS[back_dir]])
+    if connect:
+        plan.connect_neighbors(coord_map, first_coords, COMPASS_DIRECTIONS, exclude=exclude)
+
+    for i in range(number - 1):
+        # Try up to 10 different source rooms
+        new_coords = None
+        for attempt in range(10):
+            source = rng.choice(plan.rooms)
+            directions = list(COMPASS_DIRECTIONS)
+            rng.shuffle(directions)
+            for rand_dir in directions:
+                if cell_free(offset_coords(source, rand_dir)):
+                    new_coords = offset_coords(source, rand_dir)
+                    break
+            if new_coords:
+                break
+        if not new_coords:
+            plan.stopped_early = True
+            break
+
+        plan.add_room(new_coords)
+        if connect:
+            plan.connect_neighbors(coord_map, new_coords, COMPASS_DIRECTIONS, exclude=exclude)
+        back_dir = OPPOSITES[rand_dir]
+        plan.add_exits(source, new_coords, rand_dir, [SHORT_FORMS[rand_dir]],
+                       back_dir, [SHORT_FORMS[back_dir]])
+
+        # 30% chance for an additional connection to a nearby earlier room
+        if i > 0 and rng.random() < 0.3:
+            earlier = plan.rooms[:-1]
+            for other in rng.sample(earlier, min(3, len(earlier))):
+                if other != source:
+                    link_dir = direction_between(other, new_coords)
+                    if link_dir:
+                        link_back = OPPOSITES[link_dir]
+                        plan.add_exits(other, new_coords, link_dir, [SHORT_FORMS[link_dir]],
+                                       link_back, [SHORT_FORMS[link_back]])
+                    break
+    return plan
+
+class BulkBuilder:
+    """
+    Carries out a BuildPlan in batched transactions.
+
+    steps() is a generator that does one batch per iteration, so the
+    caller decides whether to run it all at once or spread it out.
+    """
+    def __init__(self, plan, coord_map):
+        """
+        Args:
+            plan (BuildPlan): What to build
+            coord_map (CoordMapScript): The coordinate map to register rooms in
+        """
+        self.plan = plan
+        self.coord_map = coord_map
+        self.created = {}  # coords -> new room
+        self.new_ids = set()
+        self.exits_created = 0
+        self.coords_registered = False
+        self._exit_names = {}  # existing room id -> set of lowercase exit keys and aliases
+
+    def run(self):
+        """
+        Build everything at once.
+
+        Returns:
+            list: The new rooms
+        """
+        for _ in self.steps():
+            pass
+        return list(self.created.values())
+
+    def steps(self):
+        """
+        Build the plan one batch at a time.
+
+        Yields:
+            tuple: (stage, done, total) after each batch
+        """
+        plan = self.plan
+        # The map may have changed since planning if the job waited
+        plan.check_free(self.coord_map)
+        RESERVED_COORDS.update(plan.rooms)
+        try:
+            total_rooms = len(plan.rooms)
+            for start in range(0, total_rooms, ROOMS_PER_BATCH):
+                self.create_rooms(plan.rooms[start:start + ROOMS_PER_BATCH])
+                yield "rooms", min(start + ROOMS_PER_BATCH, total_rooms), total_rooms
+        finally:
+            # Runs on cancel too, so no created room is left off the map
+            self.register_coords()
+            RESERVED_COORDS.difference_update(plan.rooms)
+
+        total_exits = len(plan.exits)
+        for start in range(0, total_exits, EXITS_PER_BATCH):
+            self.create_exits(plan.exits[start:start + EXITS_PER_BATCH])
+            yield "exits", min(start + EXITS_PER_BATCH, total_exits), total_exits
+
+    def register_coords(self):
+        """Write every created room's coordinates to the map in one update."""
+        if self.coords_registered:
+            return
+        self.coords_registered = True
+        self.coord_map.set_many_room_coords(
+            (self.created[coords], coords) for coords in self.plan.rooms if coords in self.created)
+
+    def create_rooms(self, batch):
+        """
+        Create a batch of rooms in one transaction, with their block tag,
+        coordinates and region set at creation.
+
+        Args:
+            batch (list): Coordinates of the rooms to create
+        """
+        plan = self.plan
+        prefix = f"Block {plan.block_num} Room"
+        rooms = []
+        with transaction.atomic():
+            for coords in batch:
+                x, y, z = coords
+                room = create_object(
+                    settings.BASE_ROOM_TYPECLASS, key=prefix,
+                    tags=[(f"room_block_{plan.block_num}", "room_block")],
+                    attributes=[
+                        ("coordinates", {'x': x, 'y': y, 'z': z}),
+                        ("regions", {'descriptive': plan.region_id, 'spawning': None, 'resource': None}),
+                    ])
+                self.created[coords] = room
+                self.new_ids.add(room.id)
+                rooms.append(room)
+            # Name every room after its id with a single UPDATE
+            ObjectDB.objects.filter(id__in=[room.id for room in rooms]).update(
+                db_key=Concat(Value(prefix), Cast("id", output_field=CharField())))
+        for room in rooms:
+            room.db_key = f"{prefix}{room.id}"
+
+    def _resolve(self, ref):
+        """Turn a planned room's coordinates into the created room."""
+        if isinstance(ref, tuple):
+            return self.created.get(ref)
+        return ref
+
+    def _exit_taken(self, room, key, aliases):
+        """Check an existing room for an exit already using any of the names."""
+        names = self._exit_names.get(room.id)
+        if names is None:
+            names = set()
+            for exit_obj in room.exits:
+                names.add(exit_obj.key.lower())
+                names.update(alias.lower() for alias in exit_obj.aliases.all())
+            self._exit_names[room.id] = names
+        return any(name.lower() in names for name in [key] + aliases)
+
+    def _create_exit(self, source, destination, key, aliases):
+        """Create one exit, unless an existing source room already has one by that name."""
+        if source.id not in self.new_ids:
+            if self._exit_taken(source, key, aliases):
+                return False
+            self._exit_names[source.id].update(name.lower() for name in [key] + aliases)
+        create_object(self.plan.exit_typeclass, key=key, aliases=aliases,
+                      location=source, destination=destination)
+        self.exits_created += 1
+        return True
+
+    def create_exits(self, batch):
+        """
+        Create a batch of exit pairs in one transaction.
+
+        Args:
+            batch (list): Planned exit pairs
+        """
+        with transaction.atomic():
+            for source, destination, key, aliases, back_key, back_aliases in batch:
+                source = self._resolve(source)
+                destination = self._resolve(destination)
+                if not source or not destination:
+                    continue
+                if self._create_exit(source, destination, key, aliases):
+                    self._create_exit(destination, source, back_key, back_aliases)
+
+class BulkDeleter:
+    """
+    Deletes rooms and every exit leading into or out of them.
+
+    steps() is a generator that does one batch per iteration, like
+    BulkBuilder.steps().
+    """
+    def __init__(self, rooms, coord_map):
+        """
+        Args:
+            rooms (iterable): The rooms to delete
+            coord_map (CoordMapScript): The coordinate map to remove them from
+        """
+        self.rooms = [room for room in rooms if room.pk]
+        self.coord_map = coord_map
+        self.rooms_deleted = 0
+        self.exits_deleted = 0
+
+    def run(self):
+        """Delete everything at once."""
+        for _ in self.steps():
+            pass
+
+    def find_exits(self):
+        """
+        Find every exit leading out of or into the rooms, using indexed
+        lookups on location and destination instead of scanning all exits.
+
+        Returns:
+            list: The exits, in no particular order
+        """
+        room_ids = [room.id for room in self.rooms]
+        exits = {}
+        # Chunked to stay under the database's query parameter limit
+        for start in range(0, len(room_ids), QUERY_CHUNK):
+            chunk = room_ids[start:start + QUERY_CHUNK]
+            query = ObjectDB.objects.filter(
+                Q(db_location__id__in=chunk) | Q(db_destination__id__in=chunk),
+                db_destination__isnull=False)
+            for exit in query:
+                exits[exit.id] = exit
+        return list(exits.values())
+
+    def steps(self):
+        """
+        Delete one batch at a time.
+
+        Yields:
+            tuple: (stage, done, total) after each batch
+        """
+        # Delete exits first
+        exits = self.find_exits()
+        total_exits = len(exits)
+        yield "scanning", len(self.rooms), len(self.rooms)
+        for start in range(0, total_exits, EXITS_PER_BATCH):
+            with transaction.atomic():
+                for exit in exits[start:start + EXITS_PER_BATCH]:
+                    if exit.pk:
+                        exit.delete()
+                        self.exits_deleted += 1
+            yield "exits", min(start + EXITS_PER_BATCH, total_exits), total_exits
+
+        # Then delete rooms, dropping them all from the map in one update
+        deleted_ids = []
+        total_rooms = len(self.rooms)
+        try:
+            for start in range(0, total_rooms, ROOMS_PER_BATCH):
+                with transaction.atomic():
+                    for room in self.rooms[start:start + ROOMS_PER_BATCH]:
+                        if room.pk:
+                            room_id = room.id
+                            room.delete()
+                            deleted_ids.append(room_id)
+                            self.rooms_deleted += 1
+                yield "rooms", min(start + ROOMS_PER_BATCH, total_rooms), total_rooms
+        finally:
+            # Runs on cancel too, so no deleted room is left on the map
+            self.coord_map.remove_rooms(deleted_ids)